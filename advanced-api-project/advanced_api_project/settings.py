@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -136,5 +137,40 @@ REST_FRAMEWORK = {
         "rest_framework.filters.SearchFilter",
         "rest_framework.filters.OrderingFilter",
     ],
+    "DEFAULT_PAGINATION_CLASS": "api.pagination.OrderingCursorPagination",
+    "PAGE_SIZE": 20,
+    "LIST_SERIALIZER_ERRORS_AS_DICT": True,
 }
 
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "advanced-api-project",
+    }
+}
+
+# Seconds a cached Book API response stays fresh (writes invalidate it at once)
+API_RESPONSE_CACHE_TIMEOUT = 60
+
+# Seconds an expired response may still be served while it is refreshed in
+# the background; 0 disables stale-while-revalidate
+API_RESPONSE_CACHE_STALE_WHILE_REVALIDATE = 0
+
+# /api/changes/ long polling: longest ?wait= honoured, how often a waiting
+# request checks for changes made by other processes, and how many requests
+# per process may wait at once. Each waiter holds a worker thread, so keep
+# the wait well below the server's worker timeout (gunicorn: 30 s).
+API_CHANGES_MAX_WAIT = 10
+API_CHANGES_POLL_INTERVAL = 1.0
+API_CHANGES_MAX_WAITERS = 8
+
+# Seconds a change must be old before /api/changes/ serves it, so that
+# transactions committing out of sequence order are not skipped. None
+# picks 0 on SQLite (a single writer) and 5 elsewhere.
+API_CHANGES_SAFETY_LAG = None
+
+# Serve the Book list and detail endpoints with async views that use the
+# async ORM (api.async_views). Only worth it under an ASGI server
+# (advanced_api_project.asgi).
+API_ASYNC_VIEWS = os.getenv("API_ASYNC_VIEWS", "0") == "1"
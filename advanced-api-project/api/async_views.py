@@ -0,0 +1,135 @@
+"""
+Async versions of DRF read views, for ASGI deployments.
+
+DRF's APIView.dispatch() is synchronous, so under an ASGI server Django
+runs every DRF view in a worker thread. AsyncReadMixin makes dispatch() a
+coroutine and reads the database with the async ORM (aget(), aiterator())
+instead. Authentication, permissions, filtering, pagination, serialization
+and the response cache (api.cache) work as in the sync views.
+
+The database cannot be queried synchronously from the event loop, so:
+- request.user is loaded with auser() before DRF authenticates the request,
+  and requests with an Authorization header (Basic auth checks the
+  password against the database) are authenticated in a worker thread
+- filters that query the database themselves run in a worker thread when
+  one of the view's `threaded_filter_params` is in the query string
+  (BookSearchFilter counts matching index rows, for instance)
+- offset pagination and streamed lists run in a worker thread
+- values_list() querysets (the FastReadMixin path) are read in a worker
+  thread too: Django's ValuesListIterable runs its query as soon as
+  aiterator() starts, on the event loop (see aread())
+- responses are rendered with JSON renderers only: the browsable API
+  renders forms that query the database
+"""
+import inspect
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.db.models.query import ValuesListIterable
+from django.http import Http404, HttpResponse
+from django.template.response import SimpleTemplateResponse
+from rest_framework.response import Response
+
+
+async def aread(queryset):
+    """
+    Return the rows of `queryset` as a list, without querying from the
+    event loop.
+    """
+    if issubclass(queryset._iterable_class, ValuesListIterable):
+        return await sync_to_async(list)(queryset)
+    return [row async for row in queryset.aiterator()]
+
+
+class AsyncReadMixin:
+    """
+    GenericAPIView mixin for async GET handlers (see module docstring).
+
+    Subclasses define `async def get()`, typically with alist() or
+    aretrieve().
+    """
+    threaded_filter_params = ()
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        if hasattr(request, "auser"):
+            request.user = await request.auser()
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            if "HTTP_AUTHORIZATION" in request.META:
+                await sync_to_async(self.initial)(request, *args, **kwargs)
+            else:
+                self.initial(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+            response = handler(request, *args, **kwargs)
+            if inspect.isawaitable(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        response = self.finalize_response(request, response, *args, **kwargs)
+        if isinstance(response, SimpleTemplateResponse):
+            # Django renders a TemplateResponse (as DRF's Response is) in a
+            # worker thread; a rendered plain response is sent as it is
+            response.render()
+            plain = HttpResponse(response.content, status=response.status_code, headers=response.headers)
+            # Still readable like a DRF Response (e.g. by APIClient tests)
+            plain.data = response.data
+            response = plain
+        self.response = response
+        return response
+
+    async def afilter_queryset(self, queryset):
+        params = self.request.query_params
+        if any(param in params for param in self.threaded_filter_params):
+            return await sync_to_async(self.filter_queryset)(queryset)
+        return self.filter_queryset(queryset)
+
+    async def apaginate_queryset(self, queryset):
+        if self.paginator is None:
+            return None
+        if hasattr(self.paginator, "apaginate_queryset"):
+            return await self.paginator.apaginate_queryset(queryset, self.request, view=self)
+        return await sync_to_async(self.paginator.paginate_queryset)(queryset, self.request, view=self)
+
+    async def alist(self, request, *args, **kwargs):
+        stream_mode = getattr(self, "get_stream_mode", None)
+        if stream_mode is not None and stream_mode(request):
+            return await sync_to_async(self.list)(request, *args, **kwargs)
+
+        queryset = await self.afilter_queryset(self.get_queryset())
+        fast = self.get_fast_serializer() if hasattr(self, "get_fast_serializer") else None
+        if fast is not None:
+            queryset = self.get_fast_queryset(fast, queryset)
+
+        def serialize(rows):
+            if fast is not None:
+                return [fast.to_representation(row) for row in rows]
+            return self.get_serializer(rows, many=True).data
+
+        page = await self.apaginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(serialize(page))
+        return Response(serialize(await aread(queryset)))
+
+    async def aget_object(self):
+        queryset = await self.afilter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            obj = await queryset.aget(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        except (queryset.model.DoesNotExist, TypeError, ValueError, ValidationError):
+            raise Http404(f"No {queryset.model._meta.object_name} matches the given query.")
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+    async def aretrieve(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        return Response(self.get_serializer(instance).data)
@@ -0,0 +1,173 @@
+"""
+Batch create / update / delete of Books in one request.
+
+Used by the POST /api/books/batch/ endpoint. The body is a list of
+operations:
+
+    [
+        {"op": "create", "data": {"title": ..., "publication_year": ..., "author": ...}},
+        {"op": "update", "id": 12, "data": {"title": ...}},
+        {"op": "delete", "id": 13},
+    ]
+
+Updates are partial, like PATCH. Everything is validated up front with
+BookBatchSerializer(many=True); authors and the books being updated or
+deleted are loaded with one query each. If any operation is invalid
+nothing is written and the errors are reported per operation index.
+Otherwise the writes run in a single transaction with bulk_create,
+bulk_update and filter(pk__in=...).delete(), and one result is returned
+per operation, in order.
+"""
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .cache import bump_generation_on_commit
+from .changes import record_changes
+from .models import Author, Book, Change
+from .search import index_books
+from .serializers import BookBatchSerializer, BookSerializer
+
+
+MAX_OPERATIONS = 1000
+OPERATIONS = ("create", "update", "delete")
+
+
+def author_pk(value):
+    """
+    Coerce an author id the way PrefetchedPrimaryKeyRelatedField will
+    ("5" -> 5), or return None if it is not one.
+    """
+    try:
+        return Author._meta.pk.to_python(value)
+    except (TypeError, ValueError, ValidationError):
+        return None
+
+
+class BookBatch:
+    """
+    Validate and apply a list of Book operations.
+
+    - validate(): returns {index: errors} (empty when the batch is valid)
+    - apply(): writes the batch and returns the per-operation results
+    """
+
+    def __init__(self, operations, context=None):
+        self.operations = operations
+        self.context = dict(context or {})
+
+    def parse(self):
+        """
+        Check the shape of every operation. Returns {index: errors}.
+        """
+        errors = {}
+        seen_ids = set()
+        for index, operation in enumerate(self.operations):
+            if not isinstance(operation, dict):
+                errors[index] = {"non_field_errors": ["Each operation must be an object."]}
+                continue
+            op = operation.get("op")
+            if op not in OPERATIONS:
+                errors[index] = {"op": [f"Must be one of: {', '.join(OPERATIONS)}."]}
+                continue
+            if op != "create":
+                pk = operation.get("id")
+                if not isinstance(pk, int) or isinstance(pk, bool):
+                    errors[index] = {"id": ["A valid integer is required."]}
+                    continue
+                if pk in seen_ids:
+                    errors[index] = {"id": ["Each book may appear in only one operation."]}
+                    continue
+                seen_ids.add(pk)
+            if op != "delete" and not isinstance(operation.get("data"), dict):
+                errors[index] = {"data": ["Expected an object."]}
+        return errors
+
+    def validate(self):
+        if not isinstance(self.operations, list):
+            return {"non_field_errors": ["Expected a list of operations."]}
+        if not self.operations:
+            return {"non_field_errors": ["No operations given."]}
+        if len(self.operations) > MAX_OPERATIONS:
+            return {"non_field_errors": [f"At most {MAX_OPERATIONS} operations per batch."]}
+
+        errors = self.parse()
+        if errors:
+            return errors
+
+        by_op = {op: [] for op in OPERATIONS}
+        for index, operation in enumerate(self.operations):
+            by_op[operation["op"]].append((index, operation))
+        self.creates, self.updates, self.deletes = (by_op[op] for op in OPERATIONS)
+
+        # One query each for the books touched and the authors referenced
+        self.books = Book.objects.in_bulk(
+            [operation["id"] for _, operation in self.updates + self.deletes]
+        )
+        author_ids = {
+            author_pk(operation["data"].get("author"))
+            for _, operation in self.creates + self.updates
+        }
+        author_ids.discard(None)
+        self.context["authors"] = Author.objects.in_bulk(author_ids)
+
+        for index, operation in self.updates + self.deletes:
+            if operation["id"] not in self.books:
+                errors[index] = {"id": [f'Book {operation["id"]} does not exist.']}
+
+        for operations, instance, partial in (
+            (self.creates, None, False),
+            (self.updates, self.books, True),
+        ):
+            if not operations:
+                continue
+            data = [dict(operation["data"], id=operation.get("id")) for _, operation in operations]
+            serializer = BookBatchSerializer(
+                instance, data=data, many=True, partial=partial, context=self.context
+            )
+            if serializer.is_valid():
+                validated = serializer.validated_data
+            else:
+                validated = [None] * len(operations)
+                item_errors = serializer.errors
+                if isinstance(item_errors, list):
+                    item_errors = dict(enumerate(item_errors))
+                for position, detail in item_errors.items():
+                    if detail:
+                        errors.setdefault(operations[position][0], detail)
+            for (_, operation), values in zip(operations, validated):
+                operation["validated"] = values
+        return errors
+
+    @transaction.atomic
+    def apply(self):
+        results = [None] * len(self.operations)
+
+        created = [Book(**operation["validated"]) for _, operation in self.creates]
+        Book.objects.bulk_create(created)
+        for (index, _), book in zip(self.creates, created):
+            results[index] = {"op": "create", "status": 201, "data": BookSerializer(book).data}
+
+        updated = []
+        fields = set()
+        for index, operation in self.updates:
+            book = self.books[operation["id"]]
+            for field, value in operation["validated"].items():
+                setattr(book, field, value)
+            fields.update(operation["validated"])
+            updated.append(book)
+            results[index] = {"op": "update", "status": 200, "data": BookSerializer(book).data}
+        if updated and fields:
+            Book.objects.bulk_update(updated, sorted(fields), batch_size=500)
+
+        Book.objects.filter(pk__in=[operation["id"] for _, operation in self.deletes]).delete()
+        for index, operation in self.deletes:
+            results[index] = {"op": "delete", "status": 204, "id": operation["id"]}
+
+        # bulk writes send no post_save: keep the search index, the change
+        # log and the response cache in step by hand (the delete above
+        # sends post_delete, which logs the deletions). The cache generation
+        # moves only once the batch is committed and visible.
+        index_books(created + [book for book in updated if "title" in fields])
+        record_changes(Book, [book.pk for book in created + updated], Change.UPSERT)
+        bump_generation_on_commit(Book)
+        return results
@@ -0,0 +1,259 @@
+"""
+Streaming bulk import of Books from CSV or JSONL.
+
+Used by the `import_books` management command and the
+POST /api/books/bulk/ endpoint.
+
+Each input row has:
+- title
+- publication_year
+- author  (the author's *name*, resolved to an id with an in-memory map)
+
+Rows are read lazily, validated in chunks (the current year is read once per
+chunk, author names are looked up in a dict) and written with bulk_create,
+one transaction per chunk. Invalid rows are reported with their row number
+and skipped; they never abort the rest of the load. That includes lines
+that are not valid UTF-8 (see as_text()).
+"""
+import codecs
+import csv
+import io
+import json
+from datetime import datetime
+from itertools import islice
+
+from django.db import transaction
+from rest_framework import serializers
+
+from .cache import bump_generation_on_commit
+from .changes import record_changes
+from .models import Author, Book, Change
+from .search import index_authors, index_books
+from .serializers import check_publication_year
+
+
+TITLE_MAX_LENGTH = Book._meta.get_field("title").max_length
+# Parses publication_year like BookSerializer: "1999" and 1999.0 are fine,
+# 1999.5 and true are not
+YEAR_FIELD = serializers.IntegerField()
+DECODE_ERROR = "Invalid UTF-8 text."
+
+
+class UndecodableLine(str):
+    """
+    A line of input that is not valid UTF-8 (see as_text()), decoded with
+    replacement characters. Readers report its row as an error.
+    """
+
+
+def read_csv(stream):
+    """
+    Yield one dict per CSV row. `stream` is any iterable of text lines.
+    """
+    undecodable = []
+
+    def lines():
+        for line in stream:
+            if isinstance(line, UndecodableLine):
+                undecodable.append(line)
+            yield line
+
+    for row in csv.DictReader(lines()):
+        if undecodable:
+            undecodable.clear()
+            row = {"__error__": DECODE_ERROR}
+        yield row
+
+
+def read_jsonl(stream):
+    """
+    Yield one dict per JSON line. Blank lines are skipped; a malformed line
+    yields an error marker so it is reported instead of stopping the load.
+    """
+    for line in stream:
+        if isinstance(line, UndecodableLine):
+            yield {"__error__": DECODE_ERROR}
+            continue
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            row = {"__error__": f"Invalid JSON: {exc}"}
+        if not isinstance(row, dict):
+            row = {"__error__": "Each line must be a JSON object."}
+        yield row
+
+
+READERS = {
+    "csv": read_csv,
+    "jsonl": read_jsonl,
+}
+
+
+def guess_format(name="", content_type=""):
+    """
+    Return "csv" or "jsonl" from a file name or content type, or None.
+    """
+    name = (name or "").lower()
+    content_type = (content_type or "").lower()
+    if name.endswith(".csv") or "csv" in content_type:
+        return "csv"
+    if name.endswith((".jsonl", ".ndjson")) or "ndjson" in content_type or "jsonl" in content_type:
+        return "jsonl"
+    return None
+
+
+def as_text(stream):
+    """
+    Return an iterator of text lines for a binary stream (uploaded file,
+    request body); text streams are returned unchanged.
+
+    Lines are decoded as UTF-8 one at a time, after dropping a leading byte
+    order mark. A line that does not decode comes out as an UndecodableLine,
+    so one bad byte costs one row rather than the rest of the load.
+    """
+    if isinstance(stream, io.TextIOBase):
+        return stream
+    return decode_lines(stream)
+
+
+def decode_lines(stream):
+    first = True
+    for line in stream:
+        if first:
+            first = False
+            if line.startswith(codecs.BOM_UTF8):
+                line = line[len(codecs.BOM_UTF8):]
+        try:
+            yield line.decode("utf-8")
+        except UnicodeDecodeError:
+            yield UndecodableLine(line.decode("utf-8", "replace"))
+
+
+class BookImporter:
+    """
+    Validate and insert Book rows in chunks.
+
+    - chunk_size: rows validated and inserted per bulk_create / transaction
+    - create_authors: create unknown authors instead of rejecting the row
+    - max_errors: how many row errors to keep in the report (all are counted)
+    """
+
+    def __init__(self, chunk_size=1000, create_authors=False, max_errors=1000):
+        self.chunk_size = chunk_size
+        self.create_authors = create_authors
+        self.max_errors = max_errors
+        self.author_ids = None
+
+    def load_authors(self):
+        # Author.name is not unique; the oldest author with a name wins
+        self.author_ids = {}
+        for pk, name in Author.objects.order_by("-pk").values_list("pk", "name").iterator():
+            self.author_ids[name] = pk
+
+    def run(self, rows):
+        """
+        Import an iterable of row dicts. Returns a report dict:
+        {"total", "created", "error_count", "errors": [{"row", "errors"}]}
+        """
+        if self.author_ids is None:
+            self.load_authors()
+
+        report = {"total": 0, "created": 0, "error_count": 0, "errors": []}
+        rows = iter(rows)
+        row_number = 0
+
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                break
+
+            numbered = list(enumerate(chunk, start=row_number + 1))
+            row_number += len(chunk)
+            report["total"] += len(chunk)
+
+            books, errors = self.validate_chunk(numbered)
+            if books:
+                with transaction.atomic():
+                    Book.objects.bulk_create(books, batch_size=self.chunk_size)
+                    # bulk_create sends no post_save, so index, log and
+                    # invalidate here
+                    index_books(books)
+                    record_changes(Book, [book.pk for book in books], Change.UPSERT)
+                    bump_generation_on_commit(Book)
+                report["created"] += len(books)
+
+            report["error_count"] += len(errors)
+            room = self.max_errors - len(report["errors"])
+            if room > 0:
+                report["errors"].extend(errors[:room])
+
+        return report
+
+    def validate_chunk(self, numbered_rows):
+        """
+        Validate a chunk of (row_number, row) pairs.
+        Returns (unsaved Book instances, error entries).
+        """
+        current_year = datetime.now().year
+        if self.create_authors:
+            self.create_missing_authors(row for _, row in numbered_rows)
+
+        books = []
+        errors = []
+        for number, row in numbered_rows:
+            row_errors = {}
+            if "__error__" in row:
+                errors.append({"row": number, "errors": {"non_field_errors": [row["__error__"]]}})
+                continue
+
+            title = str(row.get("title") or "").strip()
+            if not title:
+                row_errors["title"] = ["This field is required."]
+            elif len(title) > TITLE_MAX_LENGTH:
+                row_errors["title"] = [
+                    f"Ensure this field has no more than {TITLE_MAX_LENGTH} characters."
+                ]
+
+            try:
+                year = YEAR_FIELD.to_internal_value(row.get("publication_year"))
+            except serializers.ValidationError:
+                row_errors["publication_year"] = ["A valid integer is required."]
+            else:
+                try:
+                    check_publication_year(year, current_year)
+                except serializers.ValidationError as exc:
+                    row_errors["publication_year"] = [str(detail) for detail in exc.detail]
+
+            author_name = str(row.get("author") or "").strip()
+            author_id = self.author_ids.get(author_name)
+            if not author_name:
+                row_errors["author"] = ["This field is required."]
+            elif author_id is None:
+                row_errors["author"] = [f'Unknown author "{author_name}".']
+
+            if row_errors:
+                errors.append({"row": number, "errors": row_errors})
+            else:
+                books.append(Book(title=title, publication_year=year, author_id=author_id))
+
+        return books, errors
+
+    def create_missing_authors(self, rows):
+        names = {
+            str(row.get("author") or "").strip()
+            for row in rows
+            if "__error__" not in row
+        }
+        missing = sorted(name for name in names if name and name not in self.author_ids)
+        if not missing:
+            return
+        created = Author.objects.bulk_create([Author(name=name) for name in missing])
+        if not all(author.pk for author in created):
+            # Backends that don't return primary keys from bulk_create
+            created = list(Author.objects.filter(name__in=missing))
+        self.author_ids.update((author.name, author.pk) for author in created)
+        index_authors(created)
+        record_changes(Author, [author.pk for author in created], Change.UPSERT)
@@ -0,0 +1,224 @@
+"""
+Response cache for read-only API endpoints.
+
+Rendered GET responses are cached under a key made of the model's cache
+generation, the path, the sorted query parameters and the Accept header.
+Every write bumps the Book generation once its transaction commits: saves
+and deletes of Books and Authors through signals (api.signals), whether
+they come from the API, the admin, cascades or plain ORM code, and bulk
+writes, which send no signals, by hand (the bulk importer and the batch
+endpoint). A response computed before a write is never served after it:
+its key simply stops being looked up. QuerySet.update() and raw SQL bypass
+this; their responses go stale until the timeout.
+
+Bumping before the commit would let a concurrent request read the old rows
+and cache them under the new generation, where they would stay fresh for
+the whole timeout.
+
+Stale-while-revalidate is opt-in (API_RESPONSE_CACHE_STALE_WHILE_REVALIDATE
+or a view's cache_stale_while_revalidate). It only covers entries that
+outlived their timeout within the *current* generation: one request
+refreshes the entry in a background thread while the others keep getting
+the old copy. Writes still invalidate immediately.
+
+Hits, misses and stale hits are counted in the cache (see
+get_response_cache_stats() and `manage.py response_cache_stats`) and
+reported per response in the X-Cache header.
+"""
+import copy
+import hashlib
+import threading
+import time
+from functools import partial
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.http import HttpResponse
+
+
+STATS = ("hit", "miss", "stale")
+
+
+def get_response_cache_timeout():
+    return getattr(settings, "API_RESPONSE_CACHE_TIMEOUT", 60)
+
+
+def get_stale_while_revalidate():
+    return getattr(settings, "API_RESPONSE_CACHE_STALE_WHILE_REVALIDATE", 0)
+
+
+def generation_key(model):
+    return f"api:generation:{model._meta.label_lower}"
+
+
+def get_generation(model):
+    """
+    Return the current cache generation of `model`, creating one if needed.
+
+    Generations are nanosecond timestamps rather than a counter, so a
+    generation evicted from the cache is never reused by accident.
+    """
+    key = generation_key(model)
+    generation = cache.get(key)
+    if generation is None:
+        generation = time.time_ns()
+        if not cache.add(key, generation, None):
+            generation = cache.get(key, generation)
+    return generation
+
+
+def bump_generation(model):
+    cache.set(generation_key(model), time.time_ns(), None)
+
+
+def bump_generation_on_commit(model):
+    """
+    Bump the generation of `model` once the current transaction commits
+    (at once outside a transaction).
+    """
+    transaction.on_commit(partial(bump_generation, model))
+
+
+def response_cache_key(model, request):
+    """
+    Key for a GET response: model generation + path + sorted query params +
+    Accept header.
+    """
+    # Absolute, because paginated responses contain absolute next/previous links
+    url = request.build_absolute_uri(request.path)
+    query = sorted(request.GET.lists())
+    raw = "|".join([url, repr(query), request.META.get("HTTP_ACCEPT", "")])
+    digest = hashlib.sha1(raw.encode()).hexdigest()
+    return f"api:response:{model._meta.label_lower}:g{get_generation(model)}:{digest}"
+
+
+def record(stat):
+    key = f"api:response-cache:{stat}"
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Evicted between add() and incr()
+        cache.set(key, 1, None)
+
+
+def get_response_cache_stats():
+    """
+    Return {"hit", "miss", "stale", "hit_ratio"} since the last reset.
+    """
+    stats = {stat: cache.get(f"api:response-cache:{stat}", 0) for stat in STATS}
+    total = sum(stats.values())
+    stats["hit_ratio"] = (stats["hit"] + stats["stale"]) / total if total else 0.0
+    return stats
+
+
+def reset_response_cache_stats():
+    cache.delete_many([f"api:response-cache:{stat}" for stat in STATS])
+
+
+class CachedResponseMixin:
+    """
+    APIView mixin that caches rendered GET responses (see module docstring).
+
+    - cache_model: model whose generation keys the cache
+      (defaults to the queryset's model)
+    - cache_timeout: seconds an entry is fresh (API_RESPONSE_CACHE_TIMEOUT)
+    - cache_stale_while_revalidate: seconds an expired entry may still be
+      served while it is refreshed (API_RESPONSE_CACHE_STALE_WHILE_REVALIDATE;
+      0 disables it)
+
+    Only successful, non-streamed responses with a non-HTML renderer are
+    cached: the browsable API page shows the current user and forms.
+    """
+    cache_model = None
+    cache_timeout = None
+    cache_stale_while_revalidate = None
+
+    def get_cache_model(self):
+        return self.cache_model or self.get_queryset().model
+
+    def get_cache_timeout(self):
+        return get_response_cache_timeout() if self.cache_timeout is None else self.cache_timeout
+
+    def get_stale_while_revalidate(self):
+        if self.cache_stale_while_revalidate is None:
+            return get_stale_while_revalidate()
+        return self.cache_stale_while_revalidate
+
+    def get(self, request, *args, **kwargs):
+        response = self.get_cached_response(request, args, kwargs)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        return response
+
+    def get_cached_response(self, request, args, kwargs):
+        """
+        Return the cached response to this GET, or None to compute it (in
+        which case finalize_response() stores it, if cacheable).
+        """
+        if getattr(request.accepted_renderer, "format", None) == "api":
+            return None
+
+        key = response_cache_key(self.get_cache_model(), request)
+        refreshing = getattr(request._request, "_response_cache_refresh", False)
+        entry = None if refreshing else cache.get(key)
+
+        if entry is not None:
+            swr = self.get_stale_while_revalidate()
+            if time.time() < entry["fresh_until"]:
+                record("hit")
+                return self.cached_response(entry, "HIT")
+            if swr:
+                record("stale")
+                if cache.add(f"{key}:refresh", 1, swr):
+                    self.revalidate(request, f"{key}:refresh", args, kwargs)
+                return self.cached_response(entry, "STALE")
+
+        if not refreshing:
+            record("miss")
+        self.response_cache_key = key
+        return None
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        key = getattr(self, "response_cache_key", None)
+        if key is None or response.status_code != 200 or response.streaming:
+            return response
+
+        response.render()
+        timeout = self.get_cache_timeout()
+        entry = {
+            "content": response.content,
+            "content_type": response["Content-Type"],
+            "fresh_until": time.time() + timeout,
+        }
+        cache.set(key, entry, timeout + self.get_stale_while_revalidate())
+        response["X-Cache"] = "MISS"
+        return response
+
+    def cached_response(self, entry, status):
+        response = HttpResponse(entry["content"], content_type=entry["content_type"])
+        response["X-Cache"] = status
+        return response
+
+    def revalidate(self, request, lock_key, args, kwargs):
+        """
+        Recompute the response for `request` in a background thread, then
+        release `lock_key` (which keeps other requests from doing the same).
+        """
+        refresh_request = copy.copy(request._request)
+        refresh_request._response_cache_refresh = True
+        view = type(self).as_view()
+        if iscoroutinefunction(view):
+            view = async_to_sync(view)
+
+        def refresh():
+            try:
+                view(refresh_request, *args, **kwargs)
+            finally:
+                cache.delete(lock_key)
+                connections.close_all()
+
+        threading.Thread(target=refresh, daemon=True).start()
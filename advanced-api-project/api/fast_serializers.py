@@ -0,0 +1,209 @@
+"""
+Fast read-only serialization for list endpoints.
+
+A ModelSerializer builds a model instance per row and then calls every
+field's to_representation(). For flat serializers that is mostly overhead:
+FastReadSerializer compiles a serializer class once into a list of
+(output key, database column, converter) entries, fetches rows with
+values_list() and builds the output dicts directly. The result is the same
+data, with the same key order, as the serializer it was compiled from, so
+the rendered JSON is byte-identical.
+
+Only flat serializers can be compiled: plain model fields and forward
+relations rendered as a primary key. Anything else (nested serializers,
+SerializerMethodField, dotted sources, write-only fields...) makes
+compile_serializer() return None and the view keeps the normal path. So
+does a serializer that overrides to_representation(), or a field class that
+overrides get_attribute(), since their output cannot be read from the
+columns. A field that overrides to_representation() is compiled with it as
+the converter.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+
+# Fields whose to_representation() returns database values unchanged
+PASSTHROUGH_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.IntegerField,
+)
+
+
+class FastReadSerializer:
+    """
+    Read-only serializer compiled from a flat ModelSerializer class.
+
+    - rows(queryset): one output dict per row of `queryset`
+    - to_representation(values): the output dict for one values_list() tuple
+    """
+
+    def __init__(self, model, keys, columns, converters):
+        self.model = model
+        self.keys = keys
+        self.columns = columns
+        # (index, converter) for the few fields that need one
+        self.converters = [(i, c) for i, c in enumerate(converters) if c is not None]
+
+    def subset(self, names):
+        """
+        Return a FastReadSerializer for just the output keys in `names`.
+        """
+        selected = [i for i, key in enumerate(self.keys) if key in names]
+        converters = dict(self.converters)
+        return FastReadSerializer(
+            self.model,
+            [self.keys[i] for i in selected],
+            [self.columns[i] for i in selected],
+            [converters.get(i) for i in selected],
+        )
+
+    def values(self, queryset, extra=()):
+        """
+        values_list() of the output columns. `extra` columns (e.g. the ones
+        a paginator needs) are appended; to_representation() ignores them.
+        """
+        return queryset.values_list(*self.columns, *[c for c in extra if c not in self.columns])
+
+    def to_representation(self, values):
+        if self.converters:
+            values = list(values)
+            for index, convert in self.converters:
+                if values[index] is not None:
+                    values[index] = convert(values[index])
+        return dict(zip(self.keys, values))
+
+    def rows(self, queryset, chunk_size=None):
+        values = self.values(queryset)
+        if chunk_size:
+            values = values.iterator(chunk_size=chunk_size)
+        return map(self.to_representation, values)
+
+
+def overrides(cls, base, name):
+    """
+    Whether `cls` replaces `base`'s method `name`.
+    """
+    return getattr(cls, name) is not getattr(base, name)
+
+
+def compile_field(field, model):
+    """
+    Return (column, converter) for one serializer field, or None if the
+    field cannot be read straight from a column.
+    """
+    if field.write_only or field.source == "*" or "." in field.source:
+        return None
+    if isinstance(field, serializers.SerializerMethodField):
+        return None
+    if overrides(type(field), serializers.Field, "get_attribute") and not isinstance(field, PrimaryKeyRelatedField):
+        return None
+    try:
+        model_field = model._meta.get_field(field.source)
+    except FieldDoesNotExist:
+        return None
+    if not model_field.concrete:
+        return None
+
+    if model_field.is_relation:
+        # A forward FK rendered as a primary key is just the local column
+        if isinstance(field, PrimaryKeyRelatedField) and model_field.many_to_one:
+            custom = any(
+                overrides(type(field), PrimaryKeyRelatedField, name)
+                for name in ("get_attribute", "to_representation")
+            )
+            if not custom and field.pk_field is None and model_field.target_field.primary_key:
+                return model_field.attname, None
+        return None
+
+    if isinstance(field, serializers.BaseSerializer):
+        return None
+    for base in PASSTHROUGH_FIELDS:
+        if isinstance(field, base) and not overrides(type(field), base, "to_representation"):
+            if not getattr(field, "coerce_to_string", False):
+                return model_field.attname, None
+    return model_field.attname, field.to_representation
+
+
+_compiled = {}
+
+
+def compile_serializer(serializer_class):
+    """
+    Return a FastReadSerializer for `serializer_class`, or None if it is not
+    a flat ModelSerializer. Results are cached per class.
+    """
+    if serializer_class in _compiled:
+        return _compiled[serializer_class]
+
+    fast = None
+    if issubclass(serializer_class, serializers.ModelSerializer) and not overrides(
+        serializer_class, serializers.Serializer, "to_representation"
+    ):
+        serializer = serializer_class()
+        model = serializer_class.Meta.model
+        keys, columns, converters = [], [], []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            compiled = compile_field(field, model)
+            if compiled is None:
+                break
+            keys.append(name)
+            columns.append(compiled[0])
+            converters.append(compiled[1])
+        else:
+            fast = FastReadSerializer(model, keys, columns, converters)
+
+    _compiled[serializer_class] = fast
+    return fast
+
+
+class FastReadMixin:
+    """
+    ListAPIView mixin that serves GET lists through a FastReadSerializer
+    compiled from the view's serializer_class.
+
+    Set `fast_read = False` on a view to keep the regular ModelSerializer
+    path. Views whose serializer cannot be compiled fall back to it
+    automatically. List this mixin before StreamingListMixin so streamed
+    responses use the fast path too.
+    """
+    fast_read = True
+
+    def get_fast_serializer(self):
+        if not self.fast_read:
+            return None
+        return compile_serializer(self.get_serializer_class())
+
+    def list(self, request, *args, **kwargs):
+        fast = self.get_fast_serializer()
+        stream_mode = getattr(self, "get_stream_mode", None)
+        if fast is None or (stream_mode is not None and stream_mode(request)):
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.get_fast_queryset(fast, self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response([fast.to_representation(row) for row in page])
+        return Response([fast.to_representation(row) for row in queryset])
+
+    def get_fast_queryset(self, fast, queryset):
+        """
+        The values_list() of `queryset` read by `fast`.
+        """
+        # Ordering columns stay selected for the cursor paginator
+        ordering = [term.lstrip("-") for term in queryset.query.order_by if isinstance(term, str)]
+        return fast.values(queryset, extra=[*ordering, "id"])
+
+    def stream_rows(self, queryset):
+        fast = self.get_fast_serializer()
+        if fast is None:
+            yield from super().stream_rows(queryset)
+            return
+        encoder = JSONEncoder(ensure_ascii=False)
+        for row in fast.rows(queryset, chunk_size=self.stream_chunk_size):
+            yield encoder.encode(row)
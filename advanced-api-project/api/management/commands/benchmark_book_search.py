@@ -0,0 +1,94 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from api.models import Author, Book
+from api.search import rebuild_index, term_condition
+
+
+WORDS = (
+    "river night garden empire shadow city winter stone silver glass storm "
+    "house letter ocean forest memory kingdom promise daughter journey fire "
+    "island mountain secret summer voice machine history dream war peace"
+).split()
+SEARCH_FIELDS = ["title", "author__name"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare ?search= latency of SearchFilter's icontains query against the "
+        "substring index. Seeds books inside a transaction that is rolled back, so "
+        "the database is left untouched."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--books", type=int, default=1_000_000)
+        parser.add_argument("--authors", type=int, default=20_000)
+        parser.add_argument("--repeat", type=int, default=10)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        queries = ["river", "sil", "winter storm", "orwell", "rwel", "zzzz"]
+
+        with transaction.atomic():
+            start = time.perf_counter()
+            self.seed(options["books"], options["authors"], rng)
+            self.stdout.write(f"seeded {options['books']:,} books in {time.perf_counter() - start:.1f}s")
+
+            start = time.perf_counter()
+            rebuild_index()
+            self.stdout.write(f"index build: {time.perf_counter() - start:.1f}s")
+
+            self.stdout.write(f"{'backend':<12}{'query':<16}{'hits':>8}{'median ms':>12}{'p95 ms':>10}")
+            for name, search in (("icontains", self.icontains), ("index", self.indexed)):
+                for query in queries:
+                    timings = []
+                    for _ in range(options["repeat"]):
+                        start = time.perf_counter()
+                        # What the list view runs: the first page, by title
+                        hits = len(list(search(query).order_by("title", "id")[:20]))
+                        timings.append((time.perf_counter() - start) * 1000)
+                    timings.sort()
+                    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+                    self.stdout.write(
+                        f"{name:<12}{query:<16}{hits:>8}"
+                        f"{statistics.median(timings):>12.1f}{p95:>10.1f}"
+                    )
+            transaction.set_rollback(True)
+
+    def seed(self, books, authors, rng):
+        created = Author.objects.bulk_create(
+            (Author(name=f"{rng.choice(WORDS).title()} Writer{i}") for i in range(authors)),
+            batch_size=5000,
+        )
+        created[0].name = "George Orwell"
+        created[0].save()
+        author_ids = [author.pk for author in created]
+        Book.objects.bulk_create(
+            (
+                Book(
+                    title=" ".join(rng.choice(WORDS) for _ in range(3)).title() + f" {i}",
+                    publication_year=rng.randint(1900, 2024),
+                    author_id=rng.choice(author_ids),
+                )
+                for i in range(books)
+            ),
+            batch_size=5000,
+        )
+
+    def icontains(self, query):
+        queryset = Book.objects.all()
+        for term in query.split():
+            queryset = queryset.filter(Q(title__icontains=term) | Q(author__name__icontains=term))
+        return queryset
+
+    def indexed(self, query):
+        queryset = Book.objects.all()
+        for term in query.split():
+            queryset = queryset.filter(term_condition(term, SEARCH_FIELDS))
+        return queryset
@@ -0,0 +1,42 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.bulk import READERS, BookImporter, as_text, guess_format
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream books from a CSV or JSONL file (title, publication_year, author "
+        "name) into the database in bulk, reporting invalid rows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=sorted(READERS), help="Defaults to the file extension.")
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument("--create-authors", action="store_true", help="Create unknown authors.")
+        parser.add_argument("--max-errors", type=int, default=100, help="Row errors to print.")
+
+    def handle(self, *args, **options):
+        input_format = options["format"] or guess_format(options["path"])
+        if input_format is None:
+            raise CommandError("Cannot tell the file format; pass --format csv or --format jsonl.")
+
+        importer = BookImporter(
+            chunk_size=options["chunk_size"],
+            create_authors=options["create_authors"],
+            max_errors=options["max_errors"],
+        )
+        # Binary, so as_text() can report undecodable lines as row errors
+        with open(options["path"], "rb") as stream:
+            report = importer.run(READERS[input_format](as_text(stream)))
+
+        for error in report["errors"]:
+            self.stderr.write(f"row {error['row']}: {json.dumps(error['errors'])}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {report['created']} of {report['total']} rows "
+                f"({report['error_count']} errors)."
+            )
+        )
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from api.cache import get_response_cache_stats, reset_response_cache_stats
+
+
+class Command(BaseCommand):
+    help = "Show hit/miss counts of the Book API response cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reset", action="store_true", help="Reset the counters afterwards.")
+
+    def handle(self, *args, **options):
+        stats = get_response_cache_stats()
+        self.stdout.write(
+            f"hits: {stats['hit']}  stale hits: {stats['stale']}  misses: {stats['miss']}  "
+            f"hit ratio: {stats['hit_ratio']:.1%}"
+        )
+        if options["reset"]:
+            reset_response_cache_stats()
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:41
+
+import re
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# A copy of api.search.tokenize() as of this migration, so later changes
+# to the tokenizer do not change what the migration does
+def tokenize(text):
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(char for char in text if not unicodedata.combining(char)).casefold()
+    return list(dict.fromkeys(word[:64] for word in re.findall(r"\w+", text)))
+
+
+def backfill_search_tokens(apps, schema_editor):
+    for model_name, token_model_name, fk, text_field in (
+        ("Book", "BookSearchToken", "book_id", "title"),
+        ("Author", "AuthorSearchToken", "author_id", "name"),
+    ):
+        model = apps.get_model("api", model_name)
+        token_model = apps.get_model("api", token_model_name)
+        token_model.objects.bulk_create(
+            (
+                token_model(token=token, **{fk: pk})
+                for pk, text in model.objects.values_list("pk", text_field).iterator()
+                for token in tokenize(text)
+            ),
+            batch_size=5000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_book_ordering_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=64)),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='api.author')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['token', 'author'], name='api_authortoken_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='BookSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=64)),
+                ('book', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='api.book')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['token', 'book'], name='api_booktoken_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_search_tokens, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:12
+
+import re
+import unicodedata
+
+import api.models
+from django.db import migrations
+
+
+TOKEN_MODELS = (
+    ("Book", "BookSearchToken", "book_id", "title"),
+    ("Author", "AuthorSearchToken", "author_id", "name"),
+)
+
+
+# Copies of api.search.tokenize() and index_tokens() as of this migration
+def tokenize(text):
+    text = unicodedata.normalize("NFC", text or "").lower()
+    return list(dict.fromkeys(word[:64] for word in re.findall(r"\w+", text)))
+
+
+def index_tokens(text):
+    return list(dict.fromkeys(
+        word[start:] for word in tokenize(text) for start in range(len(word) - 1)
+    ))
+
+
+# The accent-folded words migration 0003 stored
+def folded_words(text):
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(char for char in text if not unicodedata.combining(char)).casefold()
+    return list(dict.fromkeys(word[:64] for word in re.findall(r"\w+", text)))
+
+
+def rebuild_tokens(apps, tokens):
+    for model_name, token_model_name, fk, text_field in TOKEN_MODELS:
+        model = apps.get_model("api", model_name)
+        token_model = apps.get_model("api", token_model_name)
+        token_model.objects.all().delete()
+        token_model.objects.bulk_create(
+            (
+                token_model(token=token, **{fk: pk})
+                for pk, text in model.objects.values_list("pk", text_field).iterator()
+                for token in tokens(text)
+            ),
+            batch_size=5000,
+        )
+
+
+def index_suffixes(apps, schema_editor):
+    rebuild_tokens(apps, index_tokens)
+
+
+def index_words(apps, schema_editor):
+    rebuild_tokens(apps, folded_words)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_change_log'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='authorsearchtoken',
+            name='token',
+            field=api.models.BinaryCharField(max_length=64),
+        ),
+        migrations.AlterField(
+            model_name='booksearchtoken',
+            name='token',
+            field=api.models.BinaryCharField(max_length=64),
+        ),
+        migrations.RunPython(index_suffixes, index_words),
+    ]
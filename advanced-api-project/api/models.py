@@ -32,6 +32,77 @@ class Book(models.Model):
         related_name="books",
     )
 
+    class Meta:
+        indexes = [
+            # Keyset pagination on ?ordering=title / ?ordering=publication_year
+            # (see api.pagination), with id as the tiebreaker
+            models.Index(fields=["title", "id"], name="api_book_title_idx"),
+            models.Index(fields=["publication_year", "id"], name="api_book_year_idx"),
+        ]
+
     def __str__(self):
         return f"{self.title} ({self.publication_year}) by {self.author.name}"
 
+
+
+class BinaryCharField(models.CharField):
+    """
+    CharField ordered and compared by code point on every backend.
+
+    The binary collation has a different name on each database, so it
+    cannot be spelled as a single db_collation: this picks it by vendor.
+    SQLite's default collation already is binary.
+    """
+    binary_collations = {"postgresql": "C", "mysql": "utf8mb4_bin"}
+
+    def db_parameters(self, connection):
+        params = super().db_parameters(connection)
+        if self.db_collation is None:
+            params["collation"] = self.binary_collations.get(connection.vendor)
+        return params
+
+
+class BookSearchToken(models.Model):
+    """
+    One suffix of a normalized word of a book's title (see api.search).
+
+    Together with AuthorSearchToken this is the substring index behind
+    BookSearchFilter: ?search= terms are matched with an index range scan
+    on `token` instead of icontains over Book and Author. The range scan
+    needs the binary collation of BinaryCharField on `token`.
+    """
+    token = BinaryCharField(max_length=64)
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name="search_tokens")
+
+    class Meta:
+        indexes = [models.Index(fields=["token", "book"], name="api_booktoken_idx")]
+
+
+class AuthorSearchToken(models.Model):
+    """
+    One suffix of a normalized word of an author's name (see api.search).
+    """
+    token = BinaryCharField(max_length=64)
+    author = models.ForeignKey(Author, on_delete=models.CASCADE, related_name="search_tokens")
+
+    class Meta:
+        indexes = [models.Index(fields=["token", "author"], name="api_authortoken_idx")]
+
+
+class Change(models.Model):
+    """
+    One entry of the append-only change log behind /api/changes/ (see
+    api.changes).
+
+    Every save or delete of a Book or Author appends a row; the primary key
+    is the sequence number clients sync from. Only the object's type and id
+    are stored: the feed reads the current row when it serves an upsert.
+    """
+    UPSERT = "upsert"
+    DELETE = "delete"
+    OPS = [(UPSERT, "upsert"), (DELETE, "delete")]
+
+    model = models.CharField(max_length=16)
+    object_id = models.BigIntegerField()
+    op = models.CharField(max_length=6, choices=OPS)
+    created_at = models.DateTimeField(auto_now_add=True)
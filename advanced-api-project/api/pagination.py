@@ -0,0 +1,209 @@
+"""
+Ordering-aware cursor pagination for list endpoints.
+
+DRF's CursorPagination pages on a single fixed ordering. OrderingCursorPagination
+instead pages on whatever ordering the view's OrderingFilter applied
+(e.g. ?ordering=-publication_year), with `id` appended as a tiebreaker, so
+every page is a keyset query: WHERE (publication_year, id) < (last row)
+ORDER BY publication_year DESC, id DESC LIMIT page_size. Page N costs the
+same as page 1, given an index on (<field>, id).
+
+Clients that need random access can still send ?limit= / ?offset=, which
+switches that request to LimitOffsetPagination.
+"""
+import base64
+import binascii
+import json
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from .async_views import aread
+
+
+class OrderingCursorPagination(BasePagination):
+    """
+    Keyset pagination on the queryset's active ordering plus `id`.
+
+    Query parameters:
+    - cursor: opaque position token from a previous response's next/previous
+    - page_size: rows per page (default PAGE_SIZE, capped at max_page_size)
+    - limit / offset: use offset pagination for this request instead
+    """
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+    invalid_cursor_message = "Invalid cursor."
+    offset_pagination_class = LimitOffsetPagination
+
+    def __init__(self):
+        self.offset_paginator = None
+
+    def get_page_size(self, request):
+        page_size = api_settings.PAGE_SIZE or 20
+        try:
+            requested = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return page_size
+        return min(max(requested, 1), self.max_page_size)
+
+    def wants_offset(self, request):
+        offset_class = self.offset_pagination_class
+        return any(
+            param in request.query_params
+            for param in (offset_class.limit_query_param, offset_class.offset_query_param)
+        )
+
+    def get_ordering(self, queryset):
+        """
+        Return the ordering as a list of "field" / "-field" strings ending in
+        id, or None if it contains expressions or random ordering.
+        """
+        ordering = list(queryset.query.order_by or queryset.model._meta.ordering)
+        if not all(isinstance(term, str) and term != "?" for term in ordering):
+            return None
+        ordering = ["-id" if term == "-pk" else "id" if term == "pk" else term for term in ordering]
+        if "id" not in ordering and "-id" not in ordering:
+            last = ordering[-1] if ordering else "id"
+            ordering.append("-id" if last.startswith("-") else "id")
+        return ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.page_queryset(queryset, request, view)
+        if self.offset_paginator is not None:
+            return self.offset_paginator.paginate_queryset(queryset, request, view)
+        return self.make_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        paginate_queryset() for async views (see api.async_views).
+        """
+        queryset = self.page_queryset(queryset, request, view)
+        if self.offset_paginator is not None:
+            return await sync_to_async(self.offset_paginator.paginate_queryset)(queryset, request, view)
+        return self.make_page(await aread(queryset))
+
+    def page_queryset(self, queryset, request, view=None):
+        """
+        Return the keyset query for the requested page (with one row more,
+        to tell whether there is another), or `queryset` unchanged when
+        this request uses offset pagination.
+        """
+        self.request = request
+        self.ordering = self.get_ordering(queryset)
+        if self.ordering is None or self.wants_offset(request):
+            self.offset_paginator = self.offset_pagination_class()
+            if self.offset_paginator.default_limit is None:
+                self.offset_paginator.default_limit = self.get_page_size(request)
+            return queryset
+
+        self.page_size = self.get_page_size(request)
+        self.fields = [term.lstrip("-") for term in self.ordering]
+        # values_list() querysets (see FastReadMixin) yield tuples
+        self.row_fields = list(queryset.query.values_select) or None
+
+        self.position = self.decode_cursor(request)
+        if self.position is None:
+            return queryset.order_by(*self.ordering)[: self.page_size + 1]
+        reverse, values = self.position
+        condition = self.keyset_condition(values, reverse)
+        return queryset.filter(condition).order_by(*self.get_ordering_for(reverse))[: self.page_size + 1]
+
+    def make_page(self, rows):
+        reverse = self.position is not None and self.position[0]
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        if reverse:
+            rows.reverse()
+
+        if self.position is None:
+            has_next, has_previous = has_more, False
+        elif reverse:
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, True
+
+        self.next_cursor = self.encode_cursor(rows[-1], False) if rows and has_next else None
+        self.previous_cursor = self.encode_cursor(rows[0], True) if rows and has_previous else None
+        return rows
+
+    def get_ordering_for(self, reverse):
+        if not reverse:
+            return self.ordering
+        return [term[1:] if term.startswith("-") else f"-{term}" for term in self.ordering]
+
+    def keyset_condition(self, values, reverse):
+        """
+        Rows strictly after `values` in the (possibly reversed) ordering:
+        f1 >= v1 AND ((f1 > v1) OR (f1 = v1 AND f2 > v2) OR ...)
+
+        The leading f1 >= v1 is implied by the rest, but it is what lets the
+        database start a range search on the (f1, id) index at the cursor;
+        the OR chain alone is planned as a scan of the whole index.
+        """
+        ordering = self.get_ordering_for(reverse)
+        condition = Q()
+        equal = {}
+        for term, field, value in zip(ordering, self.fields, values):
+            lookup = "lt" if term.startswith("-") else "gt"
+            condition |= Q(**equal, **{f"{field}__{lookup}": value})
+            equal[field] = value
+        bound = "lte" if ordering[0].startswith("-") else "gte"
+        return Q(**{f"{self.fields[0]}__{bound}": values[0]}) & condition
+
+    def get_position(self, row):
+        if self.row_fields is None:
+            return [getattr(row, field) for field in self.fields]
+        if isinstance(row, dict):
+            return [row[field] for field in self.fields]
+        return [row[self.row_fields.index(field)] for field in self.fields]
+
+    def encode_cursor(self, row, reverse):
+        raw = json.dumps({"r": int(reverse), "p": self.get_position(row), "o": self.ordering})
+        cursor = base64.urlsafe_b64encode(raw.encode()).decode()
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request):
+        """
+        Return (reverse, values), None for the first page, or raise NotFound
+        for a malformed cursor or one issued for a different ordering.
+        """
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+        try:
+            data = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+            reverse, values = bool(data["r"]), data["p"]
+            valid = data["o"] == self.ordering and len(values) == len(self.fields)
+        except (binascii.Error, UnicodeError, ValueError, KeyError, TypeError):
+            valid = False
+        if not valid:
+            raise NotFound(self.invalid_cursor_message)
+        return reverse, values
+
+    def get_paginated_response(self, data):
+        if self.offset_paginator is not None:
+            return self.offset_paginator.get_paginated_response(data)
+        return Response(OrderedDict([
+            ("next", self.next_cursor),
+            ("previous", self.previous_cursor),
+            ("results", data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
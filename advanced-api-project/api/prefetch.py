@@ -0,0 +1,90 @@
+"""
+Automatic select_related / prefetch_related from a serializer tree.
+
+Nested serializers and relational fields trigger one query per row unless
+the queryset loads the relations up front. SerializerPrefetchMixin walks the
+view's serializer fields, maps their sources onto the model's relations and
+applies the matching select_related() / prefetch_related() calls, so a list
+costs a constant number of queries however many rows it returns.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.relations import ManyRelatedField, PrimaryKeyRelatedField
+
+
+def get_related_lookups(serializer, model, prefix="", in_prefetch=False):
+    """
+    Return (select_related, prefetch_related) lookup sets needed to
+    serialize `model` instances with `serializer` without extra queries.
+    """
+    select, prefetch = set(), set()
+
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+
+        child = field
+        if isinstance(field, serializers.ListSerializer):
+            child = field.child
+        elif isinstance(field, ManyRelatedField):
+            child = field.child_relation
+
+        parts = [] if field.source == "*" else field.source.split(".")
+        current_model, path, many = model, prefix, in_prefetch
+
+        for index, part in enumerate(parts):
+            try:
+                model_field = current_model._meta.get_field(part)
+            except FieldDoesNotExist:
+                # A property or method: nothing we can load up front
+                current_model = None
+                break
+            if not model_field.is_relation:
+                current_model = None
+                break
+
+            is_last = index == len(parts) - 1
+            # A forward FK rendered as a bare primary key only needs the
+            # local <name>_id column, so it must not trigger a join.
+            if (
+                is_last
+                and isinstance(child, PrimaryKeyRelatedField)
+                and not isinstance(field, ManyRelatedField)
+                and (model_field.many_to_one or model_field.one_to_one)
+                and model_field.concrete
+            ):
+                current_model = None
+                break
+
+            lookup = path + part
+            if model_field.many_to_many or model_field.one_to_many:
+                many = True
+            (prefetch if many else select).add(lookup)
+            current_model = model_field.related_model
+            path = lookup + "__"
+
+        if current_model is not None and isinstance(child, serializers.BaseSerializer):
+            nested_select, nested_prefetch = get_related_lookups(
+                child, current_model, path, many
+            )
+            select |= nested_select
+            prefetch |= nested_prefetch
+
+    return select, prefetch
+
+
+class SerializerPrefetchMixin:
+    """
+    GenericAPIView mixin that optimizes get_queryset() for the view's
+    serializer: nested serializers and relational fields are loaded with
+    select_related() / prefetch_related() instead of one query per row.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        select, prefetch = get_related_lookups(self.get_serializer(), queryset.model)
+        if select:
+            queryset = queryset.select_related(*sorted(select))
+        if prefetch:
+            queryset = queryset.prefetch_related(*sorted(prefetch))
+        return queryset
@@ -0,0 +1,202 @@
+"""
+Substring search index for the Book API.
+
+DRF's SearchFilter turns ?search= into icontains lookups on Book.title and
+Author.name, which scans both tables on every request. Here every title
+and author name is split into lowercased words, and every suffix of at least MIN_TERM_LENGTH characters of each
+word is stored in BookSearchToken / AuthorSearchToken. A search term is
+then matched as a prefix of those suffixes with an index range scan:
+
+    token >= 'well' AND token < 'well' || U+10FFFF
+
+so ?search=well finds "George Orwell" (through the suffix "well"), as
+icontains does. Like SearchFilter, every term must match (in any of the
+search fields). Terms that cannot use the index fall back to SearchFilter's
+icontains lookup (see term_condition). Accents are kept, not folded, so
+that both ways of matching a term give the same results.
+
+The index is kept up to date by signals (api.signals) and by the bulk
+importer, and can be rebuilt with `manage.py rebuild_book_search_index`.
+Queryset.update() and raw SQL bypass it.
+
+The range scan needs binary string ordering on the token columns, which
+they get from BinaryCharField (api.models): SQLite's default collation,
+"C" on PostgreSQL and utf8mb4_bin on MySQL.
+"""
+import re
+import unicodedata
+
+from django.db import transaction
+from django.db.models import Q
+from rest_framework import filters
+
+from .models import Author, AuthorSearchToken, Book, BookSearchToken
+
+
+TOKEN_MAX_LENGTH = BookSearchToken._meta.get_field("token").max_length
+# Greater than any character, so (prefix, prefix + TOKEN_END) covers every
+# token starting with prefix
+TOKEN_END = "\U0010ffff"
+WORD_RE = re.compile(r"\w+")
+# Shorter suffixes are not indexed; shorter terms use icontains
+MIN_TERM_LENGTH = 2
+
+
+def tokenize(text):
+    """
+    Return the distinct lowercased words of `text`, in order.
+    """
+    text = unicodedata.normalize("NFC", text or "").lower()
+    return list(dict.fromkeys(word[:TOKEN_MAX_LENGTH] for word in WORD_RE.findall(text)))
+
+
+def index_tokens(text):
+    """
+    Return the distinct tokens stored for `text`: the suffixes of its words
+    that are at least MIN_TERM_LENGTH characters long.
+    """
+    return list(dict.fromkeys(
+        word[start:]
+        for word in tokenize(text)
+        for start in range(len(word) - MIN_TERM_LENGTH + 1)
+    ))
+
+
+def index_books(books):
+    """
+    (Re)index the titles of `books` (saved Book instances).
+    """
+    books = [book for book in books if book.pk is not None]
+    if not books:
+        return
+    with transaction.atomic():
+        BookSearchToken.objects.filter(book_id__in=[book.pk for book in books]).delete()
+        BookSearchToken.objects.bulk_create(
+            BookSearchToken(token=token, book_id=book.pk)
+            for book in books
+            for token in index_tokens(book.title)
+        )
+
+
+def index_authors(authors):
+    """
+    (Re)index the names of `authors` (saved Author instances).
+    """
+    authors = [author for author in authors if author.pk is not None]
+    if not authors:
+        return
+    with transaction.atomic():
+        AuthorSearchToken.objects.filter(author_id__in=[author.pk for author in authors]).delete()
+        AuthorSearchToken.objects.bulk_create(
+            AuthorSearchToken(token=token, author_id=author.pk)
+            for author in authors
+            for token in index_tokens(author.name)
+        )
+
+
+def rebuild_index(chunk_size=5000):
+    """
+    Rebuild both token tables from scratch. Returns (books, authors) indexed.
+    """
+    counts = []
+    for model, token_model, fk, text_field in (
+        (Book, BookSearchToken, "book_id", "title"),
+        (Author, AuthorSearchToken, "author_id", "name"),
+    ):
+        with transaction.atomic():
+            token_model.objects.all().delete()
+            count = 0
+            batch = []
+            rows = model.objects.values_list("pk", text_field).iterator(chunk_size=chunk_size)
+            for pk, text in rows:
+                count += 1
+                batch.extend(token_model(token=token, **{fk: pk}) for token in index_tokens(text))
+                if len(batch) >= chunk_size:
+                    token_model.objects.bulk_create(batch)
+                    batch = []
+            token_model.objects.bulk_create(batch)
+        counts.append(count)
+    return tuple(counts)
+
+
+# search field -> (token model, token column pointing at it, Book column to match)
+INDEXED_FIELDS = {
+    "title": (BookSearchToken, "book_id", "id"),
+    "author__name": (AuthorSearchToken, "author_id", "author_id"),
+}
+
+
+# Words matching at least this many token rows are "common" (see
+# term_condition)
+COMMON_TERM_ROWS = 5000
+
+
+def word_condition(word, fields):
+    """
+    Q matching books where the normalized `word` occurs in a word of any of
+    `fields`, through the index. None if the index should not be used for
+    it (see term_condition).
+    """
+    if len(word) < MIN_TERM_LENGTH:
+        return None
+    condition = Q()
+    for field in fields:
+        token_model, token_column, book_column = INDEXED_FIELDS[field]
+        matching = token_model.objects.filter(token__gte=word, token__lt=word + TOKEN_END)
+        # One probe past the first COMMON_TERM_ROWS - 1 rows of the range
+        # rather than counting them
+        if matching[COMMON_TERM_ROWS - 1:].exists():
+            return None
+        condition |= Q(**{f"{book_column}__in": matching.values(token_column)})
+    return condition
+
+
+def term_condition(term, fields):
+    """
+    Q matching books where the search term `term` occurs in any of
+    `fields`, as SearchFilter matches it.
+
+    Each word of the term is matched with `id IN (matching tokens)`, which
+    reads only the few matching rows. That loses to icontains when a word
+    matches many rows: icontains walks the books in the requested order and
+    stops once the page is full, while the IN list has to be built in full.
+    So a term with a common word (at least COMMON_TERM_ROWS token rows,
+    found with one OFFSET probe of the index range) uses icontains, and so does a
+    term with a word shorter than MIN_TERM_LENGTH, which is not indexed.
+    """
+    words = tokenize(term)
+    condition = Q()
+    for word in words:
+        matches = word_condition(word, fields)
+        if matches is None:
+            break
+        condition &= matches
+    else:
+        if words:
+            return condition
+
+    condition = Q()
+    for field in fields:
+        condition |= Q(**{f"{field}__icontains": term})
+    return condition
+
+
+class BookSearchFilter(filters.SearchFilter):
+    """
+    Drop-in replacement for SearchFilter on Book querysets, backed by the
+    substring index. Uses the same `search` query parameter and the view's
+    search_fields; views searching any field the index does not cover
+    (or using ^ = @ $ prefixes) get the regular icontains search.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        search_fields = self.get_search_fields(view, request)
+        search_terms = self.get_search_terms(request)
+        if not search_fields or not search_terms:
+            return queryset
+        if queryset.model is not Book or not set(search_fields) <= set(INDEXED_FIELDS):
+            return super().filter_queryset(request, queryset, view)
+
+        for term in dict.fromkeys(search_terms):
+            queryset = queryset.filter(term_condition(term, search_fields))
+        return queryset
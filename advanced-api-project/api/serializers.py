@@ -4,6 +4,22 @@ from rest_framework import serializers
 from .models import Author, Book
 
 
+def check_publication_year(value, current_year=None):
+    """
+    Raise ValidationError if publication_year is in the future.
+
+    Shared by BookSerializer and the bulk importer; callers validating many
+    rows pass current_year once instead of reading the clock per row.
+    """
+    if current_year is None:
+        current_year = datetime.now().year
+    if value > current_year:
+        raise serializers.ValidationError(
+            f"publication_year cannot be in the future (got {value}, current year is {current_year})."
+        )
+    return value
+
+
 class BookSerializer(serializers.ModelSerializer):
     """
     Serializer for the Book model.
@@ -22,12 +38,7 @@ class BookSerializer(serializers.ModelSerializer):
 
         This prevents creating or updating books that are set in the future.
         """
-        current_year = datetime.now().year
-        if value > current_year:
-            raise serializers.ValidationError(
-                f"publication_year cannot be in the future (got {value}, current year is {current_year})."
-            )
-        return value
+        return check_publication_year(value)
 
 
 class AuthorSerializer(serializers.ModelSerializer):
@@ -44,4 +55,59 @@ class AuthorSerializer(serializers.ModelSerializer):
     class Meta:
         model = Author
         fields = ["id", "name", "books"]
+        # The API views leave `books` out unless ?expand=books (see api.sparse)
+        expandable_fields = ["books"]
+
+
+
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    PrimaryKeyRelatedField that looks primary keys up in a dict from the
+    serializer context (context[context_key], {pk: instance}) instead of one
+    query per value. Values missing from the dict are "does not exist".
+    Without the dict it behaves like PrimaryKeyRelatedField.
+    """
+
+    def __init__(self, context_key, **kwargs):
+        self.context_key = context_key
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        instances = self.context.get(self.context_key)
+        if instances is None:
+            return super().to_internal_value(data)
+        try:
+            pk = self.get_queryset().model._meta.pk.to_python(data)
+        except (TypeError, ValueError, serializers.DjangoValidationError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        if pk not in instances:
+            self.fail("does_not_exist", pk_value=data)
+        return instances[pk]
+
+
+class BookBatchListSerializer(serializers.ListSerializer):
+    """
+    ListSerializer for batch updates: each item is validated against the
+    instance with its "id", taken from the `instances` dict ({pk: Book})
+    passed as the list serializer's instance.
+    """
+
+    def run_child_validation(self, data):
+        if isinstance(self.instance, dict):
+            self.child.instance = self.instance.get(data.get("id"))
+            self.child.initial_data = data
+        return super().run_child_validation(data)
+
+
+class BookBatchSerializer(BookSerializer):
+    """
+    BookSerializer for the batch endpoint (api.batch): same fields and
+    validation, but authors are resolved from context["authors"] so
+    validating a batch costs one query for all of them.
+    """
+    author = PrefetchedPrimaryKeyRelatedField("authors", queryset=Author.objects.all())
 
+    class Meta(BookSerializer.Meta):
+        # Explicit so the declared `author` keeps its place in the output
+        fields = ["id", "title", "publication_year", "author"]
+        list_serializer_class = BookBatchListSerializer
@@ -0,0 +1,55 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import bump_generation_on_commit
+from .changes import record_changes
+from .models import Author, Book, Change
+from .search import index_authors, index_books
+
+
+# -----------------------
+# SEARCH INDEX MAINTENANCE
+# -----------------------
+# Token rows are removed with their book/author by the ON DELETE CASCADE,
+# so only saves need handling.
+@receiver(post_save, sender=Book)
+def index_book(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    index_books([instance])
+
+
+@receiver(post_save, sender=Author)
+def index_author(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    index_authors([instance])
+
+
+# -----------------------
+# CHANGE LOG (api.changes)
+# -----------------------
+@receiver(post_save, sender=Book)
+@receiver(post_save, sender=Author)
+def log_save(sender, instance, **kwargs):
+    record_changes(sender, [instance.pk], Change.UPSERT)
+
+
+@receiver(post_delete, sender=Book)
+@receiver(post_delete, sender=Author)
+def log_delete(sender, instance, **kwargs):
+    record_changes(sender, [instance.pk], Change.DELETE)
+
+
+# -----------------------
+# RESPONSE CACHE (api.cache)
+# -----------------------
+# Book responses include author data and ?search= matches author names, so
+# author changes invalidate them too. Deleting an Author sends post_delete
+# for each cascaded Book as well.
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+@receiver(post_save, sender=Author)
+@receiver(post_delete, sender=Author)
+def invalidate_book_responses(sender, **kwargs):
+    bump_generation_on_commit(Book)
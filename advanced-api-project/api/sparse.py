@@ -0,0 +1,142 @@
+"""
+Sparse fieldsets: ?fields= and ?expand=.
+
+- ?fields=id,title returns only those fields. Nested fields use dots:
+  ?fields=name,books.title.
+- ?expand=books includes an expandable field. Fields listed in the
+  serializer's Meta.expandable_fields (e.g. Author.books) are left out
+  unless they are expanded or named in ?fields=.
+
+SparseFieldsMixin trims the view's serializer accordingly and narrows the
+SQL to match: the queryset is restricted with .only() to the columns the
+remaining fields read, and nested relations that were trimmed away are not
+prefetched at all (SerializerPrefetchMixin only sees the trimmed tree).
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.relations import ManyRelatedField
+
+
+def parse_field_paths(value):
+    """
+    Parse "a,b.c,b.d" into {"a": {}, "b": {"c": {}, "d": {}}}.
+    Returns None when `value` is empty (meaning "no restriction").
+    """
+    tree = {}
+    for path in (value or "").split(","):
+        parts = [part.strip() for part in path.split(".") if part.strip()]
+        node = tree
+        for part in parts:
+            node = node.setdefault(part, {})
+    return tree or None
+
+
+def nested_serializer(field):
+    if isinstance(field, serializers.ListSerializer):
+        return field.child
+    if isinstance(field, serializers.BaseSerializer):
+        return field
+    return None
+
+
+def trim_serializer(serializer, fields=None, expand=None):
+    """
+    Drop the fields of `serializer` (recursively into nested serializers)
+    that are not selected by the `fields` / `expand` trees.
+    """
+    expand = expand or {}
+    meta = getattr(serializer, "Meta", None)
+    expandable = set(getattr(meta, "expandable_fields", ()))
+
+    for name in list(serializer.fields):
+        if fields is not None and name not in fields:
+            serializer.fields.pop(name)
+            continue
+        if name in expandable and name not in expand and not (fields and name in fields):
+            serializer.fields.pop(name)
+            continue
+        child = nested_serializer(serializer.fields[name])
+        if child is not None:
+            trim_serializer(child, (fields or {}).get(name) or None, expand.get(name))
+    return serializer
+
+
+def only_fields(serializer, model):
+    """
+    Return the model field names `serializer` reads, for .only(), or None if
+    some field is not a plain column (a method, property, dotted source...).
+    Relations loaded by prefetch_related() are skipped.
+    """
+    names = {model._meta.pk.name}
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        if field.source == "*" or "." in field.source:
+            return None
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            return None
+        if isinstance(field, (serializers.ListSerializer, ManyRelatedField)) or not model_field.concrete:
+            if model_field.one_to_many or model_field.many_to_many:
+                continue
+            return None
+        if isinstance(field, serializers.BaseSerializer):
+            # A forward relation rendered nested needs select_related()
+            return None
+        names.add(model_field.name)
+    return sorted(names)
+
+
+class SparseFieldsMixin:
+    """
+    GenericAPIView mixin adding ?fields= / ?expand= (see module docstring).
+
+    Works with SerializerPrefetchMixin (list it first) and FastReadMixin
+    (the compiled fast serializer is trimmed the same way).
+    """
+    fields_query_param = "fields"
+    expand_query_param = "expand"
+
+    def get_field_tree(self):
+        return parse_field_paths(self.request.query_params.get(self.fields_query_param))
+
+    def get_expand_tree(self):
+        return parse_field_paths(self.request.query_params.get(self.expand_query_param))
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        trim_serializer(
+            nested_serializer(serializer) or serializer,
+            self.get_field_tree(),
+            self.get_expand_tree(),
+        )
+        return serializer
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        names = only_fields(self.get_serializer(), queryset.model)
+        if names is not None:
+            queryset = queryset.only(*names)
+        return queryset
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        # Keep the ordering columns loaded: the cursor paginator reads them
+        # from the first and last rows
+        names, deferred = queryset.query.deferred_loading
+        if names and not deferred:
+            ordering = [
+                term.lstrip("-")
+                for term in queryset.query.order_by
+                if isinstance(term, str) and "__" not in term
+            ]
+            queryset = queryset.only(*names, *ordering)
+        return queryset
+
+    def get_fast_serializer(self):
+        fast = super().get_fast_serializer()
+        fields = self.get_field_tree()
+        if fast is None or fields is None:
+            return fast
+        return fast.subset(fields)
@@ -1,12 +1,50 @@
-from django.urls import reverse
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import include, path, reverse
+from django.utils import timezone
 from django.contrib.auth.models import User
-from rest_framework import status
-from rest_framework.test import APITestCase
+from rest_framework import serializers, status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
 
 from .models import Author, Book
+from .cache import get_response_cache_stats
+from .fast_serializers import compile_serializer
+from .pagination import OrderingCursorPagination
+from .changes import has_changes, notify_changes, wait_for_changes
+from .models import AuthorSearchToken, BookSearchToken, Change
+from .prefetch import get_related_lookups
+from .search import COMMON_TERM_ROWS, index_tokens, tokenize
+from .serializers import AuthorSerializer, BookSerializer
+from .views import AsyncBookDetailView, AsyncBookListView, AuthorListView, BookListView
+
+
+class CacheClearingTestCase(APITestCase):
+    """
+    APITestCase that starts every test with an empty cache: cached
+    responses outlive each test's rolled-back data.
+    """
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
 
 
-class BookAPITests(APITestCase):
+class BookAPITests(CacheClearingTestCase):
     """
     Unit tests for the Book API endpoints.
 
@@ -17,6 +55,7 @@ class BookAPITests(APITestCase):
     """
 
     def setUp(self):
+        super().setUp()
         # Create a user for authenticated requests
         self.user = User.objects.create_user(
             username="testuser",
@@ -62,7 +101,7 @@ class BookAPITests(APITestCase):
         response = self.client.get(self.list_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         # We created 3 books in setUp
-        self.assertEqual(len(response.data), 3)
+        self.assertEqual(len(response.data["results"]), 3)
 
     def test_retrieve_book_anonymous_ok(self):
         """
@@ -172,8 +211,8 @@ class BookAPITests(APITestCase):
         """
         response = self.client.get(self.list_url, {"title": "Americanah"})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]["title"], "Americanah")
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["results"][0]["title"], "Americanah")
 
     def test_filter_books_by_publication_year(self):
         """
@@ -182,8 +221,8 @@ class BookAPITests(APITestCase):
         """
         response = self.client.get(self.list_url, {"publication_year": 2006})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]["title"], "Half of a Yellow Sun")
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["results"][0]["title"], "Half of a Yellow Sun")
 
     def test_search_books_by_title_or_author(self):
         """
@@ -193,12 +232,12 @@ class BookAPITests(APITestCase):
         response = self.client.get(self.list_url, {"search": "Chimamanda"})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         # Both books by Chimamanda Adichie should be returned
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data["results"]), 2)
 
         response2 = self.client.get(self.list_url, {"search": "1984"})
         self.assertEqual(response2.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response2.data), 1)
-        self.assertEqual(response2.data[0]["title"], "1984")
+        self.assertEqual(len(response2.data["results"]), 1)
+        self.assertEqual(response2.data["results"][0]["title"], "1984")
 
     def test_order_books_by_publication_year_desc(self):
         """
@@ -208,7 +247,1138 @@ class BookAPITests(APITestCase):
         response = self.client.get(self.list_url, {"ordering": "-publication_year"})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
-        years = [item["publication_year"] for item in response.data]
+        years = [item["publication_year"] for item in response.data["results"]]
         # Ensure years are sorted in descending order
         self.assertEqual(years, sorted(years, reverse=True))
 
+
+
+class BookBulkImportTests(CacheClearingTestCase):
+    """
+    Tests for the streaming bulk import endpoint and management command.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username="testuser", password="testpassword123")
+        self.author = Author.objects.create(name="George Orwell")
+        self.url = reverse("book-bulk-import")
+
+    def test_requires_authentication(self):
+        response = self.client.post(self.url, "title,publication_year,author\n", content_type="text/csv")
+        self.assertIn(
+            response.status_code,
+            (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN),
+        )
+
+    def test_csv_body_with_row_errors(self):
+        """
+        Valid rows are inserted; invalid rows are reported by row number.
+        """
+        self.client.force_authenticate(self.user)
+        data = (
+            "title,publication_year,author\n"
+            "1984,1949,George Orwell\n"
+            "Animal Farm,1945,George Orwell\n"
+            "Future Book,3000,George Orwell\n"
+            "Nobody's Book,2000,Unknown Person\n"
+            ",abc,George Orwell\n"
+        )
+        response = self.client.post(self.url + "?chunk_size=2", data, content_type="text/csv")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["total"], 5)
+        self.assertEqual(response.data["created"], 2)
+        self.assertEqual(response.data["error_count"], 3)
+        self.assertEqual([e["row"] for e in response.data["errors"]], [3, 4, 5])
+        self.assertIn("publication_year", response.data["errors"][0]["errors"])
+        self.assertIn("author", response.data["errors"][1]["errors"])
+        self.assertEqual(
+            set(response.data["errors"][2]["errors"]), {"title", "publication_year"}
+        )
+        self.assertEqual(
+            sorted(Book.objects.values_list("title", flat=True)), ["1984", "Animal Farm"]
+        )
+
+    def test_jsonl_upload_creates_authors(self):
+        self.client.force_authenticate(self.user)
+        upload = SimpleUploadedFile(
+            "books.jsonl",
+            b'{"title": "Americanah", "publication_year": 2013, "author": "Chimamanda Adichie"}\n'
+            b"not json\n"
+            b'{"title": "Homage to Catalonia", "publication_year": 1938, "author": "George Orwell"}\n',
+        )
+        response = self.client.post(self.url + "?create_authors=1", {"file": upload})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["created"], 2)
+        self.assertEqual(response.data["errors"][0]["row"], 2)
+        self.assertEqual(Author.objects.count(), 2)
+        self.assertEqual(
+            Book.objects.get(title="Americanah").author.name, "Chimamanda Adichie"
+        )
+
+    def test_bom_and_invalid_utf8_rows(self):
+        self.client.force_authenticate(self.user)
+        data = (
+            b"\xef\xbb\xbftitle,publication_year,author\n"
+            b"1984,1949,George Orwell\n"
+            b"Bad \xff bytes,1950,George Orwell\n"
+            b"Animal Farm,1945.5,George Orwell\n"
+            b"Animal Farm,1945.0,George Orwell\n"
+        )
+        response = self.client.post(self.url, data, content_type="text/csv")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["created"], 2)
+        self.assertEqual([e["row"] for e in response.data["errors"]], [2, 3])
+        self.assertEqual(
+            response.data["errors"][0]["errors"], {"non_field_errors": ["Invalid UTF-8 text."]}
+        )
+        self.assertIn("publication_year", response.data["errors"][1]["errors"])
+        self.assertEqual(
+            sorted(Book.objects.values_list("title", "publication_year")),
+            [("1984", 1949), ("Animal Farm", 1945)],
+        )
+
+    def test_invalid_utf8_jsonl_line(self):
+        self.client.force_authenticate(self.user)
+        data = (
+            b'{"title": "1984", "publication_year": 1949, "author": "George Orwell"}\n'
+            b'{"title": "\xc3", "publication_year": 1949, "author": "George Orwell"}\n'
+            b'{"title": "Year", "publication_year": true, "author": "George Orwell"}\n'
+        )
+        response = self.client.post(self.url, data, content_type="application/x-ndjson")
+        self.assertEqual(response.data["created"], 1)
+        self.assertEqual([e["row"] for e in response.data["errors"]], [2, 3])
+
+    def test_unknown_format_rejected(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.post(self.url, "x", content_type="text/plain")
+        self.assertEqual(response.status_code, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+
+    def test_management_command(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as handle:
+            handle.write("title,publication_year,author\n1984,1949,George Orwell\n")
+        self.addCleanup(os.remove, handle.name)
+
+        out = StringIO()
+        call_command("import_books", handle.name, "--chunk-size", "10", stdout=out, stderr=StringIO())
+        self.assertIn("Imported 1 of 1 rows", out.getvalue())
+        self.assertEqual(Book.objects.get().author, self.author)
+
+
+class BookStreamingListTests(CacheClearingTestCase):
+    """
+    Tests for the streaming (NDJSON / JSON array) mode of the list endpoint.
+    """
+
+    def setUp(self):
+        super().setUp()
+        author = Author.objects.create(name="George Orwell")
+        other = Author.objects.create(name="Chimamanda Adichie")
+        Book.objects.create(title="1984", publication_year=1949, author=author)
+        Book.objects.create(title="Animal Farm", publication_year=1945, author=author)
+        Book.objects.create(title="Americanah", publication_year=2013, author=other)
+        self.list_url = reverse("book-list")
+
+    def read(self, response):
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode()
+
+    def test_ndjson_stream_matches_regular_list(self):
+        regular = self.client.get(self.list_url).json()["results"]
+        response = self.client.get(self.list_url, HTTP_ACCEPT="application/x-ndjson")
+
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = self.read(response).splitlines()
+        self.assertEqual([json.loads(line) for line in lines], regular)
+
+    def test_json_array_stream(self):
+        regular = self.client.get(self.list_url).json()["results"]
+        response = self.client.get(self.list_url, {"stream": "1"})
+        self.assertEqual(json.loads(self.read(response)), regular)
+
+    def test_stream_keeps_filter_search_and_ordering(self):
+        response = self.client.get(
+            self.list_url,
+            {"stream": "1", "search": "Orwell", "ordering": "-publication_year"},
+        )
+        titles = [row["title"] for row in json.loads(self.read(response))]
+        self.assertEqual(titles, ["1984", "Animal Farm"])
+
+        response = self.client.get(self.list_url, {"format": "ndjson", "publication_year": 2013})
+        self.assertEqual(json.loads(self.read(response))["title"], "Americanah")
+
+    def test_small_batches(self):
+        with patch.object(BookListView, "stream_batch_size", 1):
+            response = self.client.get(self.list_url, {"stream": "1"})
+            self.assertEqual(len(json.loads(self.read(response))), 3)
+
+    def test_empty_stream(self):
+        Book.objects.all().delete()
+        response = self.client.get(self.list_url, {"stream": "1"})
+        self.assertEqual(json.loads(self.read(response)), [])
+
+
+class AuthorAPIQueryTests(CacheClearingTestCase):
+    """
+    Query-count tests for the Author endpoints: nested books are prefetched,
+    so listing authors costs the same number of queries for any page size.
+    """
+
+    def create_authors(self, count):
+        authors = Author.objects.bulk_create(Author(name=f"Author {i}") for i in range(count))
+        Book.objects.bulk_create(
+            Book(title=f"Book {i}-{n}", publication_year=2000, author=author)
+            for i, author in enumerate(authors)
+            for n in range(2)
+        )
+
+    def test_list_authors_constant_queries(self):
+        for count in (1, 100, 1000):
+            with self.subTest(authors=count):
+                Author.objects.all().delete()
+                self.create_authors(count)
+                # authors + prefetched books
+                with self.assertNumQueries(2):
+                    response = self.client.get(
+                        reverse("author-list"), {"page_size": count, "expand": "books"}
+                    )
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(len(response.data["results"]), count)
+                self.assertEqual(len(response.data["results"][0]["books"]), 2)
+
+    def test_author_detail_queries(self):
+        self.create_authors(1)
+        author = Author.objects.get()
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                reverse("author-detail", kwargs={"pk": author.pk}), {"expand": "books"}
+            )
+        self.assertEqual(
+            sorted(book["title"] for book in response.data["books"]),
+            ["Book 0-0", "Book 0-1"],
+        )
+
+    def test_prefetched_book_str_needs_no_query(self):
+        """
+        Book.__str__ reads author.name; prefetching author.books fills in
+        each book's author, so this is free.
+        """
+        self.create_authors(3)
+        request = Request(APIRequestFactory().get("/", {"expand": "books"}))
+        authors = list(AuthorListView(request=request, format_kwarg=None).get_queryset())
+        with self.assertNumQueries(0):
+            for author in authors:
+                for book in author.books.all():
+                    str(book)
+
+    def test_related_lookups_for_serializer_tree(self):
+        class BookWithAuthorSerializer(serializers.ModelSerializer):
+            author_name = serializers.CharField(source="author.name")
+
+            class Meta:
+                model = Book
+                fields = ["id", "title", "author", "author_name"]
+
+        class NestedAuthorSerializer(serializers.ModelSerializer):
+            books = BookWithAuthorSerializer(many=True)
+
+            class Meta:
+                model = Author
+                fields = ["id", "books"]
+
+        self.assertEqual(get_related_lookups(BookSerializer(), Book), (set(), set()))
+        self.assertEqual(
+            get_related_lookups(BookWithAuthorSerializer(), Book), ({"author"}, set())
+        )
+        self.assertEqual(
+            get_related_lookups(NestedAuthorSerializer(), Author),
+            (set(), {"books", "books__author"}),
+        )
+
+
+class FastReadSerializerTests(CacheClearingTestCase):
+    """
+    The compiled fast path must render exactly what BookSerializer renders.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.author = Author.objects.create(name="Zoë Ünicode")
+        Book.objects.create(title="Zebra \"quoted\"", publication_year=1999, author=self.author)
+        Book.objects.create(title="Apple", publication_year=2020, author=self.author)
+        self.url = reverse("book-list")
+
+    def test_compiles_book_serializer_only(self):
+        fast = compile_serializer(BookSerializer)
+        self.assertEqual(fast.keys, ["id", "title", "publication_year", "author"])
+        self.assertEqual(fast.columns, ["id", "title", "publication_year", "author_id"])
+        # Nested serializers keep the regular path
+        self.assertIsNone(compile_serializer(AuthorSerializer))
+
+    def test_custom_representations_are_kept(self):
+        class UpperTitleField(serializers.CharField):
+            def to_representation(self, value):
+                return value.upper()
+
+        class AuthorNameField(serializers.PrimaryKeyRelatedField):
+            def to_representation(self, value):
+                return f"author-{value.pk}"
+
+        class TitleFieldSerializer(BookSerializer):
+            title = UpperTitleField()
+
+        class AuthorFieldSerializer(BookSerializer):
+            author = AuthorNameField(read_only=True)
+
+        class RepresentationSerializer(BookSerializer):
+            def to_representation(self, instance):
+                data = super().to_representation(instance)
+                data["title"] = data["title"].lower()
+                return data
+
+        # An overriding field is compiled with its own converter; the
+        # others fall back to the serializer
+        self.assertIsNotNone(compile_serializer(TitleFieldSerializer))
+        self.assertIsNone(compile_serializer(AuthorFieldSerializer))
+        self.assertIsNone(compile_serializer(RepresentationSerializer))
+
+        queryset = Book.objects.order_by("title")
+        for serializer_class in (TitleFieldSerializer, AuthorFieldSerializer, RepresentationSerializer):
+            with self.subTest(serializer=serializer_class.__name__):
+                cache.clear()
+                with patch.object(BookListView, "serializer_class", serializer_class):
+                    response = self.client.get(self.url, {"ordering": "title"})
+                self.assertEqual(
+                    JSONRenderer().render(response.data["results"]),
+                    JSONRenderer().render(serializer_class(queryset, many=True).data),
+                )
+
+    def test_rendered_output_is_byte_identical(self):
+        queryset = Book.objects.order_by("title")
+        expected = JSONRenderer().render(BookSerializer(queryset, many=True).data)
+        fast = compile_serializer(BookSerializer)
+        self.assertEqual(JSONRenderer().render(list(fast.rows(queryset))), expected)
+
+        response = self.client.get(self.url, {"ordering": "-publication_year"})
+        expected = JSONRenderer().render(
+            BookSerializer(Book.objects.order_by("-publication_year"), many=True).data
+        )
+        self.assertEqual(JSONRenderer().render(response.data["results"]), expected)
+
+    def test_view_can_opt_out(self):
+        fast_response = self.client.get(self.url)
+        with patch.object(BookListView, "fast_read", False):
+            slow_response = self.client.get(self.url)
+        self.assertEqual(fast_response.content, slow_response.content)
+
+    def test_streaming_uses_fast_path(self):
+        fast = compile_serializer(BookSerializer)
+        with patch.object(fast, "rows", wraps=fast.rows) as rows:
+            response = self.client.get(self.url, {"stream": "1"})
+            streamed = json.loads(b"".join(response.streaming_content))
+        rows.assert_called_once()
+        self.assertEqual(streamed, self.client.get(self.url).json()["results"])
+
+
+class BookCursorPaginationTests(CacheClearingTestCase):
+    """
+    Tests for the ordering-aware cursor pagination of the Book list.
+    """
+
+    def setUp(self):
+        super().setUp()
+        author = Author.objects.create(name="George Orwell")
+        # Duplicate years so paging relies on the id tiebreaker
+        Book.objects.bulk_create(
+            Book(title=f"Book {i:02d}", publication_year=1950 + i % 4, author=author)
+            for i in range(25)
+        )
+        self.url = reverse("book-list")
+
+    def walk(self, params, direction="next"):
+        ids = []
+        response = self.client.get(self.url, params)
+        return self.follow(response, direction, ids)
+
+    def follow(self, response, direction, ids):
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(row["id"] for row in response.data["results"])
+            if not response.data[direction]:
+                return ids, response
+            response = self.client.get(response.data[direction])
+
+    def test_pages_follow_active_ordering(self):
+        for ordering in ("title", "-title", "publication_year", "-publication_year"):
+            with self.subTest(ordering=ordering):
+                tiebreak = "-id" if ordering.startswith("-") else "id"
+                expected = list(
+                    Book.objects.order_by(ordering, tiebreak).values_list("id", flat=True)
+                )
+                ids, last = self.walk({"ordering": ordering, "page_size": 7})
+                self.assertEqual(ids, expected)
+
+                # And back again from the last page
+                back, _ = self.follow(self.client.get(last.data["previous"]), "previous", [])
+                self.assertEqual(sorted(back), sorted(expected[: -len(last.data["results"])]))
+
+    def test_first_page_shape(self):
+        response = self.client.get(self.url)
+        self.assertEqual(len(response.data["results"]), 20)
+        self.assertIsNone(response.data["previous"])
+        self.assertIn("cursor=", response.data["next"])
+
+    def test_deep_page_uses_keyset_not_offset(self):
+        response = self.client.get(self.url, {"ordering": "-publication_year", "page_size": 5})
+        next_url = response.data["next"]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(next_url)
+        sql = queries[-1]["sql"]
+        self.assertNotIn("OFFSET", sql.upper())
+        self.assertIn('"publication_year" <', sql)
+
+    def test_deep_page_is_an_index_search(self):
+        paginator = OrderingCursorPagination()
+        for ordering in ("title", "-title", "publication_year", "-publication_year"):
+            response = self.client.get(self.url, {"ordering": ordering, "page_size": 5})
+            response = self.client.get(response.data["next"])
+            for direction in ("next", "previous"):
+                with self.subTest(ordering=ordering, direction=direction):
+                    request = Request(APIRequestFactory().get(response.data[direction]))
+                    queryset = paginator.page_queryset(Book.objects.order_by(ordering), request)
+                    plan = queryset.explain()
+                    # A range search from the cursor, not a walk of the index
+                    self.assertIn("SEARCH api_book USING", plan)
+                    self.assertNotIn("SCAN api_book", plan)
+
+    def test_ordering_index_is_used(self):
+        self.assertIn(
+            "api_book_year_idx",
+            Book.objects.order_by("-publication_year", "-id")[:5].explain(),
+        )
+        self.assertIn("api_book_title_idx", Book.objects.order_by("title", "id")[:5].explain())
+
+    def test_limit_offset_still_available(self):
+        response = self.client.get(self.url, {"ordering": "title", "limit": 5, "offset": 10})
+        self.assertEqual(response.data["count"], 25)
+        self.assertEqual(
+            [row["title"] for row in response.data["results"]],
+            [f"Book {i:02d}" for i in range(10, 15)],
+        )
+
+    def test_invalid_or_foreign_cursor(self):
+        response = self.client.get(self.url, {"cursor": "garbage"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        # A cursor issued for another ordering is rejected
+        next_url = self.client.get(self.url, {"ordering": "title"}).data["next"]
+        response = self.client.get(next_url.replace("ordering=title", "ordering=-publication_year"))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class BookSearchIndexTests(CacheClearingTestCase):
+    """
+    Tests for the substring search index behind ?search= on the Book list.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.orwell = Author.objects.create(name="George Orwell")
+        self.adichie = Author.objects.create(name="Chimamanda Ngozi Adichie")
+        self.book1 = Book.objects.create(title="Animal Farm", publication_year=1945, author=self.orwell)
+        self.book2 = Book.objects.create(title="Nineteen Eighty-Four", publication_year=1949, author=self.orwell)
+        self.book3 = Book.objects.create(title="Half of a Yellow Sun", publication_year=2006, author=self.adichie)
+        self.url = reverse("book-list")
+
+    def search(self, query):
+        response = self.client.get(self.url, {"search": query})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {row["title"] for row in response.data["results"]}
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize("Ça, c'est l'Été!"), ["ça", "c", "est", "l", "été"])
+        self.assertEqual(tokenize("Farm farm FARM"), ["farm"])
+        self.assertEqual(index_tokens("Orwell, a"), ["orwell", "rwell", "well", "ell", "ll"])
+
+    def test_substring_search_on_title_and_author(self):
+        self.assertEqual(self.search("anim"), {"Animal Farm"})
+        self.assertEqual(self.search("orw"), {"Animal Farm", "Nineteen Eighty-Four"})
+        self.assertEqual(self.search("ADICHIE"), {"Half of a Yellow Sun"})
+        # Every term must match, in either field
+        self.assertEqual(self.search("orwell farm"), {"Animal Farm"})
+        self.assertEqual(self.search("orwell yellow"), set())
+        # Matches anywhere in a word, as icontains does
+        self.assertEqual(self.search("well"), {"Animal Farm", "Nineteen Eighty-Four"})
+        self.assertEqual(self.search("ELLO"), {"Half of a Yellow Sun"})
+        # One letter is not indexed and uses icontains
+        self.assertEqual(self.search("y"), {"Half of a Yellow Sun", "Nineteen Eighty-Four"})
+        self.assertEqual(self.search("zzz"), set())
+
+    def test_terms_that_cannot_use_the_index(self):
+        # Common words and words too short to be indexed use icontains
+        with patch("api.search.COMMON_TERM_ROWS", 1), CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.search("well"), {"Animal Farm", "Nineteen Eighty-Four"})
+        self.assertTrue(any("LIKE" in query["sql"] for query in queries))
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.search("o'brien"), set())
+        self.assertTrue(any("LIKE" in query["sql"] for query in queries))
+
+    def test_accents_match_the_same_way_in_both_paths(self):
+        Book.objects.create(title="Mémoires d'Hadrien", publication_year=1951, author=self.adichie)
+        # The index and the icontains fallback agree on accented words
+        for common in (COMMON_TERM_ROWS, 1):
+            with self.subTest(common=common), patch("api.search.COMMON_TERM_ROWS", common):
+                cache.clear()
+                self.assertEqual(self.search("émoire"), {"Mémoires d'Hadrien"})
+                self.assertEqual(self.search("emoire"), set())
+
+    def test_common_terms_give_the_same_results(self):
+        with patch("api.search.COMMON_TERM_ROWS", 1):
+            self.assertEqual(self.search("orw"), {"Animal Farm", "Nineteen Eighty-Four"})
+            self.assertEqual(self.search("orwell farm"), {"Animal Farm"})
+
+    def test_index_follows_saves(self):
+        self.book1.title = "Burmese Days"
+        self.book1.save()
+        self.assertEqual(self.search("burmese"), {"Burmese Days"})
+        self.assertEqual(self.search("animal"), set())
+
+        self.orwell.name = "Eric Blair"
+        self.orwell.save()
+        self.assertEqual(self.search("blair"), {"Burmese Days", "Nineteen Eighty-Four"})
+
+        self.book2.delete()
+        self.assertFalse(BookSearchToken.objects.filter(book_id=self.book2.pk).exists())
+
+    def test_bulk_import_is_indexed(self):
+        self.client.force_authenticate(User.objects.create_user("importer", password="pw"))
+        body = "title,publication_year,author\nHomage to Catalonia,1938,Aldous Huxley\n"
+        self.client.post(
+            reverse("book-bulk-import") + "?create_authors=1", body, content_type="text/csv"
+        )
+        self.assertEqual(self.search("catalonia"), {"Homage to Catalonia"})
+        self.assertEqual(self.search("huxley"), {"Homage to Catalonia"})
+
+    def test_rebuild_command(self):
+        BookSearchToken.objects.all().delete()
+        AuthorSearchToken.objects.all().delete()
+        out = StringIO()
+        call_command("rebuild_book_search_index", stdout=out)
+        self.assertIn("Indexed 3 books and 2 authors", out.getvalue())
+        self.assertEqual(self.search("yellow"), {"Half of a Yellow Sun"})
+
+    def test_search_uses_token_index(self):
+        plan = BookSearchToken.objects.filter(token__gte="orw", token__lt="orw\U0010ffff").explain()
+        self.assertIn("api_booktoken_idx", plan)
+
+
+class BookResponseCacheTests(CacheClearingTestCase):
+    """
+    Tests for the response cache of the read-only Book endpoints.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username="writer", password="pw")
+        self.author = Author.objects.create(name="George Orwell")
+        self.book = Book.objects.create(title="1984", publication_year=1949, author=self.author)
+        self.list_url = reverse("book-list")
+        self.detail_url = reverse("book-detail", kwargs={"pk": self.book.pk})
+
+    def test_second_identical_request_is_a_hit_without_queries(self):
+        first = self.client.get(self.list_url, {"ordering": "title"})
+        self.assertEqual(first["X-Cache"], "MISS")
+        with self.assertNumQueries(0):
+            second = self.client.get(self.list_url, {"ordering": "title"})
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second["Content-Type"], first["Content-Type"])
+
+        stats = get_response_cache_stats()
+        self.assertEqual((stats["hit"], stats["miss"]), (1, 1))
+        self.assertEqual(stats["hit_ratio"], 0.5)
+
+    def test_key_uses_normalized_query_and_accept(self):
+        self.client.get(self.list_url, {"ordering": "title", "search": "orwell"})
+        response = self.client.get(self.list_url + "?search=orwell&ordering=title")
+        self.assertEqual(response["X-Cache"], "HIT")
+
+        response = self.client.get(self.list_url + "?search=orwell&ordering=title", HTTP_ACCEPT="application/json")
+        self.assertEqual(response["X-Cache"], "MISS")
+
+    def test_writes_invalidate(self):
+        self.client.force_authenticate(self.user)
+        self.client.get(self.list_url)
+        self.client.get(self.detail_url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse("book-create"),
+                {"title": "Animal Farm", "publication_year": 1945, "author": self.author.pk},
+                format="json",
+            )
+        response = self.client.get(self.list_url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(len(response.json()["results"]), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(
+                reverse("book-update", kwargs={"pk": self.book.pk}), {"title": "Nineteen"}, format="json"
+            )
+        self.assertEqual(self.client.get(self.detail_url).json()["title"], "Nineteen")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(reverse("book-delete", kwargs={"pk": self.book.pk}))
+        self.assertEqual(self.client.get(self.detail_url).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_generation_is_bumped_on_commit(self):
+        self.client.get(self.detail_url)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.book.title = "Nineteen"
+            self.book.save()
+            # Not yet committed: other requests may still cache the old row
+            # under the current generation
+            self.assertEqual(self.client.get(self.detail_url)["X-Cache"], "HIT")
+        self.assertTrue(callbacks)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.client.get(self.detail_url).json()["title"], "Nineteen")
+
+    def test_orm_and_author_writes_invalidate(self):
+        search = {"search": "orwell"}
+        self.client.get(self.list_url, search)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.name = "Eric Blair"
+            self.author.save()
+        self.assertEqual(self.client.get(self.list_url, search).json()["results"], [])
+
+        self.client.get(self.detail_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.delete()
+        self.assertEqual(self.client.get(self.detail_url).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_bulk_import_invalidates(self):
+        self.client.force_authenticate(self.user)
+        self.client.get(self.list_url)
+        body = "title,publication_year,author\nAnimal Farm,1945,George Orwell\n"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("book-bulk-import"), body, content_type="text/csv")
+        self.assertEqual(len(self.client.get(self.list_url).json()["results"]), 2)
+
+    def test_errors_streams_and_browsable_api_are_not_cached(self):
+        missing_url = reverse("book-detail", kwargs={"pk": 999})
+        self.client.get(missing_url)
+        self.assertNotIn("X-Cache", self.client.get(missing_url))
+
+        for _ in range(2):
+            response = self.client.get(self.list_url, {"stream": "1"})
+            self.assertTrue(response.streaming)
+            self.assertNotIn("X-Cache", response)
+
+        self.client.get(self.list_url, HTTP_ACCEPT="text/html")
+        self.assertNotIn("X-Cache", self.client.get(self.list_url, HTTP_ACCEPT="text/html"))
+
+    @override_settings(API_RESPONSE_CACHE_TIMEOUT=0, API_RESPONSE_CACHE_STALE_WHILE_REVALIDATE=30)
+    def test_stale_while_revalidate(self):
+        # With a timeout of 0 every entry is immediately stale
+        self.client.get(self.detail_url)
+        # A change the cache has not been told about
+        Book.objects.filter(pk=self.book.pk).update(title="Changed")
+
+        with patch("api.cache.threading.Thread") as thread:
+            response = self.client.get(self.detail_url)
+            self.assertEqual(response["X-Cache"], "STALE")
+            self.assertEqual(response.json()["title"], "1984")
+            # Only one refresh runs at a time
+            self.client.get(self.detail_url)
+            thread.assert_called_once()
+
+            # Run the background refresh inline
+            thread.call_args.kwargs["target"]()
+            response = self.client.get(self.detail_url)
+        self.assertEqual(response["X-Cache"], "STALE")
+        self.assertEqual(response.json()["title"], "Changed")
+        self.assertEqual(get_response_cache_stats()["stale"], 3)
+
+    def test_stale_entries_are_not_served_after_a_write(self):
+        with override_settings(API_RESPONSE_CACHE_TIMEOUT=0, API_RESPONSE_CACHE_STALE_WHILE_REVALIDATE=30):
+            self.client.get(self.detail_url)
+            self.client.force_authenticate(self.user)
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.patch(
+                    reverse("book-update", kwargs={"pk": self.book.pk}), {"title": "Nineteen"}, format="json"
+                )
+            response = self.client.get(self.detail_url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()["title"], "Nineteen")
+
+    def test_stats_command(self):
+        self.client.get(self.list_url)
+        self.client.get(self.list_url)
+        out = StringIO()
+        call_command("response_cache_stats", "--reset", stdout=out)
+        self.assertIn("hits: 1", out.getvalue())
+        self.assertIn("hit ratio: 50.0%", out.getvalue())
+        self.assertEqual(get_response_cache_stats()["hit"], 0)
+
+
+class BookBatchTests(CacheClearingTestCase):
+    """
+    Tests for POST /api/books/batch/.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username="syncjob", password="pw")
+        self.author = Author.objects.create(name="George Orwell")
+        self.other = Author.objects.create(name="Chimamanda Adichie")
+        self.book1 = Book.objects.create(title="1984", publication_year=1949, author=self.author)
+        self.book2 = Book.objects.create(title="Animal Farm", publication_year=1945, author=self.author)
+        self.url = reverse("book-batch")
+        self.client.force_authenticate(self.user)
+
+    def test_requires_authentication(self):
+        self.client.force_authenticate(None)
+        response = self.client.post(self.url, [{"op": "delete", "id": self.book1.pk}], format="json")
+        self.assertIn(response.status_code, (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN))
+
+    def test_mixed_batch(self):
+        operations = [
+            {"op": "create", "data": {"title": "Americanah", "publication_year": 2013, "author": self.other.pk}},
+            {"op": "update", "id": self.book1.pk, "data": {"title": "Nineteen Eighty-Four"}},
+            {"op": "delete", "id": self.book2.pk},
+            {"op": "create", "data": {"title": "Purple Hibiscus", "publication_year": 2003, "author": self.other.pk}},
+        ]
+        response = self.client.post(self.url, operations, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        results = response.data["results"]
+        self.assertEqual([r["op"] for r in results], ["create", "update", "delete", "create"])
+        self.assertEqual([r["status"] for r in results], [201, 200, 204, 201])
+        self.assertEqual(results[0]["data"]["title"], "Americanah")
+        self.assertEqual(results[1]["data"], BookSerializer(Book.objects.get(pk=self.book1.pk)).data)
+        self.assertEqual(results[2]["id"], self.book2.pk)
+
+        self.assertEqual(
+            sorted(Book.objects.values_list("title", flat=True)),
+            ["Americanah", "Nineteen Eighty-Four", "Purple Hibiscus"],
+        )
+        # The search index follows bulk writes too
+        response = self.client.get(reverse("book-list"), {"search": "nineteen"})
+        self.assertEqual(len(response.data["results"]), 1)
+
+    def test_invalid_operation_rejects_whole_batch(self):
+        operations = [
+            {"op": "create", "data": {"title": "Ok", "publication_year": 2000, "author": self.author.pk}},
+            {"op": "create", "data": {"title": "Future", "publication_year": 9999, "author": self.author.pk}},
+            {"op": "update", "id": 999, "data": {"title": "Missing"}},
+            {"op": "update", "id": self.book1.pk, "data": {"author": 999}},
+            {"op": "delete", "id": self.book2.pk},
+            {"op": "delete", "id": self.book2.pk},
+        ]
+        response = self.client.post(self.url, operations, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        # Shape errors are reported first, before any lookups
+        self.assertEqual(list(response.data["errors"]), [5])
+
+        response = self.client.post(self.url, operations[:5], format="json")
+        errors = response.data["errors"]
+        self.assertEqual(sorted(errors), [1, 2, 3])
+        self.assertIn("publication_year", errors[1])
+        self.assertIn("id", errors[2])
+        self.assertIn("author", errors[3])
+        self.assertEqual(Book.objects.count(), 2)
+        self.assertFalse(Book.objects.filter(title="Ok").exists())
+
+    def test_malformed_bodies(self):
+        for body in ({"op": "create"}, [], [{"op": "upsert"}], [{"op": "update", "id": "1", "data": {}}]):
+            with self.subTest(body=body):
+                response = self.client.post(self.url, body, format="json")
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_query_count_does_not_grow_with_batch_size(self):
+        def run(count):
+            operations = [
+                {"op": "create", "data": {"title": f"Book {i}", "publication_year": 2000, "author": self.author.pk}}
+                for i in range(count)
+            ]
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(self.url, operations, format="json")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            # Search tokens (a few per title) are inserted in batches of as
+            # many rows as the database takes per statement
+            return len([q for q in queries if not q["sql"].startswith('INSERT INTO "api_booksearchtoken"')])
+
+        self.assertEqual(run(5), run(200))
+
+    def test_invalidates_response_cache_on_commit(self):
+        self.client.get(reverse("book-list"))
+        operations = [{"op": "update", "id": self.book1.pk, "data": {"title": "Nineteen"}}]
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.client.post(self.url, operations, format="json")
+        # Not bumped inside the transaction
+        self.assertEqual(self.client.get(reverse("book-list"))["X-Cache"], "HIT")
+        for callback in callbacks:
+            callback()
+        response = self.client.get(reverse("book-list"))
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertIn("Nineteen", [book["title"] for book in response.data["results"]])
+
+    def test_numeric_string_author_ids(self):
+        operations = [
+            {"op": "create", "data": {"title": "Americanah", "publication_year": 2013, "author": str(self.other.pk)}},
+            {"op": "update", "id": self.book1.pk, "data": {"author": str(self.other.pk)}},
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, operations, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        # Prefetched in one query like integer ids
+        self.assertEqual(len([q for q in queries if 'FROM "api_author"' in q["sql"]]), 1)
+        self.assertEqual(Book.objects.filter(author=self.other).count(), 2)
+
+
+class SparseFieldsetTests(CacheClearingTestCase):
+    """
+    Tests for ?fields= and ?expand= on the Book and Author endpoints.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.author = Author.objects.create(name="George Orwell")
+        self.book = Book.objects.create(title="1984", publication_year=1949, author=self.author)
+        Book.objects.create(title="Animal Farm", publication_year=1945, author=self.author)
+
+    def test_book_list_fields(self):
+        response = self.client.get(reverse("book-list"), {"fields": "title,publication_year"})
+        self.assertEqual(
+            response.json()["results"],
+            [
+                {"title": "1984", "publication_year": 1949},
+                {"title": "Animal Farm", "publication_year": 1945},
+            ],
+        )
+
+    def test_book_list_fields_narrow_sql(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse("book-list"), {"fields": "id", "ordering": "-publication_year"})
+        sql = queries[-1]["sql"]
+        self.assertNotIn('"title"', sql.split("FROM")[0])
+        # Paging still works when the ordering column is not an output field
+        self.assertIn('"publication_year"', sql.split("FROM")[0])
+
+        with patch.object(BookListView, "fast_read", False):
+            response = self.client.get(reverse("book-list"), {"fields": "id", "page_size": 1})
+            self.assertEqual(response.json()["results"], [{"id": self.book.pk}])
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(
+                    reverse("book-list"),
+                    {"fields": "id,author", "page_size": 1, "ordering": "-publication_year"},
+                )
+            # One query: the ordering column is loaded, not fetched per row
+            self.assertEqual(len(queries), 1)
+            self.assertNotIn('"title"', queries[0]["sql"].split("FROM")[0])
+
+    def test_book_detail_fields(self):
+        url = reverse("book-detail", kwargs={"pk": self.book.pk})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {"fields": "id,title"})
+        self.assertEqual(response.json(), {"id": self.book.pk, "title": "1984"})
+        self.assertNotIn('"publication_year"', queries[-1]["sql"])
+
+    def test_authors_without_expand_skip_books(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("author-list"))
+        self.assertEqual(response.json()["results"], [{"id": self.author.pk, "name": "George Orwell"}])
+
+    def test_expand_and_nested_fields(self):
+        response = self.client.get(
+            reverse("author-list"), {"expand": "books", "fields": "name,books.title"}
+        )
+        self.assertEqual(
+            response.json()["results"],
+            [{"name": "George Orwell", "books": [{"title": "1984"}, {"title": "Animal Farm"}]}],
+        )
+        # Naming an expandable field in ?fields= expands it too
+        response = self.client.get(
+            reverse("author-detail", kwargs={"pk": self.author.pk}), {"fields": "books"}
+        )
+        self.assertEqual(len(response.json()["books"]), 2)
+
+
+class ChangeFeedTests(CacheClearingTestCase):
+    """
+    Tests for the change log and GET /api/changes/.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username="syncjob", password="pw")
+        self.author = Author.objects.create(name="George Orwell")
+        self.book = Book.objects.create(title="1984", publication_year=1949, author=self.author)
+        self.url = reverse("change-feed")
+        self.start = Change.objects.latest("pk").pk
+
+    def changes(self, since=None, **params):
+        params.setdefault("since", self.start if since is None else since)
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def summary(self, data):
+        return [(change["type"], change["op"], change["id"]) for change in data["changes"]]
+
+    def test_saves_and_deletes_are_logged(self):
+        data = self.changes(since=0)
+        self.assertEqual(
+            self.summary(data),
+            [("author", "upsert", self.author.pk), ("book", "upsert", self.book.pk)],
+        )
+        self.assertEqual(data["changes"][1]["data"]["title"], "1984")
+        self.assertNotIn("books", data["changes"][0]["data"])
+        self.assertEqual(data["next"], self.start)
+        self.assertFalse(data["more"])
+
+        book_id = self.book.pk
+        self.book.delete()
+        self.assertEqual(self.summary(self.changes()), [("book", "delete", book_id)])
+
+    def test_cascaded_deletes_are_logged(self):
+        book_id, author_id = self.book.pk, self.author.pk
+        self.author.delete()
+        self.assertEqual(
+            self.summary(self.changes()),
+            [("book", "delete", book_id), ("author", "delete", author_id)],
+        )
+
+    def test_batch_keeps_latest_change_per_object(self):
+        self.book.title = "Nineteen Eighty-Four"
+        self.book.save()
+        other = Book.objects.create(title="Animal Farm", publication_year=1945, author=self.author)
+        self.book.title = "1984 (again)"
+        self.book.save()
+        other_id = other.pk
+        other.delete()
+
+        data = self.changes()
+        self.assertEqual(
+            self.summary(data),
+            [("book", "upsert", self.book.pk), ("book", "delete", other_id)],
+        )
+        self.assertEqual(data["changes"][0]["data"]["title"], "1984 (again)")
+        self.assertEqual(data["next"], Change.objects.latest("pk").pk)
+
+    def test_upsert_of_deleted_object_is_a_tombstone(self):
+        self.book.save()
+        book_id = self.book.pk
+        self.book.delete()
+        data = self.changes(limit=1)
+        self.assertEqual(self.summary(data), [("book", "delete", book_id)])
+        self.assertNotIn("data", data["changes"][0])
+        self.assertTrue(data["more"])
+
+    def test_batches_follow_next(self):
+        for year in range(1950, 1955):
+            Book.objects.create(title=f"Book {year}", publication_year=year, author=self.author)
+        seen, since = [], self.start
+        while True:
+            with self.assertNumQueries(2):  # changes + the books they touch
+                data = self.changes(since=since, limit=2)
+            seen += [change["data"]["title"] for change in data["changes"]]
+            since = data["next"]
+            if not data["more"]:
+                break
+        self.assertEqual(seen, [f"Book {year}" for year in range(1950, 1955)])
+        self.assertEqual(self.changes(since=since)["changes"], [])
+
+    def test_bulk_writes_are_logged(self):
+        self.client.force_authenticate(self.user)
+        self.client.post(
+            reverse("book-batch"),
+            [
+                {"op": "create", "data": {"title": "Homage to Catalonia", "publication_year": 1938, "author": self.author.pk}},
+                {"op": "update", "id": self.book.pk, "data": {"title": "Nineteen Eighty-Four"}},
+            ],
+            format="json",
+        )
+        self.client.post(
+            reverse("book-bulk-import") + "?create_authors=1",
+            "title,publication_year,author\nDune,1965,Frank Herbert\n",
+            content_type="text/csv",
+        )
+        summary = self.summary(self.changes())
+        self.assertEqual(
+            [(type_, op) for type_, op, _ in summary],
+            [("book", "upsert")] * 2 + [("author", "upsert"), ("book", "upsert")],
+        )
+        self.assertIn(("book", "upsert", self.book.pk), summary)
+
+    @override_settings(API_CHANGES_SAFETY_LAG=60)
+    def test_recent_changes_are_held_back(self):
+        first = Book.objects.create(title="Animal Farm", publication_year=1945, author=self.author)
+        Book.objects.create(title="Burmese Days", publication_year=1934, author=self.author)
+        data = self.changes()
+        self.assertEqual((data["changes"], data["next"], data["more"]), ([], self.start, False))
+        self.assertFalse(has_changes(self.start))
+
+        # Once the first is old enough, the batch stops before the second
+        change = Change.objects.filter(pk__gt=self.start).earliest("pk")
+        Change.objects.filter(pk=change.pk).update(created_at=timezone.now() - timedelta(minutes=2))
+        data = self.changes()
+        self.assertEqual(self.summary(data), [("book", "upsert", first.pk)])
+        self.assertEqual((data["next"], data["more"]), (change.pk, False))
+        self.assertTrue(has_changes(self.start))
+
+    def test_invalid_parameters(self):
+        for params in ({"since": "x"}, {"limit": "x"}, {"wait": "x"}, {"wait": "nan"}, {"wait": "inf"}):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn(next(iter(params)), response.data)
+
+    def test_long_poll_times_out_empty(self):
+        started = time.monotonic()
+        data = self.changes(wait="0.2")
+        self.assertGreaterEqual(time.monotonic() - started, 0.2)
+        self.assertEqual(data["changes"], [])
+        self.assertEqual(data["next"], self.start)
+
+    def test_long_poll_returns_at_once_when_changes_exist(self):
+        self.book.save()
+        started = time.monotonic()
+        data = self.changes(wait="10")
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(len(data["changes"]), 1)
+
+    @override_settings(API_CHANGES_MAX_WAITERS=0)
+    def test_long_poll_does_not_wait_when_waiters_are_full(self):
+        started = time.monotonic()
+        data = self.changes(wait="5")
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(data["changes"], [])
+
+    @override_settings(API_CHANGES_POLL_INTERVAL=10)
+    def test_long_poll_wakes_on_commit_in_process(self):
+        # The first check finds nothing; a commit in this process then
+        # wakes the waiter long before the poll interval
+        with patch("api.changes.has_changes", side_effect=[False, True]):
+            threading.Timer(0.1, notify_changes).start()
+            started = time.monotonic()
+            self.assertTrue(wait_for_changes(self.start, timeout=5))
+        self.assertLess(time.monotonic() - started, 2)
+
+
+class AsyncBookURLConf:
+    """
+    The project URLconf with the async Book views, as with API_ASYNC_VIEWS on.
+    """
+    urlpatterns = [
+        path("api/books/", AsyncBookListView.as_view(), name="book-list"),
+        path("api/books/<int:pk>/", AsyncBookDetailView.as_view(), name="book-detail"),
+        path("api/", include("api.urls")),
+    ]
+
+
+class AsyncBookViewTests(CacheClearingTestCase):
+    """
+    The async Book views must answer exactly like the sync ones, reading
+    the database with the async ORM (a synchronous query from the event
+    loop raises SynchronousOnlyOperation).
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username="reader", password="pw")
+        author = Author.objects.create(name="George Orwell")
+        other = Author.objects.create(name="Aldous Huxley")
+        for i in range(12):
+            Book.objects.create(
+                title=f"Novel {i:02d}", publication_year=1940 + i % 3, author=author if i % 2 else other
+            )
+        self.book = Book.objects.create(title="1984", publication_year=1949, author=author)
+        self.requests = [
+            (reverse("book-list"), {}),
+            (reverse("book-list"), {"ordering": "-publication_year", "page_size": 5}),
+            (reverse("book-list"), {"search": "orwell", "fields": "id,title"}),
+            (reverse("book-list"), {"publication_year": 1941}),
+            (reverse("book-list"), {"limit": 5, "offset": 5}),
+            (reverse("book-list"), {"stream": 1}),
+            (reverse("book-detail", kwargs={"pk": self.book.pk}), {}),
+            (reverse("book-detail", kwargs={"pk": self.book.pk}), {"fields": "title"}),
+            (reverse("book-detail", kwargs={"pk": 999}), {}),
+        ]
+
+    def get_all(self):
+        responses = []
+        for url, params in self.requests:
+            cache.clear()
+            responses.append(self.client.get(url, params, HTTP_ACCEPT="application/json"))
+        return responses
+
+    def test_same_responses_as_sync_views(self):
+        expected = self.get_all()
+        with override_settings(ROOT_URLCONF=AsyncBookURLConf):
+            responses = self.get_all()
+        for (url, params), sync, response in zip(self.requests, expected, responses):
+            with self.subTest(url=url, params=params):
+                self.assertEqual(response.status_code, sync.status_code)
+                self.assertEqual(b"".join(response), b"".join(sync))
+
+    @override_settings(ROOT_URLCONF=AsyncBookURLConf)
+    def test_cursor_pages(self):
+        ids = []
+        response = self.client.get(reverse("book-list"), {"page_size": 5})
+        while True:
+            ids.extend(row["id"] for row in response.data["results"])
+            if not response.data["next"]:
+                break
+            with self.assertNumQueries(1):
+                response = self.client.get(response.data["next"])
+        self.assertEqual(len(ids), 13)
+        self.assertEqual(len(set(ids)), 13)
+
+        response = self.client.get(reverse("book-list"), {"cursor": "bogus"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(ROOT_URLCONF=AsyncBookURLConf)
+    def test_detail_and_cache_hits(self):
+        url = reverse("book-detail", kwargs={"pk": self.book.pk})
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(json.loads(response.content)["title"], "1984")
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response["X-Cache"], "HIT")
+
+    @override_settings(ROOT_URLCONF=AsyncBookURLConf)
+    def test_authenticated_requests(self):
+        self.client.login(username="reader", password="pw")
+        self.assertEqual(self.client.get(reverse("book-list")).status_code, status.HTTP_200_OK)
+        self.client.logout()
+
+        # Basic auth verifies the password with the database, in a thread
+        self.client.credentials(HTTP_AUTHORIZATION="Basic cmVhZGVyOnB3")
+        self.assertEqual(self.client.get(reverse("book-list")).status_code, status.HTTP_200_OK)
+        self.client.credentials(HTTP_AUTHORIZATION="Basic cmVhZGVyOm5vcGU=")
+        self.assertEqual(self.client.get(reverse("book-list")).status_code, status.HTTP_403_FORBIDDEN)
+
+    @override_settings(
+        ROOT_URLCONF=AsyncBookURLConf,
+        API_RESPONSE_CACHE_TIMEOUT=0,
+        API_RESPONSE_CACHE_STALE_WHILE_REVALIDATE=30,
+    )
+    def test_stale_while_revalidate(self):
+        url = reverse("book-detail", kwargs={"pk": self.book.pk})
+        self.client.get(url)
+        Book.objects.filter(pk=self.book.pk).update(title="Changed")
+
+        # Only api.cache's threads: the test client runs async views in one
+        with patch("api.cache.threading") as threading_module:
+            response = self.client.get(url)
+            self.assertEqual(response["X-Cache"], "STALE")
+            # The refresh calls the async view from a plain thread
+            threading_module.Thread.call_args.kwargs["target"]()
+            response = self.client.get(url)
+        self.assertEqual(json.loads(response.content)["title"], "Changed")
@@ -1,18 +1,40 @@
+from django.conf import settings
 from django.urls import path
 from .views import (
+    AsyncBookDetailView,
+    AsyncBookListView,
     BookListView,
     BookDetailView,
     BookCreateView,
     BookUpdateView,
     BookDeleteView,
+    BookBulkImportView,
+    BookBatchView,
+    AuthorListView,
+    AuthorDetailView,
+    ChangeFeedView,
 )
+# Async versions of the Book read views, for ASGI deployments (see
+# API_ASYNC_VIEWS in settings.py)
+if getattr(settings, "API_ASYNC_VIEWS", False):
+    book_list = AsyncBookListView.as_view()
+    book_detail = AsyncBookDetailView.as_view()
+else:
+    book_list = BookListView.as_view()
+    book_detail = BookDetailView.as_view()
 
 urlpatterns = [
     # List all books
-    path("books/", BookListView.as_view(), name="book-list"),
+    path("books/", book_list, name="book-list"),
 
     # Retrieve a single book by primary key
-    path("books/<int:pk>/", BookDetailView.as_view(), name="book-detail"),
+    path("books/<int:pk>/", book_detail, name="book-detail"),
+
+    # Bulk import books from CSV / JSONL
+    path("books/bulk/", BookBulkImportView.as_view(), name="book-bulk-import"),
+
+    # Create / update / delete many books in one transaction
+    path("books/batch/", BookBatchView.as_view(), name="book-batch"),
 
     # Create a new book
     path("books/create/", BookCreateView.as_view(), name="book-create"),
@@ -24,5 +46,11 @@ urlpatterns = [
     # Delete an existing book
     # NOTE: The checker expects the substring "books/delete"
     path("books/delete/<int:pk>/", BookDeleteView.as_view(), name="book-delete"),
-]
 
+    # Authors with their nested books
+    path("authors/", AuthorListView.as_view(), name="author-list"),
+    path("authors/<int:pk>/", AuthorDetailView.as_view(), name="author-detail"),
+
+    # Incremental change feed (delta sync) for books and authors
+    path("changes/", ChangeFeedView.as_view(), name="change-feed"),
+]
@@ -1,12 +1,29 @@
-from rest_framework import generics, filters
+import math
+
+from rest_framework import generics, filters, status
 from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticated
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from django_filters import rest_framework  # used for DjangoFilterBackend
 
-from .models import Book
-from .serializers import BookSerializer
+from .async_views import AsyncReadMixin
+from .batch import BookBatch
+from .bulk import READERS, BookImporter, as_text, guess_format
+from .cache import CachedResponseMixin
+from .changes import DEFAULT_LIMIT, MAX_LIMIT, get_max_wait, read_changes, wait_for_changes
+from .fast_serializers import FastReadMixin
+from .models import Author, Book
+from .prefetch import SerializerPrefetchMixin
+from .search import BookSearchFilter
+from .serializers import AuthorSerializer, BookSerializer
+from .sparse import SparseFieldsMixin
+from .streaming import NDJSONRenderer, StreamingListMixin
 
 
-class BookListView(generics.ListAPIView):
+class BookListView(
+    CachedResponseMixin, SparseFieldsMixin, FastReadMixin, StreamingListMixin, generics.ListAPIView
+):
     """
     ListView for the Book model.
 
@@ -15,19 +32,30 @@ class BookListView(generics.ListAPIView):
     This view supports:
     - Filtering by title, author, and publication_year
       (e.g. ?title=Foo&publication_year=2020&author__name=John)
-    - Searching by title and author name
+    - Searching by title and author name, matching anywhere in a word
       (e.g. ?search=novel)
     - Ordering by title and publication_year
       (e.g. ?ordering=title or ?ordering=-publication_year)
+    - Cursor pagination that follows the active ordering
+      (?cursor=, ?page_size=; or ?limit=&offset= for random access)
+    - Streaming very large lists without building them in memory
+      (Accept: application/x-ndjson for NDJSON, or ?stream=1 for a JSON array)
+    - Sparse fieldsets (e.g. ?fields=id,title; see api.sparse)
+    - Response caching until the next Book write (see api.cache)
+
+    Rows are read with values_list() and serialized by a FastReadSerializer
+    compiled from BookSerializer (same output, no model instances); set
+    fast_read = False to use BookSerializer directly.
     """
     queryset = Book.objects.all()
     serializer_class = BookSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    renderer_classes = [JSONRenderer, BrowsableAPIRenderer, NDJSONRenderer]
 
     # Enable filtering, searching, and ordering
     filter_backends = [
         rest_framework.DjangoFilterBackend,  # filtering by fields
-        filters.SearchFilter,                # text search
+        BookSearchFilter,                    # text search (a filters.SearchFilter on the substring index)
         filters.OrderingFilter,              # ordering (checker wants this exact text)
     ]
 
@@ -44,17 +72,51 @@ class BookListView(generics.ListAPIView):
     ordering = ["title"]
 
 
-class BookDetailView(generics.RetrieveAPIView):
+class BookDetailView(CachedResponseMixin, SparseFieldsMixin, generics.RetrieveAPIView):
     """
     DetailView for a single Book.
 
     - GET /api/books/<pk>/ -> return details for a single book.
+      ?fields=id,title returns (and loads) only those fields.
+
+    Responses are cached until the next Book write (see api.cache).
     """
     queryset = Book.objects.all()
     serializer_class = BookSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
 
+class AsyncBookListView(AsyncReadMixin, BookListView):
+    """
+    BookListView as an async view (see api.async_views), used instead of it
+    when settings.API_ASYNC_VIEWS is on. Same query parameters and output,
+    without the browsable API.
+    """
+    renderer_classes = [JSONRenderer, NDJSONRenderer]
+    # The substring index counts matching rows to plan the search query
+    threaded_filter_params = [BookSearchFilter.search_param]
+
+    async def get(self, request, *args, **kwargs):
+        response = self.get_cached_response(request, args, kwargs)
+        if response is None:
+            response = await self.alist(request, *args, **kwargs)
+        return response
+
+
+class AsyncBookDetailView(AsyncReadMixin, BookDetailView):
+    """
+    BookDetailView as an async view, used instead of it when
+    settings.API_ASYNC_VIEWS is on.
+    """
+    renderer_classes = [JSONRenderer]
+
+    async def get(self, request, *args, **kwargs):
+        response = self.get_cached_response(request, args, kwargs)
+        if response is None:
+            response = await self.aretrieve(request, *args, **kwargs)
+        return response
+
+
 class BookCreateView(generics.CreateAPIView):
     """
     CreateView for the Book model.
@@ -71,6 +133,9 @@ class BookCreateView(generics.CreateAPIView):
     def perform_create(self, serializer):
         """
         Hook to customize creation logic.
+
+        Saving sends post_save, which drops cached Book responses
+        (api.signals).
         """
         serializer.save()
 
@@ -91,6 +156,9 @@ class BookUpdateView(generics.UpdateAPIView):
     def perform_update(self, serializer):
         """
         Hook to customize update logic.
+
+        Saving sends post_save, which drops cached Book responses
+        (api.signals).
         """
         serializer.save()
 
@@ -108,3 +176,158 @@ class BookDeleteView(generics.DestroyAPIView):
     serializer_class = BookSerializer
     permission_classes = [IsAuthenticated]
 
+    def perform_destroy(self, instance):
+        """
+        Delete the book; post_delete drops cached Book responses
+        (api.signals).
+        """
+        instance.delete()
+
+
+
+class AuthorListView(SparseFieldsMixin, SerializerPrefetchMixin, generics.ListAPIView):
+    """
+    ListView for the Author model.
+
+    - GET /api/authors/ -> return all authors (id and name).
+    - GET /api/authors/?expand=books -> include each author's nested books.
+    - ?fields= trims the output, e.g. ?fields=name or
+      ?expand=books&fields=name,books.title (see api.sparse).
+
+    Expanded books are prefetched in one extra query (see
+    SerializerPrefetchMixin), so the list costs two queries in total no
+    matter how many authors it returns; without ?expand=books it costs one.
+    """
+    queryset = Author.objects.order_by("id")
+    serializer_class = AuthorSerializer
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+
+class AuthorDetailView(SparseFieldsMixin, SerializerPrefetchMixin, generics.RetrieveAPIView):
+    """
+    DetailView for a single Author.
+
+    - GET /api/authors/<pk>/ -> return one author.
+      ?expand=books includes their nested books; ?fields= as for the list.
+    """
+    queryset = Author.objects.all()
+    serializer_class = AuthorSerializer
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+
+class BookBulkImportView(APIView):
+    """
+    Bulk import for the Book model.
+
+    - POST /api/books/bulk/ -> import many books from CSV or JSONL.
+
+    The body is either a multipart upload in the "file" field, or the raw
+    data with Content-Type text/csv or application/x-ndjson. Each row has
+    title, publication_year and author (the author's name).
+
+    Query parameters:
+    - chunk_size: rows per bulk insert (default 1000, max 10000)
+    - create_authors=1: create unknown authors instead of rejecting rows
+
+    Rows are streamed and inserted chunk by chunk; invalid rows are reported
+    (with their 1-based row number) without aborting the rest of the load.
+
+    Permissions:
+    - Only authenticated users can import books.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        upload = request.FILES.get("file") if request.content_type.startswith("multipart/") else None
+        if upload is not None:
+            stream, input_format = upload, guess_format(upload.name, upload.content_type)
+        else:
+            stream, input_format = request.stream, guess_format(content_type=request.content_type)
+
+        if input_format is None:
+            return Response(
+                {"detail": "Upload a .csv or .jsonl file, or send text/csv or application/x-ndjson."},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            )
+        if stream is None:
+            return Response({"detail": "No data provided."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            chunk_size = min(max(int(request.query_params.get("chunk_size", 1000)), 1), 10000)
+        except ValueError:
+            return Response({"chunk_size": ["A valid integer is required."]}, status=status.HTTP_400_BAD_REQUEST)
+
+        importer = BookImporter(
+            chunk_size=chunk_size,
+            create_authors=request.query_params.get("create_authors") in ("1", "true"),
+        )
+        report = importer.run(READERS[input_format](as_text(stream)))
+        return Response(report, status=status.HTTP_200_OK)
+
+
+class BookBatchView(APIView):
+    """
+    Batch writes for the Book model.
+
+    - POST /api/books/batch/ -> create, update and delete many books at once.
+
+    The body is a list of operations ({"op": "create", "data": {...}},
+    {"op": "update", "id": 1, "data": {...}}, {"op": "delete", "id": 2}),
+    at most api.batch.MAX_OPERATIONS. Updates are partial.
+
+    All operations are validated first; if any is invalid nothing is written
+    and the response is 400 with {"errors": {index: errors}}. Otherwise they
+    run in one transaction and the response is 200 with one result per
+    operation, in order.
+
+    Permissions:
+    - Only authenticated users can write books.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        batch = BookBatch(request.data, context={"request": request})
+        errors = batch.validate()
+        if errors:
+            return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"results": batch.apply()}, status=status.HTTP_200_OK)
+
+
+class ChangeFeedView(APIView):
+    """
+    Incremental change feed for Books and Authors (see api.changes).
+
+    - GET /api/changes/?since=<seq> -> the changes after `seq`, batched
+
+    Query parameters:
+    - since: last sequence number seen (default 0: from the beginning)
+    - limit: changes per batch (default 100, max 1000)
+    - wait: seconds to hold an empty response open for new changes
+      (long polling; at most API_CHANGES_MAX_WAIT)
+
+    Permissions:
+    - Read-only, open to everyone like the other read endpoints.
+    """
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+    def get(self, request):
+        params = request.query_params
+        try:
+            since = max(int(params.get("since", 0)), 0)
+        except ValueError:
+            return Response({"since": ["A valid integer is required."]}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(max(int(params.get("limit", DEFAULT_LIMIT)), 1), MAX_LIMIT)
+        except ValueError:
+            return Response({"limit": ["A valid integer is required."]}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            wait = float(params.get("wait", 0))
+        except ValueError:
+            wait = math.nan
+        if not math.isfinite(wait):
+            return Response({"wait": ["A valid number is required."]}, status=status.HTTP_400_BAD_REQUEST)
+        wait = min(max(wait, 0), get_max_wait())
+
+        if wait:
+            wait_for_changes(since, wait)
+        return Response(read_changes(since, limit), status=status.HTTP_200_OK)
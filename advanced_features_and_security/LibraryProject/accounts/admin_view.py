@@ -1,10 +1,2 @@
-from django.shortcuts import render
-from django.contrib.auth.decorators import user_passes_test
-
-def is_admin(user):
-    return user.is_authenticated and user.userprofile.role == "Admin"
-
-@user_passes_test(is_admin)
-def admin_view(request):
-    return render(request, "accounts/admin_view.html")
-
+# Kept for older imports; the view lives in views.py
+from .views import is_admin, admin_view  # noqa: F401
@@ -1,10 +1,2 @@
-from django.shortcuts import render
-from django.contrib.auth.decorators import user_passes_test
-
-def is_member(user):
-    return user.is_authenticated and user.userprofile.role == "Member"
-
-@user_passes_test(is_member)
-def member_view(request):
-     return render(request, "accounts/member_view.html")
-
+# Kept for older imports; the view lives in views.py
+from .views import is_member, member_view  # noqa: F401
@@ -41,6 +41,18 @@ class CustomUser(AbstractUser):
 # USER PROFILE WITH ROLE (Admin, Librarian, Member)
 # --------------------------------------------------
 
+class UserProfileQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        # update() (and bulk_update(), which uses it) sends no signals, so
+        # drop the cached roles here (see roles.py)
+        from .roles import invalidate_roles
+
+        user_ids = list(self.values_list("user_id", flat=True))
+        rows = super().update(**kwargs)
+        invalidate_roles(user_ids)
+        return rows
+
+
 class UserProfile(models.Model):
     ROLE_CHOICES = [
         ("Admin", "Admin"),
@@ -51,6 +63,8 @@ class UserProfile(models.Model):
     user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default="Member")
 
+    objects = UserProfileQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.user.username} - {self.role}"
 
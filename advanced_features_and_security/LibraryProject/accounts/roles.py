@@ -0,0 +1,114 @@
+"""
+Cached role lookups for the role-based views.
+
+A user's role lives on their UserProfile, so checking it used to cost a
+query on every request. get_role() keeps each user's role in Django's cache
+(for at most ACCOUNTS_ROLE_CACHE_TTL seconds) and drops it once a change to
+their profile commits: saves and deletes through signals (signals.py),
+QuerySet.update() and bulk_update() through UserProfileQuerySet. Only raw
+SQL goes unnoticed until the timeout.
+
+The cache is the CACHES["default"] backend. With a shared one (Redis,
+Memcached) a demoted user loses access in every process at once; the
+default local-memory cache only invalidates the process that made the
+change, and the others keep the old role until the timeout.
+
+RoleMiddleware sets request.role (the role name, or None for anonymous
+users and users without a profile), computed at most once per request.
+role_required() protects a view with it.
+"""
+from functools import partial, wraps
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth import REDIRECT_FIELD_NAME
+from django.contrib.auth.views import redirect_to_login
+from django.core.cache import cache
+from django.db import transaction
+from django.shortcuts import resolve_url
+from django.utils.functional import SimpleLazyObject
+
+from .models import UserProfile
+
+
+def get_role_cache_ttl():
+    return getattr(settings, "ACCOUNTS_ROLE_CACHE_TTL", 60)
+
+
+def role_cache_key(user_id):
+    return f"accounts:role:{user_id}"
+
+
+def get_role(user):
+    """
+    Return the role name of `user`, or None if they are anonymous or have no
+    profile.
+    """
+    if not user.is_authenticated:
+        return None
+    key = role_cache_key(user.pk)
+    # Cached as a 1-tuple so that "no profile" (None) is cached too
+    cached = cache.get(key)
+    if cached is not None:
+        return cached[0]
+    role = UserProfile.objects.filter(user_id=user.pk).values_list("role", flat=True).first()
+    ttl = get_role_cache_ttl()
+    if ttl > 0:
+        cache.set(key, (role,), ttl)
+    return role
+
+
+def invalidate_roles(user_ids):
+    """
+    Drop the cached roles of `user_ids` once the current transaction
+    commits. Dropping them earlier would let a concurrent request cache the
+    old role again before the change is visible.
+    """
+    keys = [role_cache_key(user_id) for user_id in user_ids]
+    if keys:
+        transaction.on_commit(partial(cache.delete_many, keys))
+
+
+class RoleMiddleware:
+    """
+    Set request.role, looked up on first use. Must come after
+    AuthenticationMiddleware.
+
+    request.role is lazy, like request.user: compare it with == (it is
+    never `is None`).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.role = SimpleLazyObject(lambda: get_role(request.user))
+        return self.get_response(request)
+
+
+def role_required(role, login_url=None, redirect_field_name=REDIRECT_FIELD_NAME):
+    """
+    Decorator for views that only users with `role` may see. Others are
+    redirected to the login page, as with user_passes_test().
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            current = request.role if hasattr(request, "role") else get_role(request.user)
+            if current == role:
+                return view_func(request, *args, **kwargs)
+
+            path = request.build_absolute_uri()
+            resolved_login_url = resolve_url(login_url or settings.LOGIN_URL)
+            # Same scheme and host as the login page: "next" can be a path
+            login_scheme, login_netloc = urlsplit(resolved_login_url)[:2]
+            current_scheme, current_netloc = urlsplit(path)[:2]
+            if (not login_scheme or login_scheme == current_scheme) and (
+                not login_netloc or login_netloc == current_netloc
+            ):
+                path = request.get_full_path()
+            return redirect_to_login(path, resolved_login_url, redirect_field_name)
+
+        return wrapper
+
+    return decorator
@@ -1,3 +1,109 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
 
-# Create your tests here.
+from .models import UserProfile
+from .roles import get_role
+
+
+class RoleViewTests(TestCase):
+    VIEWS = {"Admin": "admin_view", "Librarian": "librarian_view", "Member": "member_view"}
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def make_user(self, role):
+        user = get_user_model().objects.create_user(username=role.lower(), password="pass")
+        with self.captureOnCommitCallbacks(execute=True):
+            UserProfile.objects.filter(user=user).update(role=role)
+        return user
+
+    def get(self, url_name):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(url_name))
+        role_queries = [q for q in queries if "accounts_userprofile" in q["sql"]]
+        return response, len(queries), len(role_queries)
+
+    def test_role_views_look_up_the_role_once(self):
+        for role, url_name in self.VIEWS.items():
+            with self.subTest(role=role):
+                self.client.force_login(self.make_user(role))
+
+                response, total, role_queries = self.get(url_name)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(role_queries, 1)
+
+                # Cached: only the session and user queries are left
+                response, total, role_queries = self.get(url_name)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(role_queries, 0)
+                self.assertEqual(total, 2)
+
+    def test_other_roles_are_redirected_to_login(self):
+        self.client.force_login(self.make_user("Member"))
+        for url_name in ("admin_view", "librarian_view"):
+            with self.subTest(url_name=url_name):
+                response, total, role_queries = self.get(url_name)
+                self.assertEqual(response.status_code, 302)
+                self.assertIn("?next=" + reverse(url_name), response["Location"])
+
+    def test_anonymous_users_cost_no_queries(self):
+        for url_name in self.VIEWS.values():
+            with self.subTest(url_name=url_name):
+                response, total, role_queries = self.get(url_name)
+                self.assertEqual(response.status_code, 302)
+                self.assertEqual(total, 0)
+
+    def test_role_change_invalidates_the_cache_on_commit(self):
+        user = self.make_user("Admin")
+        self.client.force_login(user)
+        self.assertEqual(self.get("admin_view")[0].status_code, 200)
+
+        profile = UserProfile.objects.get(user=user)
+        profile.role = "Member"
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            profile.save()
+            # Uncommitted: the old role may still be served
+            self.assertEqual(self.get("admin_view")[0].status_code, 200)
+        self.assertTrue(callbacks)
+
+        self.assertEqual(self.get("admin_view")[0].status_code, 302)
+        self.assertEqual(self.get("member_view")[0].status_code, 200)
+
+    def test_queryset_update_invalidates_the_cache(self):
+        user = self.make_user("Admin")
+        self.client.force_login(user)
+        self.assertEqual(self.get("admin_view")[0].status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            UserProfile.objects.filter(role="Admin").update(role="Member")
+        self.assertEqual(self.get("admin_view")[0].status_code, 302)
+
+    def test_bulk_update_invalidates_the_cache(self):
+        user = self.make_user("Librarian")
+        self.assertEqual(get_role(user), "Librarian")
+        profile = UserProfile.objects.get(user=user)
+        profile.role = "Member"
+        with self.captureOnCommitCallbacks(execute=True):
+            UserProfile.objects.bulk_update([profile], ["role"])
+        self.assertEqual(get_role(user), "Member")
+
+    def test_deleted_profile_has_no_role(self):
+        user = self.make_user("Admin")
+        self.assertEqual(get_role(user), "Admin")
+        with self.captureOnCommitCallbacks(execute=True):
+            UserProfile.objects.filter(user=user).delete()
+        with self.assertNumQueries(1):
+            self.assertIsNone(get_role(user))
+            self.assertIsNone(get_role(user))
+
+    @override_settings(ACCOUNTS_ROLE_CACHE_TTL=0)
+    def test_zero_ttl_disables_the_cache(self):
+        user = self.make_user("Member")
+        with self.assertNumQueries(2):
+            get_role(user)
+            get_role(user)
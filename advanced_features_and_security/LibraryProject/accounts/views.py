@@ -1,7 +1,8 @@
 from django.shortcuts import render, redirect
 from django.contrib.auth import login, logout
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
-from django.contrib.auth.decorators import user_passes_test
+
+from .roles import get_role, role_required
 
 
 # =======================================================
@@ -43,28 +44,30 @@ def logout_view(request):
 # =======================================================
 
 def is_admin(user):
-    return hasattr(user, "userprofile") and user.userprofile.role == "Admin"
+    return get_role(user) == "Admin"
 
 
 def is_librarian(user):
-    return hasattr(user, "userprofile") and user.userprofile.role == "Librarian"
+    return get_role(user) == "Librarian"
 
 
 def is_member(user):
-    return hasattr(user, "userprofile") and user.userprofile.role == "Member"
+    return get_role(user) == "Member"
+
 
+# request.role is set once per request by RoleMiddleware and its lookup is
+# cached per user, so these checks normally cost no queries.
 
-@user_passes_test(is_admin)
+@role_required("Admin")
 def admin_view(request):
     return render(request, 'accounts/admin_view.html')
 
 
-@user_passes_test(is_librarian)
+@role_required("Librarian")
 def librarian_view(request):
     return render(request, 'accounts/librarian_view.html')
 
 
-@user_passes_test(is_member)
+@role_required("Member")
 def member_view(request):
     return render(request, 'accounts/member_view.html')
-
@@ -42,6 +42,12 @@ INSTALLED_APPS = [
 
 AUTH_USER_MODEL = 'accounts.CustomUser'
 
+# User roles are cached in CACHES["default"] (see accounts/roles.py). The
+# default local-memory cache is per process: with several worker processes,
+# configure a shared backend (Redis, Memcached) so that a role change takes
+# effect everywhere at once instead of after this timeout.
+ACCOUNTS_ROLE_CACHE_TTL = 60  # seconds; 0 disables the cache
+
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
@@ -49,6 +55,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'LibraryProject.accounts.roles.RoleMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
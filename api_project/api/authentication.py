@@ -0,0 +1,247 @@
+"""
+Token and Basic authentication with lookup caches.
+
+DRF's TokenAuthentication runs `SELECT ... FROM authtoken_token INNER JOIN
+auth_user` on every request and builds a User from the whole row.
+CachingTokenAuthentication keeps the result in Django's cache
+(CACHES["default"]) for up to API_TOKEN_CACHE_TTL seconds, so a hit costs
+no query at all. Entries are keyed on a hash of the token key and dropped
+by signals (api/signals.py) once a change commits: a deleted or replaced
+token, or any save of its user except a login. With a shared backend
+(Redis, Memcached) that reaches every process at once; the default
+local-memory cache only invalidates the process that made the change, and
+the others keep serving the entry until the timeout. QuerySet.update() and
+raw SQL also go unnoticed until the timeout.
+
+CachingBasicAuthentication does something similar for BasicAuthentication,
+whose cost is the password hasher (PBKDF2) run on every request. Once a
+username/password pair has been verified, an HMAC of it is cached in
+process (at most API_BASIC_AUTH_CACHE_SIZE entries for
+API_BASIC_AUTH_CACHE_TTL seconds) and repeat requests with the same pair
+skip the hasher. Since that cache lives in each process, every hit is
+revalidated with one narrow primary-key read of the fields that decide
+authentication (STAMP_FIELDS: password hash, is_active, is_staff,
+is_superuser); if anything differs from the cached user, the full check
+runs. The HMAC key is random per process and nothing else about the
+password is kept, so the cache can only ever recognise the exact pair that
+was verified: any other password is a miss and goes through the full check.
+"""
+import copy
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.authentication import BasicAuthentication, TokenAuthentication
+
+
+# User fields whose change must end a cached authentication at once
+STAMP_FIELDS = ("password", "is_active", "is_staff", "is_superuser")
+
+
+def get_token_cache_ttl():
+    return getattr(settings, "API_TOKEN_CACHE_TTL", 60)
+
+
+def get_basic_auth_cache_size():
+    return getattr(settings, "API_BASIC_AUTH_CACHE_SIZE", 256)
+
+
+def get_basic_auth_cache_ttl():
+    return getattr(settings, "API_BASIC_AUTH_CACHE_TTL", 30)
+
+
+class TokenCache:
+    """
+    Token key -> (user, token) in Django's cache (see module docstring).
+    """
+    key_prefix = "api:token:"
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl
+        # Per process, for the tests and benchmark_token_auth
+        self.hits = 0
+        self.misses = 0
+
+    def get_ttl(self):
+        return get_token_cache_ttl() if self.ttl is None else self.ttl
+
+    def cache_key(self, key):
+        # Token keys are credentials: keep them out of the cache backend
+        return self.key_prefix + hashlib.sha256(key.encode()).hexdigest()
+
+    def get(self, key):
+        entry = cache.get(self.cache_key(key))
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def set(self, key, user, token):
+        ttl = self.get_ttl()
+        if ttl > 0:
+            cache.set(self.cache_key(key), (user, token), ttl)
+
+    def invalidate_keys(self, keys):
+        """
+        Drop the entries of `keys` once the current transaction commits.
+        Dropping them earlier would let a concurrent request cache the old
+        row again before the change is visible.
+        """
+        cache_keys = [self.cache_key(key) for key in keys]
+        if cache_keys:
+            transaction.on_commit(partial(cache.delete_many, cache_keys))
+
+    def reset_stats(self):
+        self.hits = self.misses = 0
+
+
+class BasicAuthCache:
+    """
+    Thread-safe LRU of credential HMAC -> (user, extra) with a TTL.
+    """
+
+    def __init__(self, max_size=None, ttl=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.keys_by_user = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[2] <= now:
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0], entry[1]
+
+    def get_ttl(self):
+        return get_basic_auth_cache_ttl() if self.ttl is None else self.ttl
+
+    def get_max_size(self):
+        return get_basic_auth_cache_size() if self.max_size is None else self.max_size
+
+    def set(self, key, user, token):
+        ttl = self.get_ttl()
+        max_size = self.get_max_size()
+        if ttl <= 0 or max_size <= 0:
+            return
+        with self.lock:
+            self._remove(key)
+            self.entries[key] = (user, token, time.monotonic() + ttl)
+            self.keys_by_user.setdefault(user.pk, set()).add(key)
+            while len(self.entries) > max_size:
+                self._remove(next(iter(self.entries)))
+
+    def _remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            keys = self.keys_by_user.get(entry[0].pk)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.keys_by_user[entry[0].pk]
+
+    def invalidate_key(self, key):
+        with self.lock:
+            self._remove(key)
+
+    def invalidate_user(self, user_id):
+        with self.lock:
+            for key in list(self.keys_by_user.get(user_id, ())):
+                self._remove(key)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.keys_by_user.clear()
+            self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+
+token_cache = TokenCache()
+basic_auth_cache = BasicAuthCache()
+
+# Random per process: digests are useless outside it and never reused
+# across restarts
+_CREDENTIAL_KEY = secrets.token_bytes(32)
+
+
+def user_stamp(user):
+    return tuple(getattr(user, field) for field in STAMP_FIELDS)
+
+
+def credential_digest(userid, password):
+    """
+    Keyed HMAC-SHA256 of a username/password pair.
+    """
+    message = f"{len(userid)}:{userid}:{password}".encode()
+    return hmac.new(_CREDENTIAL_KEY, message, hashlib.sha256).hexdigest()
+
+
+class CachingTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication that caches successful lookups in `token_cache`.
+
+    Failed lookups (unknown token, inactive user) are not cached, so they
+    raise the same errors as TokenAuthentication every time.
+    """
+    cache = token_cache
+
+    def authenticate_credentials(self, key):
+        cached = self.cache.get(key)
+        if cached is not None:
+            # A copy per request, so changes to request.user never leak
+            # into the cached instance
+            user, token = cached
+            return copy.copy(user), token
+
+        user, token = super().authenticate_credentials(key)
+        self.cache.set(key, user, token)
+        return copy.copy(user), token
+
+
+class CachingBasicAuthentication(BasicAuthentication):
+    """
+    BasicAuthentication that skips the password hasher for a
+    username/password pair it verified recently (see module docstring).
+
+    Failed attempts are never cached: each one runs the full check and
+    sends user_login_failed as usual. Hits are revalidated (see module
+    docstring).
+    """
+    cache = basic_auth_cache
+
+    def is_current(self, user):
+        users = get_user_model()._default_manager
+        return users.filter(pk=user.pk).values_list(*STAMP_FIELDS).first() == user_stamp(user)
+
+    def authenticate_credentials(self, userid, password, request=None):
+        digest = credential_digest(userid, password)
+        cached = self.cache.get(digest)
+        if cached is not None:
+            if self.is_current(cached[0]):
+                return copy.copy(cached[0]), None
+            self.cache.invalidate_key(digest)
+
+        user, auth = super().authenticate_credentials(userid, password, request)
+        self.cache.set(digest, user, None)
+        return copy.copy(user), auth
@@ -0,0 +1,205 @@
+"""
+Incremental change feed (delta sync) for Books.
+
+Signals (api.signals) append a Change row for every save and delete of a
+Book. Queryset.update() and raw SQL bypass the log.
+
+GET /api/changes/?since=<seq> returns the changes after `seq`, oldest
+first, in batches:
+
+    {
+        "changes": [
+            {"seq": 41, "type": "book", "op": "upsert", "id": 7, "data": {...}},
+            {"seq": 42, "type": "book", "op": "delete", "id": 3},
+        ],
+        "next": 42,
+        "more": false,
+    }
+
+Within a batch only the latest change of each book is sent: upserts carry
+the book's current data (loaded with one query) and an upsert of a book
+that no longer exists becomes a tombstone. Clients apply the batch, then
+ask again with since=<next>; "more" means another batch is already waiting.
+Unlike ?updated_since= on /api/books/, this also reports deletions.
+
+With ?wait=<seconds> an empty result is held open until a change arrives
+or the wait runs out (long polling). Waiters in the process that made the
+change wake up as soon as it commits; changes made by other processes are
+picked up by a cheap EXISTS query every API_CHANGES_POLL_INTERVAL seconds.
+A waiting request holds its worker thread for up to API_CHANGES_MAX_WAIT
+seconds (10 by default; keep it well below the server's worker timeout),
+so at most API_CHANGES_MAX_WAITERS requests per process wait at once;
+beyond that, requests get their (possibly empty) batch at once and clients
+simply poll again.
+
+Sequence numbers come from the table's auto-increment key. On databases
+that commit concurrent writers out of key order (not SQLite, which has a
+single writer) a row can become visible after a higher one has been read,
+and a client that already moved past it would never see it. The feed
+therefore holds back changes logged less than API_CHANGES_SAFETY_LAG
+seconds ago (5 by default, 0 on SQLite): a batch ends before the first
+change that recent. Transactions that take longer than the lag to commit
+can still be missed.
+
+advanced-api-project/api/changes.py is a copy of this module extended to
+Authors. The projects are deployed independently and share no package,
+so fixes must be made in both.
+"""
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Book, Change
+from .serializers import BookSerializer
+
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+MODELS = {
+    "book": (Book, BookSerializer),
+}
+MODEL_NAMES = {model: name for name, (model, _) in MODELS.items()}
+
+# Bumped (and waiters woken) whenever a transaction that logged changes
+# commits in this process
+_changed = threading.Condition()
+_version = 0
+_waiters = 0
+
+
+def get_max_wait():
+    return getattr(settings, "API_CHANGES_MAX_WAIT", 10)
+
+
+def get_poll_interval():
+    return getattr(settings, "API_CHANGES_POLL_INTERVAL", 1.0)
+
+
+def get_max_waiters():
+    return getattr(settings, "API_CHANGES_MAX_WAITERS", 8)
+
+
+def get_safety_lag():
+    lag = getattr(settings, "API_CHANGES_SAFETY_LAG", None)
+    if lag is None:
+        lag = 0 if connection.vendor == "sqlite" else 5
+    return lag
+
+
+def get_horizon():
+    """
+    Return the creation time of the newest change the feed may serve, or
+    None when every change may be served (see module docstring).
+    """
+    lag = get_safety_lag()
+    return timezone.now() - timedelta(seconds=lag) if lag else None
+
+
+def notify_changes():
+    global _version
+    with _changed:
+        _version += 1
+        _changed.notify_all()
+
+
+def record_changes(model, pks, op):
+    """
+    Append one `op` Change per primary key in `pks`.
+    """
+    name = MODEL_NAMES[model]
+    Change.objects.bulk_create([Change(model=name, object_id=pk, op=op) for pk in pks])
+    transaction.on_commit(notify_changes)
+
+
+def has_changes(since):
+    queryset = Change.objects.filter(pk__gt=since)
+    horizon = get_horizon()
+    if horizon is not None:
+        queryset = queryset.filter(created_at__lte=horizon)
+    return queryset.exists()
+
+
+def wait_for_changes(since, timeout):
+    """
+    Block until there are changes after `since` or `timeout` seconds have
+    passed. Returns whether there are. Does not block when
+    API_CHANGES_MAX_WAITERS requests are already waiting.
+    """
+    global _waiters
+    with _changed:
+        if _waiters >= get_max_waiters():
+            full = True
+        else:
+            full = False
+            _waiters += 1
+    if full:
+        return has_changes(since)
+
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            with _changed:
+                version = _version
+            if has_changes(since):
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            with _changed:
+                _changed.wait_for(lambda: _version != version, min(remaining, get_poll_interval()))
+    finally:
+        with _changed:
+            _waiters -= 1
+
+
+def read_changes(since, limit=DEFAULT_LIMIT):
+    """
+    Return the batch of changes after `since` (see module docstring).
+    """
+    rows = list(
+        Change.objects.filter(pk__gt=since)
+        .order_by("pk")
+        .values_list("pk", "model", "object_id", "op", "created_at")[: limit + 1]
+    )
+    horizon = get_horizon()
+    if horizon is not None:
+        # Stop before the first change that may still have lower sequence
+        # numbers committing around it
+        for position, row in enumerate(rows):
+            if row[4] > horizon:
+                rows = rows[:position]
+                break
+    more = len(rows) > limit
+    rows = rows[:limit]
+
+    # Latest change per object, in sequence order
+    latest = {}
+    for seq, name, object_id, op, _ in rows:
+        latest.pop((name, object_id), None)
+        latest[(name, object_id)] = (seq, op)
+
+    data = {}
+    for name, (model, serializer_class) in MODELS.items():
+        ids = [object_id for (type_, object_id), (_, op) in latest.items() if type_ == name and op == Change.UPSERT]
+        if ids:
+            items = serializer_class(model.objects.filter(pk__in=ids), many=True).data
+            data[name] = {item["id"]: item for item in items}
+
+    changes = []
+    for (name, object_id), (seq, op) in latest.items():
+        item = data.get(name, {}).get(object_id) if op == Change.UPSERT else None
+        if item is None:
+            changes.append({"seq": seq, "type": name, "op": Change.DELETE, "id": object_id})
+        else:
+            changes.append({"seq": seq, "type": name, "op": Change.UPSERT, "id": object_id, "data": item})
+
+    return {
+        "changes": changes,
+        "next": rows[-1][0] if rows else since,
+        "more": more,
+    }
@@ -0,0 +1,51 @@
+import time
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.authentication import CachingTokenAuthentication, token_cache
+from api.models import Book
+from api.views import BookViewSet
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure authenticated GET /api/books/ throughput with DRF's "
+        "TokenAuthentication and with CachingTokenAuthentication. Seeds data "
+        "inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--books", type=int, default=20)
+
+    def handle(self, *args, **options):
+        count = options["requests"]
+        with transaction.atomic():
+            user = User.objects.create_user("benchmark-token-user")
+            token = Token.objects.create(user=user)
+            Book.objects.bulk_create(
+                Book(title=f"Book {i}", author=f"Author {i}") for i in range(options["books"])
+            )
+            client = APIClient(HTTP_HOST="localhost")
+            client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+
+            self.stdout.write(f"{'authentication':<30}{'req/s':>10}{'ms/req':>10}")
+            for auth_class in (TokenAuthentication, CachingTokenAuthentication):
+                token_cache.reset_stats()
+                with mock.patch.object(BookViewSet, "authentication_classes", [auth_class]):
+                    client.get("/api/books/")  # warm up
+                    start = time.perf_counter()
+                    for _ in range(count):
+                        response = client.get("/api/books/")
+                    elapsed = time.perf_counter() - start
+                assert response.status_code == 200, response.status_code
+                self.stdout.write(
+                    f"{auth_class.__name__:<30}{count / elapsed:>10,.0f}{elapsed / count * 1000:>10.3f}"
+                )
+            transaction.set_rollback(True)
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:01
+
+from django.db import migrations, models
+
+
+def backfill_changes(apps, schema_editor):
+    # Existing books start the log as upserts, so a client syncing from
+    # since=0 receives the whole catalogue
+    Book = apps.get_model("api", "Book")
+    Change = apps.get_model("api", "Change")
+    Change.objects.bulk_create(
+        (
+            Change(model="book", object_id=pk, op="upsert")
+            for pk in Book.objects.order_by("pk").values_list("pk", flat=True).iterator()
+        ),
+        batch_size=5000,
+    )
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_book_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Change',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=16)),
+                ('object_id', models.BigIntegerField()),
+                ('op', models.CharField(choices=[('upsert', 'upsert'), ('delete', 'delete')], max_length=6)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.RunPython(backfill_changes, migrations.RunPython.noop),
+    ]
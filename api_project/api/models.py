@@ -4,7 +4,34 @@ from django.db import models
 class Book(models.Model):
     title = models.CharField(max_length=255)
     author = models.CharField(max_length=255)
+    # Set on every save(); drives ?updated_since= incremental sync.
+    # QuerySet.update() bypasses it, so set it explicitly there.
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # ?updated_since= filters and orders on (updated_at, id)
+            models.Index(fields=["updated_at", "id"], name="api_book_updated_idx"),
+        ]
 
     def __str__(self):
         return f"{self.title} by {self.author}"
 
+
+class Change(models.Model):
+    """
+    One entry of the append-only change log behind /api/changes/ (see
+    api.changes).
+
+    Every save or delete of a Book appends a row; the primary key is the
+    sequence number clients sync from. Only the book's id is stored: the
+    feed reads the current row when it serves an upsert.
+    """
+    UPSERT = "upsert"
+    DELETE = "delete"
+    OPS = [(UPSERT, "upsert"), (DELETE, "delete")]
+
+    model = models.CharField(max_length=16)
+    object_id = models.BigIntegerField()
+    op = models.CharField(max_length=6, choices=OPS)
+    created_at = models.DateTimeField(auto_now_add=True)
@@ -5,5 +5,5 @@ from .models import Book
 class BookSerializer(serializers.ModelSerializer):
     class Meta:
         model = Book
-        fields = ["id", "title", "author"]
-
+        fields = ["id", "title", "author", "updated_at"]
+        read_only_fields = ["updated_at"]
@@ -0,0 +1,43 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import basic_auth_cache, token_cache
+from .changes import record_changes
+from .models import Book, Change
+
+
+# -----------------------
+# AUTHENTICATION CACHE INVALIDATION
+# -----------------------
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def forget_token(sender, instance, **kwargs):
+    token_cache.invalidate_keys([instance.key])
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def forget_user_credentials(sender, instance, update_fields=None, **kwargs):
+    # Any save may deactivate the user, change their password or change
+    # what they may do; only a login (last_login alone) is harmless
+    if update_fields is not None and set(update_fields) <= {"last_login"}:
+        return
+    # A deleted user's token goes with them (and sends post_delete above)
+    if kwargs["signal"] is post_save:
+        token_cache.invalidate_keys(Token.objects.filter(user_id=instance.pk).values_list("key", flat=True))
+    basic_auth_cache.invalidate_user(instance.pk)
+
+
+# -----------------------
+# CHANGE LOG (api.changes)
+# -----------------------
+@receiver(post_save, sender=Book)
+def log_save(sender, instance, **kwargs):
+    record_changes(sender, [instance.pk], Change.UPSERT)
+
+
+@receiver(post_delete, sender=Book)
+def log_delete(sender, instance, **kwargs):
+    record_changes(sender, [instance.pk], Change.DELETE)
@@ -1,3 +1,470 @@
-from django.test import TestCase
+import base64
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from .authentication import (
+    BasicAuthCache,
+    CachingTokenAuthentication,
+    basic_auth_cache,
+    credential_digest,
+    token_cache,
+)
+from .changes import notify_changes, wait_for_changes
+from .models import Book, Change
+from .pagination import SyncCursorPagination
+from .views import MAX_IDS
+
+
+class BookResourceTests(TestCase):
+    """
+    Tests for the /api/books/ resource: routing, pagination, ?ids= and
+    ?updated_since=.
+    """
+
+    def setUp(self):
+        self.books = Book.objects.bulk_create(
+            Book(title=f"Book {i}", author=f"Author {i}") for i in range(5)
+        )
+        self.client = APIClient()
+
+    def titles(self, response):
+        return [book["title"] for book in response.data["results"]]
+
+    def test_list_is_paginated(self):
+        response = self.client.get("/api/books/", {"page_size": 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 5)
+        self.assertEqual(self.titles(response), ["Book 0", "Book 1"])
+        self.assertIsNotNone(response.data["next"])
+
+    def test_create_and_retrieve_share_one_resource(self):
+        user = User.objects.create_user("writer", password="pw")
+        self.client.force_authenticate(user)
+        response = self.client.post("/api/books/", {"title": "Dune", "author": "Frank Herbert"})
+        self.assertEqual(response.status_code, 201)
+        self.assertIsNotNone(response.data["updated_at"])
+        response = self.client.get(f"/api/books/{response.data['id']}/")
+        self.assertEqual(response.data["title"], "Dune")
+
+    def test_ids_in_one_query(self):
+        ids = [self.books[3].pk, self.books[1].pk, 999999]
+        with self.assertNumQueries(2):  # count + page
+            response = self.client.get("/api/books/", {"ids": ",".join(map(str, ids))})
+        self.assertEqual(self.titles(response), ["Book 1", "Book 3"])
+
+    def test_invalid_ids(self):
+        for value in ("1,x", ",".join(str(i) for i in range(1, MAX_IDS + 2)), "99999999999999999999999", "0"):
+            response = self.client.get("/api/books/", {"ids": value})
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("ids", response.data)
+
+    def test_updated_since(self):
+        base = timezone.now() - timedelta(hours=1)
+        for minutes, book in zip([40, 10, 30, 0, 20], self.books):
+            Book.objects.filter(pk=book.pk).update(updated_at=base + timedelta(minutes=minutes))
+        since = (base + timedelta(minutes=20)).isoformat()
+        response = self.client.get("/api/books/", {"updated_since": since})
+        self.assertEqual(self.titles(response), ["Book 4", "Book 2", "Book 0"])
+
+    def test_save_moves_book_into_sync_window(self):
+        since = timezone.now()
+        self.assertEqual(self.client.get("/api/books/", {"updated_since": since.isoformat()}).data["results"], [])
+        book = self.books[2]
+        book.title = "Changed"
+        book.save()
+        response = self.client.get("/api/books/", {"updated_since": since.isoformat()})
+        self.assertEqual(self.titles(response), ["Changed"])
+
+    def test_naive_updated_since_is_utc(self):
+        response = self.client.get("/api/books/", {"updated_since": "2000-01-01T00:00:00"})
+        self.assertEqual(len(response.data["results"]), 5)
+
+    def test_updated_since_pages_with_a_cursor(self):
+        base = timezone.now() - timedelta(hours=1)
+        for book in self.books:
+            # Ties on updated_at are broken by id
+            Book.objects.filter(pk=book.pk).update(updated_at=base)
+        params = {"updated_since": "2000-01-01T00:00:00", "page_size": 2}
+        response = self.client.get("/api/books/", params)
+        self.assertNotIn("count", response.data)
+        self.assertEqual(self.titles(response), ["Book 0", "Book 1"])
+
+        # A book saved mid-sync moves past the cursor instead of shifting
+        # the later pages
+        self.books[0].save()
+        seen = self.titles(response)
+        while response.data["next"]:
+            with self.assertNumQueries(1):
+                response = self.client.get(response.data["next"])
+            seen += self.titles(response)
+        self.assertEqual(seen, ["Book 0", "Book 1", "Book 2", "Book 3", "Book 4", "Book 0"])
+
+    def test_cursor_page_is_an_index_search(self):
+        response = self.client.get("/api/books/", {"updated_since": "2000-01-01T00:00:00", "page_size": 2})
+        # The cursor alone, without the updated_since bound of the view
+        request = Request(APIRequestFactory().get(response.data["next"]))
+        with CaptureQueriesContext(connection) as queries:
+            SyncCursorPagination().paginate_queryset(Book.objects.all(), request)
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + queries[-1]["sql"])
+            plan = [row[-1] for row in cursor.fetchall()]
+        self.assertEqual(plan, ["SEARCH api_book USING INDEX api_book_updated_idx (updated_at>?)"])
+        # Spelled out for planners that do not derive it from the OR
+        self.assertIn('"api_book"."updated_at" >=', queries[-1]["sql"])
+
+    def test_invalid_cursor(self):
+        response = self.client.get("/api/books/", {"updated_since": "2000-01-01T00:00:00", "cursor": "x"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_invalid_updated_since(self):
+        for value in ("yesterday", "2024-13-01T00:00:00"):
+            response = self.client.get("/api/books/", {"updated_since": value})
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("updated_since", response.data)
+
+
+class ChangeFeedTests(TestCase):
+    """
+    Tests for the change log and GET /api/changes/.
+    """
+
+    def setUp(self):
+        self.book = Book.objects.create(title="1984", author="George Orwell")
+        self.start = Change.objects.latest("pk").pk
+        self.client = APIClient()
+
+    def changes(self, since=None, **params):
+        params.setdefault("since", self.start if since is None else since)
+        response = self.client.get("/api/changes/", params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def summary(self, data):
+        return [(change["op"], change["id"]) for change in data["changes"]]
+
+    def test_saves_and_deletes_are_logged(self):
+        data = self.changes(since=0)
+        self.assertEqual(self.summary(data), [("upsert", self.book.pk)])
+        self.assertEqual(data["changes"][0]["data"]["title"], "1984")
+        self.assertEqual(data["next"], self.start)
+
+        book_id = self.book.pk
+        self.book.delete()
+        self.assertEqual(self.summary(self.changes()), [("delete", book_id)])
+
+    def test_batch_keeps_latest_change_per_book(self):
+        other = Book.objects.create(title="Animal Farm", author="George Orwell")
+        self.book.title = "Nineteen Eighty-Four"
+        self.book.save()
+        other_id = other.pk
+        other.delete()
+        data = self.changes()
+        self.assertEqual(self.summary(data), [("upsert", self.book.pk), ("delete", other_id)])
+        self.assertEqual(data["changes"][0]["data"]["title"], "Nineteen Eighty-Four")
+
+    def test_batches_follow_next(self):
+        for i in range(5):
+            Book.objects.create(title=f"Book {i}", author="Anon")
+        seen, since = [], self.start
+        while True:
+            with self.assertNumQueries(2):  # changes + the books they touch
+                data = self.changes(since=since, limit=2)
+            seen += [change["data"]["title"] for change in data["changes"]]
+            since = data["next"]
+            if not data["more"]:
+                break
+        self.assertEqual(seen, [f"Book {i}" for i in range(5)])
+
+    def test_upsert_of_deleted_book_is_a_tombstone(self):
+        self.book.save()
+        book_id = self.book.pk
+        self.book.delete()
+        data = self.changes(limit=1)
+        self.assertEqual(self.summary(data), [("delete", book_id)])
+        self.assertTrue(data["more"])
+
+    @override_settings(API_CHANGES_SAFETY_LAG=60)
+    def test_recent_changes_are_held_back(self):
+        first = Book.objects.create(title="Animal Farm", author="George Orwell")
+        Book.objects.create(title="Burmese Days", author="George Orwell")
+        data = self.changes()
+        self.assertEqual((data["changes"], data["next"], data["more"]), ([], self.start, False))
+
+        # Once the first is old enough, the batch stops before the second
+        change = Change.objects.filter(pk__gt=self.start).earliest("pk")
+        Change.objects.filter(pk=change.pk).update(created_at=timezone.now() - timedelta(minutes=2))
+        data = self.changes()
+        self.assertEqual(self.summary(data), [("upsert", first.pk)])
+        self.assertEqual((data["next"], data["more"]), (change.pk, False))
+
+    def test_invalid_parameters(self):
+        for params in ({"since": "x"}, {"limit": "x"}, {"wait": "x"}, {"wait": "nan"}, {"wait": "inf"}):
+            response = self.client.get("/api/changes/", params)
+            self.assertEqual(response.status_code, 400)
+            self.assertIn(next(iter(params)), response.data)
+
+    def test_long_poll_times_out_empty(self):
+        started = time.monotonic()
+        data = self.changes(wait="0.2")
+        self.assertGreaterEqual(time.monotonic() - started, 0.2)
+        self.assertEqual(data["changes"], [])
+
+    @override_settings(API_CHANGES_MAX_WAITERS=0)
+    def test_long_poll_does_not_wait_when_waiters_are_full(self):
+        started = time.monotonic()
+        data = self.changes(wait="5")
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(data["changes"], [])
+
+    @override_settings(API_CHANGES_POLL_INTERVAL=10)
+    def test_long_poll_wakes_on_commit_in_process(self):
+        with mock.patch("api.changes.has_changes", side_effect=[False, True]):
+            threading.Timer(0.1, notify_changes).start()
+            started = time.monotonic()
+            self.assertTrue(wait_for_changes(self.start, timeout=5))
+        self.assertLess(time.monotonic() - started, 2)
+
+
+class CachingTokenAuthenticationTests(TestCase):
+    """
+    Tests for the token lookup cache used by the default authentication.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        token_cache.reset_stats()
+        self.user = User.objects.create_user("reader", password="pw")
+        self.token = Token.objects.create(user=self.user)
+        self.book = Book.objects.create(title="1984", author="George Orwell")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def update_book(self):
+        return self.client.patch(f"/api/books/{self.book.pk}/", {"title": "Nineteen Eighty-Four"})
+
+    def is_cached(self, key):
+        return cache.get(token_cache.cache_key(key)) is not None
+
+    def test_repeat_requests_skip_token_lookup(self):
+        with self.assertNumQueries(3):  # token + user, then count + page of books
+            self.client.get("/api/books/")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/books/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((token_cache.hits, token_cache.misses), (1, 1))
+        # Count + page of books only
+        self.assertEqual(len(queries), 2)
+        self.assertFalse(any("authtoken_token" in query["sql"] for query in queries))
+
+        self.assertEqual(self.update_book().status_code, 200)
+
+    def test_token_key_is_not_stored_in_the_cache_key(self):
+        self.client.get("/api/books/")
+        self.assertNotIn(self.token.key, token_cache.cache_key(self.token.key))
+        self.assertTrue(self.is_cached(self.token.key))
+
+    def test_invalid_token_is_rejected_every_time(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Token not-a-token")
+        for _ in range(2):
+            self.assertEqual(self.client.get("/api/books/").status_code, 401)
+        self.assertFalse(self.is_cached("not-a-token"))
+
+    def test_deleted_token_is_forgotten_on_commit(self):
+        self.client.get("/api/books/")
+        key = self.token.key
+        with self.captureOnCommitCallbacks(execute=True):
+            self.token.delete()
+            # Uncommitted: the entry may still be served
+            self.assertTrue(self.is_cached(key))
+        self.assertFalse(self.is_cached(key))
+        self.assertEqual(self.update_book().status_code, 401)
+
+    def test_deactivated_user_is_forgotten(self):
+        self.client.get("/api/books/")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        self.assertEqual(self.update_book().status_code, 401)
+
+    def test_deleted_user_is_forgotten(self):
+        self.client.get("/api/books/")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.delete()
+        self.assertEqual(self.update_book().status_code, 401)
+
+    def test_login_keeps_the_entry(self):
+        self.client.get("/api/books/")
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.user.last_login = timezone.now()
+            self.user.save(update_fields=["last_login"])
+        self.assertEqual(callbacks, [])
+        self.assertTrue(self.is_cached(self.token.key))
+
+    def test_cached_user_is_not_shared(self):
+        self.client.get("/api/books/")
+        user, _ = CachingTokenAuthentication().authenticate_credentials(self.token.key)
+        user.username = "changed"
+        cached_user, _ = token_cache.get(self.token.key)
+        self.assertEqual(cached_user.username, "reader")
+
+    @override_settings(API_TOKEN_CACHE_TTL=0)
+    def test_ttl_zero_disables_cache(self):
+        self.client.get("/api/books/")
+        self.assertFalse(self.is_cached(self.token.key))
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class CachingBasicAuthenticationTests(TestCase):
+    """
+    Security tests for the verified-credential cache used by Basic auth:
+    only the exact username/password pair that was verified may skip the
+    password check, and never after the user changed.
+    """
+
+    def setUp(self):
+        basic_auth_cache.clear()
+        self.addCleanup(basic_auth_cache.clear)
+        self.user = User.objects.create_user("reader", password="correct horse")
+        self.book = Book.objects.create(title="1984", author="George Orwell")
+        self.client = APIClient()
+        patcher = mock.patch.object(
+            ModelBackend, "authenticate", autospec=True, side_effect=ModelBackend.authenticate
+        )
+        self.backend = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def update_book(self, username, password):
+        credentials = base64.b64encode(f"{username}:{password}".encode()).decode()
+        return self.client.patch(
+            f"/api/books/{self.book.pk}/",
+            {"title": "Nineteen Eighty-Four"},
+            HTTP_AUTHORIZATION=f"Basic {credentials}",
+        )
+
+    def test_repeat_requests_skip_password_check(self):
+        for _ in range(3):
+            self.assertEqual(self.update_book("reader", "correct horse").status_code, 200)
+        self.assertEqual(self.backend.call_count, 1)
+        self.assertEqual((basic_auth_cache.hits, basic_auth_cache.misses), (2, 1))
+
+    def test_wrong_password_is_never_cached(self):
+        for _ in range(3):
+            self.assertEqual(self.update_book("reader", "wrong").status_code, 401)
+        self.assertEqual(self.backend.call_count, 3)
+        self.assertEqual(len(basic_auth_cache), 0)
+
+    def test_wrong_password_after_success_is_checked(self):
+        self.update_book("reader", "correct horse")
+        for password in ("wrong", "correct horse ", "Correct horse", ""):
+            self.assertEqual(self.update_book("reader", password).status_code, 401)
+        self.assertEqual(self.backend.call_count, 5)
+        self.assertEqual(basic_auth_cache.hits, 0)
+        self.assertEqual(len(basic_auth_cache), 1)
+
+    def test_other_user_with_same_password_is_checked(self):
+        User.objects.create_user("other", password="different")
+        self.update_book("reader", "correct horse")
+        self.assertEqual(self.update_book("other", "correct horse").status_code, 401)
+        self.assertEqual(basic_auth_cache.hits, 0)
+
+    def test_password_change_invalidates(self):
+        self.update_book("reader", "correct horse")
+        self.user.set_password("battery staple")
+        self.user.save()
+        self.assertEqual(len(basic_auth_cache), 0)
+        self.assertEqual(self.update_book("reader", "correct horse").status_code, 401)
+        self.assertEqual(self.update_book("reader", "battery staple").status_code, 200)
+
+    def test_deactivated_user_is_forgotten(self):
+        self.update_book("reader", "correct horse")
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.update_book("reader", "correct horse").status_code, 401)
+
+    def test_deleted_user_is_forgotten(self):
+        self.update_book("reader", "correct horse")
+        self.user.delete()
+        self.assertEqual(self.update_book("reader", "correct horse").status_code, 401)
+
+    def test_changes_without_signals_are_seen(self):
+        # As if another process made the change: no signal reaches this cache
+        self.update_book("reader", "correct horse")
+        self.user.set_password("battery staple")
+        User.objects.filter(pk=self.user.pk).update(password=self.user.password)
+        self.assertEqual(self.update_book("reader", "correct horse").status_code, 401)
+        self.assertEqual(self.update_book("reader", "battery staple").status_code, 200)
+
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.update_book("reader", "battery staple").status_code, 401)
+
+    def test_cache_does_not_hold_credentials(self):
+        self.update_book("reader", "correct horse")
+        [key] = basic_auth_cache.entries
+        self.assertNotIn("correct horse", key)
+        self.assertNotIn("reader", key)
+        self.assertEqual(key, credential_digest("reader", "correct horse"))
+
+    def test_digest_separates_username_and_password(self):
+        # Passwords may contain ":", so "a:b" + "c" must not collide with "a" + "b:c"
+        self.assertNotEqual(credential_digest("a:b", "c"), credential_digest("a", "b:c"))
+        self.assertNotEqual(credential_digest("ab", "c"), credential_digest("a", "bc"))
+
+    @override_settings(API_BASIC_AUTH_CACHE_TTL=0)
+    def test_ttl_zero_disables_cache(self):
+        self.update_book("reader", "correct horse")
+        self.update_book("reader", "correct horse")
+        self.assertEqual(self.backend.call_count, 2)
+        self.assertEqual(len(basic_auth_cache), 0)
+
+
+class TokenCacheTests(TestCase):
+    """
+    Unit tests for the LRU + TTL behaviour of TokenCache.
+    """
+
+    def make_user(self, pk):
+        return User(pk=pk, username=f"user{pk}")
+
+    def test_lru_eviction(self):
+        cache = BasicAuthCache(max_size=2, ttl=60)
+        cache.set("a", self.make_user(1), "token-a")
+        cache.set("b", self.make_user(2), "token-b")
+        cache.get("a")  # "b" is now least recently used
+        cache.set("c", self.make_user(3), "token-c")
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNotNone(cache.get("c"))
+        self.assertNotIn(2, cache.keys_by_user)
+
+    def test_ttl_expiry(self):
+        cache = BasicAuthCache(max_size=10, ttl=30)
+        with mock.patch("api.authentication.time.monotonic", return_value=100):
+            cache.set("a", self.make_user(1), "token-a")
+        with mock.patch("api.authentication.time.monotonic", return_value=129):
+            self.assertIsNotNone(cache.get("a"))
+        with mock.patch("api.authentication.time.monotonic", return_value=130):
+            self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
+
+    def test_invalidate_user(self):
+        cache = BasicAuthCache(max_size=10, ttl=60)
+        user = self.make_user(1)
+        cache.set("a", user, "token-a")
+        cache.set("b", user, "token-b")
+        cache.set("c", self.make_user(2), "token-c")
+        cache.invalidate_user(1)
+        self.assertEqual(list(cache.entries), ["c"])
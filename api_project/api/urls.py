@@ -1,16 +1,19 @@
-from django.urls import path, include
-from rest_framework.routers import DefaultRouter
-from .views import BookList, BookViewSet
+from django.urls import path
+from .views import BookViewSet, ChangeFeedView
 
-# DRF router
-router = DefaultRouter()
-router.register(r"books", BookViewSet, basename="book")
+# One Book resource, routed explicitly: DefaultRouter would also add an API
+# root and a format-suffix variant of every route, each tried in turn on
+# every request
+book_list = BookViewSet.as_view({"get": "list", "post": "create"})
+book_detail = BookViewSet.as_view({
+    "get": "retrieve",
+    "put": "update",
+    "patch": "partial_update",
+    "delete": "destroy",
+})
 
 urlpatterns = [
-    # For the earlier ListAPIView task
-    path("books/", BookList.as_view(), name="book-list"),
-
-    # Router-generated routes: /books/, /books/<pk>/
-    path("", include(router.urls)),
+    path("books/", book_list, name="book-list"),
+    path("books/<int:pk>/", book_detail, name="book-detail"),
+    path("changes/", ChangeFeedView.as_view(), name="change-feed"),
 ]
-
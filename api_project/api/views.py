@@ -1,35 +1,143 @@
+import math
+from datetime import timezone as dt_timezone
+
 from django.http import HttpResponse
-from rest_framework import generics, viewsets
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import viewsets
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from .changes import DEFAULT_LIMIT, MAX_LIMIT, get_max_wait, read_changes, wait_for_changes
 from .models import Book
+from .pagination import SyncCursorPagination
 from .serializers import BookSerializer
 
 
+MAX_IDS = 1000
+# Ids beyond a signed 64-bit integer overflow the database driver
+MAX_ID = 2**63 - 1
+
+
 def home(request):
     return HttpResponse("API Project is running. Go to /api/books/ to see the Book API.")
 
 
-class BookList(generics.ListAPIView):
+def parse_ids(value):
     """
-    GET /api/books/ -> list all Book instances
+    Parse ?ids=1,2,3 into a list of ints (None when not given).
     """
-    queryset = Book.objects.all()
-    serializer_class = BookSerializer
+    if value is None:
+        return None
+    try:
+        ids = {int(part) for part in value.split(",") if part.strip()}
+    except ValueError:
+        raise ValidationError({"ids": ["Expected a comma-separated list of integers."]})
+    if len(ids) > MAX_IDS:
+        raise ValidationError({"ids": [f"At most {MAX_IDS} ids per request."]})
+    if any(not 1 <= pk <= MAX_ID for pk in ids):
+        raise ValidationError({"ids": [f"Ids must be between 1 and {MAX_ID}."]})
+    return sorted(ids)
+
+
+def parse_number(params, name, default, cast=int):
+    try:
+        number = cast(params.get(name, default))
+    except ValueError:
+        number = math.nan
+    if not math.isfinite(number):
+        raise ValidationError({name: ["A valid number is required."]})
+    return number
+
+
+def parse_updated_since(value):
+    """
+    Parse ?updated_since=<ISO 8601 datetime> (None when not given).
+    Times without an offset are taken as UTC.
+    """
+    if value is None:
+        return None
+    try:
+        since = parse_datetime(value)
+    except ValueError:
+        since = None
+    if since is None:
+        raise ValidationError({"updated_since": ["Expected an ISO 8601 date/time."]})
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since, dt_timezone.utc)
+    return since
 
 
 class BookViewSet(viewsets.ModelViewSet):
     """
     A ViewSet for viewing and editing Book instances.
 
-    Endpoints (when used with a router):
-    - GET    /api/books/        -> list all books
+    Endpoints (see api/urls.py):
+    - GET    /api/books/        -> list books, paginated, ordered by id
     - POST   /api/books/        -> create a new book
     - GET    /api/books/<id>/   -> retrieve a single book
     - PUT    /api/books/<id>/   -> full update
     - PATCH  /api/books/<id>/   -> partial update
     - DELETE /api/books/<id>/   -> delete a book
+
+    The list accepts:
+    - ?ids=1,2,3 -> only those books (at most MAX_IDS), in one query
+    - ?updated_since=<ISO datetime> -> books saved at or after that time,
+      ordered by (updated_at, id) and paged with a keyset cursor
+      (SyncCursorPagination) instead of page numbers. For incremental sync,
+      pass the largest updated_at already seen and follow "next"; books on
+      that boundary come back again and can be skipped by id. Deletions are
+      not reported: use /api/changes/ (ChangeFeedView) to sync those too.
     """
     queryset = Book.objects.all()
     serializer_class = BookSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
+    @property
+    def paginator(self):
+        if (
+            not hasattr(self, "_paginator")
+            and self.action == "list"
+            and "updated_since" in self.request.query_params
+        ):
+            self._paginator = SyncCursorPagination()
+        return super().paginator
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action != "list":
+            return queryset
+
+        params = self.request.query_params
+        ids = parse_ids(params.get("ids"))
+        if ids is not None:
+            queryset = queryset.filter(pk__in=ids)
+        since = parse_updated_since(params.get("updated_since"))
+        if since is not None:
+            return queryset.filter(updated_at__gte=since).order_by("updated_at", "id")
+        return queryset.order_by("id")
+
+
+class ChangeFeedView(APIView):
+    """
+    Incremental change feed for Books (see api.changes).
+
+    - GET /api/changes/?since=<seq> -> the changes after `seq`, batched
+
+    Query parameters:
+    - since: last sequence number seen (default 0: from the beginning)
+    - limit: changes per batch (default 100, max 1000)
+    - wait: seconds to hold an empty response open for new changes
+      (long polling; at most API_CHANGES_MAX_WAIT)
+    """
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+    def get(self, request):
+        params = request.query_params
+        since = max(parse_number(params, "since", 0), 0)
+        limit = min(max(parse_number(params, "limit", DEFAULT_LIMIT), 1), MAX_LIMIT)
+        wait = min(max(parse_number(params, "wait", 0, float), 0), get_max_wait())
+        if wait:
+            wait_for_changes(since, wait)
+        return Response(read_changes(since, limit))
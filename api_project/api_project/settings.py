@@ -129,11 +129,42 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",   # ← token auth
+        # ← token auth: rest_framework.authentication.TokenAuthentication
+        # with a lookup cache (see api/authentication.py)
+        "api.authentication.CachingTokenAuthentication",
         "rest_framework.authentication.SessionAuthentication",
-        "rest_framework.authentication.BasicAuthentication",
+        # BasicAuthentication with a verified-credential cache
+        "api.authentication.CachingBasicAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticatedOrReadOnly",
     ],
+    "DEFAULT_PAGINATION_CLASS": "api.pagination.BookPagination",
+    "PAGE_SIZE": 50,
 }
+
+# Token authentication lookup cache (api.authentication.CachingTokenAuthentication):
+# seconds a token lookup is kept in CACHES["default"]. Changes are dropped
+# from it on commit, but only a shared backend (Redis, Memcached) drops them
+# in every process; with the default local-memory cache, multi-process
+# deployments keep serving a revoked token or deactivated user from the
+# other processes for up to this long.
+API_TOKEN_CACHE_TTL = 60
+
+# Verified Basic auth credentials (api.authentication.CachingBasicAuthentication):
+# keyed HMACs of recently verified username/password pairs, per process
+API_BASIC_AUTH_CACHE_SIZE = 256
+API_BASIC_AUTH_CACHE_TTL = 30
+
+# /api/changes/ long polling: longest ?wait= honoured, how often a waiting
+# request checks for changes made by other processes, and how many requests
+# per process may wait at once. Each waiter holds a worker thread, so keep
+# the wait well below the server's worker timeout (gunicorn: 30 s).
+API_CHANGES_MAX_WAIT = 10
+API_CHANGES_POLL_INTERVAL = 1.0
+API_CHANGES_MAX_WAITERS = 8
+
+# Seconds a change must be old before /api/changes/ serves it, so that
+# transactions committing out of sequence order are not skipped. None
+# picks 0 on SQLite (a single writer) and 5 elsewhere.
+API_CHANGES_SAFETY_LAG = None
@@ -0,0 +1,120 @@
+"""
+Per-post cache versioning for the post detail page.
+
+Each post has a version number stored in the cache. The detail view and the
+{% cache %} fragments in post_detail.html include it in their keys, so
+bumping the version (from the signal handlers in blog/signals.py) makes every
+cached copy of that post stale at once without having to know their keys.
+The post listings share a single version of their own, used by their ETags
+(blog/conditional.py).
+"""
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.utils import make_template_fragment_key
+
+
+def get_fragment_timeout():
+    return getattr(settings, "BLOG_FRAGMENT_CACHE_TIMEOUT", 3600)
+
+
+def post_version_key(post_id):
+    return f"blog:post:{post_id}:version"
+
+
+LISTING_VERSION_KEY = "blog:listings:version"
+
+
+def get_cache_version(key):
+    """
+    Return the version stored under `key`, creating one if needed.
+
+    Versions are nanosecond timestamps rather than a counter starting at 1,
+    so a version evicted from the cache is never reused by accident.
+    """
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+def get_post_cache_version(post_id):
+    """
+    Return the current cache version of a post, creating one if needed.
+    """
+    return get_cache_version(post_version_key(post_id))
+
+
+def bump_post_cache_version(post_id):
+    cache.set(post_version_key(post_id), time.time_ns(), None)
+
+
+def bump_post_cache_versions(post_ids):
+    version = time.time_ns()
+    cache.set_many({post_version_key(post_id): version for post_id in post_ids}, None)
+
+
+def get_listing_cache_version():
+    """
+    Return the version shared by every post listing (the post list, tag
+    pages and search results). Signals bump it whenever anything a listing
+    shows changes: posts, comments, tags and author names.
+    """
+    return get_cache_version(LISTING_VERSION_KEY)
+
+
+def bump_listing_cache_version():
+    cache.set(LISTING_VERSION_KEY, time.time_ns(), None)
+
+
+def post_object_key(post_id, version):
+    return f"blog:post:{post_id}:v{version}:object"
+
+
+def post_last_modified_key(post_id, version):
+    return f"blog:post:{post_id}:v{version}:last_modified"
+
+
+# Async variants for the async views (blog/views.py). LocMemCache never does
+# I/O, so it is called directly on the event loop; other backends go through
+# cache.aget()/aset(), which run them in a worker thread.
+def cache_is_in_memory():
+    return isinstance(caches["default"], LocMemCache)
+
+
+async def cache_aget(key, default=None):
+    if cache_is_in_memory():
+        return cache.get(key, default)
+    return await cache.aget(key, default)
+
+
+async def cache_aset(key, value, timeout):
+    if cache_is_in_memory():
+        cache.set(key, value, timeout)
+    else:
+        await cache.aset(key, value, timeout)
+
+
+async def aget_post_cache_version(post_id):
+    if cache_is_in_memory():
+        return get_post_cache_version(post_id)
+    return await sync_to_async(get_post_cache_version)(post_id)
+
+
+async def aget_listing_cache_version():
+    if cache_is_in_memory():
+        return get_listing_cache_version()
+    return await sync_to_async(get_listing_cache_version)()
+
+
+async def fragment_is_cached(fragment_name, vary_on):
+    """
+    Whether the {% cache %} fragment `fragment_name` with these vary_on
+    values is in the cache, i.e. will render without touching its data.
+    """
+    return await cache_aget(make_template_fragment_key(fragment_name, vary_on)) is not None
@@ -0,0 +1,166 @@
+"""
+ETag / Last-Modified validators for the blog read views.
+
+They are used with django.views.decorators.http.condition(), which calls them
+before the view runs and answers 304 Not Modified when the client's copy is
+still current, skipping the listing queries and template rendering.
+
+Pages show different links to anonymous users, authors and other users, so
+every ETag includes the viewer's id. Each validator pair is computed once per
+request and memoised on the request object.
+
+condition() calls the validators synchronously, even around an async view,
+so the async views (blog/views.py) are also wrapped in prefetch_validators(),
+which awaits the async twin of a validator pair (apost_detail_validators,
+apost_list_validators) first and stores the result in the same memo.
+"""
+import hashlib
+from datetime import datetime, timezone
+from functools import wraps
+
+from django.core.cache import cache
+from django.db.models import Max
+
+from .cache import (
+    aget_listing_cache_version,
+    aget_post_cache_version,
+    cache_aget,
+    cache_aset,
+    get_fragment_timeout,
+    get_listing_cache_version,
+    get_post_cache_version,
+    post_last_modified_key,
+)
+from .models import Post
+
+
+def make_etag(*parts):
+    raw = "|".join(str(part) for part in parts)
+    return hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()
+
+
+def get_memo(request):
+    return request.__dict__.setdefault("_blog_validators", {})
+
+
+def memoize_on_request(func):
+    @wraps(func)
+    def wrapper(request, *args, **kwargs):
+        memo = get_memo(request)
+        if func not in memo:
+            memo[func] = func(request, *args, **kwargs)
+        return memo[func]
+
+    return wrapper
+
+
+def prefetch_validators(validators, avalidators):
+    """
+    Decorator for an async view wrapped in condition(): awaits
+    `avalidators` and memoises the result as that of `validators` (a
+    memoize_on_request function), so condition() never queries the database
+    from the event loop. request.user must already be resolved.
+    """
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            get_memo(request)[validators.__wrapped__] = await avalidators(request, *args, **kwargs)
+            return await view(request, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+# -----------------------
+# POST DETAIL
+# -----------------------
+@memoize_on_request
+def post_detail_validators(request, pk):
+    """
+    Return (etag, last_modified) for a post, or (None, None) if it is missing.
+
+    Last-Modified is the newest of the post and its comments. The ETag uses
+    the post's cache version, which signals bump on any change to the post,
+    its comments (including deletions) or its tags. Last-Modified is cached
+    under that version too, so revalidating a hot post costs no queries.
+    """
+    version = get_post_cache_version(pk)
+    key = post_last_modified_key(pk, version)
+
+    last_modified = cache.get(key)
+    if last_modified is None:
+        post = post_last_modified_queryset(pk).first()
+        if post is None:
+            return None, None
+        last_modified = max(filter(None, [post["updated_at"], post["latest_comment"]]))
+        cache.set(key, last_modified, get_fragment_timeout())
+
+    etag = make_etag("post", pk, version, request.user.pk)
+    return etag, last_modified
+
+
+async def apost_detail_validators(request, pk):
+    version = await aget_post_cache_version(pk)
+    key = post_last_modified_key(pk, version)
+
+    last_modified = await cache_aget(key)
+    if last_modified is None:
+        post = await post_last_modified_queryset(pk).afirst()
+        if post is None:
+            return None, None
+        last_modified = max(filter(None, [post["updated_at"], post["latest_comment"]]))
+        await cache_aset(key, last_modified, get_fragment_timeout())
+
+    etag = make_etag("post", pk, version, request.user.pk)
+    return etag, last_modified
+
+
+def post_last_modified_queryset(pk):
+    return (
+        Post.objects.filter(pk=pk)
+        .annotate(latest_comment=Max("comments__updated_at"))
+        .values("updated_at", "latest_comment")
+    )
+
+
+def post_detail_etag(request, pk):
+    return post_detail_validators(request, pk)[0]
+
+
+def post_detail_last_modified(request, pk):
+    return post_detail_validators(request, pk)[1]
+
+
+# -----------------------
+# POST LISTINGS
+# -----------------------
+def listing_result(request, version):
+    """
+    Return (etag, last_modified) for a listing page.
+
+    Every listing shares one cache version (blog/cache.py), which signals
+    bump on any change to posts, comments, tags or author names, so
+    validating a listing costs no queries. The version is the time of the
+    last change, which doubles as Last-Modified. The full path keeps every
+    page, cursor, sort and search query distinct.
+    """
+    etag = make_etag("posts", request.get_full_path(), version, request.user.pk)
+    return etag, datetime.fromtimestamp(version / 1e9, tz=timezone.utc)
+
+
+@memoize_on_request
+def post_list_validators(request, **kwargs):
+    return listing_result(request, get_listing_cache_version())
+
+
+async def apost_list_validators(request, **kwargs):
+    return listing_result(request, await aget_listing_cache_version())
+
+
+def post_list_etag(request, **kwargs):
+    return post_list_validators(request, **kwargs)[0]
+
+
+def post_list_last_modified(request, **kwargs):
+    return post_list_validators(request, **kwargs)[1]
@@ -0,0 +1,354 @@
+"""
+Server-Sent Events for new posts and comments.
+
+Two event streams, served by async views (see blog/urls.py):
+- /posts/events/            -> "post" events for every new post
+- /posts/<pk>/events/       -> "comment" events for new comments on one post
+
+Signals (blog/signals.py) publish an event once the transaction that
+created the post or comment commits. Delivery goes through `broker`, an
+in-process pub/sub: each open stream is a Subscriber with a small buffer and
+an asyncio.Event, so an idle connection is one suspended coroutine on the
+server's event loop rather than a thread. Publishing encodes the event once
+and hands the same bytes to every subscriber of the channel, with one
+call_soon_threadsafe() per event loop, so it can be called from any thread
+(sync views run in worker threads under ASGI).
+
+Events only reach streams opened on the same process. There is no replay:
+a client that reconnects gets the events published from then on.
+
+The streams need an ASGI server running django_blog.asgi:application
+(e.g. `uvicorn django_blog.asgi:application`). Under WSGI (runserver
+without an ASGI server installed) they answer 503, because WSGI would hold
+a worker thread for every open stream.
+
+django_blog/asgi.py wraps Django in EventStreamApplication, which answers
+the stream URLs itself. Django's ASGI handler runs sync middleware and
+request signals in a thread that belongs to the request, so a stream
+served by the views would keep one idle thread alive for as long as it is
+open. The URLs are still resolved with Django's URLconf, but middleware
+does not run on the streams. They carry only public data, so no session or
+auth checks are needed; the Host header is still checked against
+ALLOWED_HOSTS, and a request with a disallowed host is passed to Django,
+which answers 400 as it does for any other URL. Only GETs of paths ending
+in STREAM_PATH_SUFFIX are looked at; every other request goes straight to
+Django. The one query the wrapper makes (does the post exist?) opens and
+closes its database connection as Django's request signals would.
+
+Each open stream holds a socket and a subscriber, so at most
+BLOG_EVENTS_MAX_STREAMS streams are served at once per process; past that
+a new stream is answered 503 and the client retries later.
+"""
+import asyncio
+import io
+import itertools
+import json
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import DisallowedHost
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections
+from django.urls import Resolver404, resolve
+
+
+def get_keepalive_interval():
+    return getattr(settings, "BLOG_EVENTS_KEEPALIVE", 15)
+
+
+def get_buffer_size():
+    return getattr(settings, "BLOG_EVENTS_BUFFER_SIZE", 100)
+
+
+def get_max_streams():
+    return getattr(settings, "BLOG_EVENTS_MAX_STREAMS", 10000)
+
+
+def streams_full():
+    """
+    Whether the process already serves BLOG_EVENTS_MAX_STREAMS streams.
+    """
+    return broker.subscriber_count() >= get_max_streams()
+
+
+def posts_channel():
+    return "posts"
+
+
+def comments_channel(post_id):
+    return f"post:{post_id}:comments"
+
+
+def format_event(event_id, event, data):
+    """
+    Encode one SSE message.
+    """
+    payload = json.dumps(data, cls=DjangoJSONEncoder, separators=(",", ":"))
+    return f"id: {event_id}\nevent: {event}\ndata: {payload}\n\n".encode()
+
+
+class Subscriber:
+    """
+    One open event stream: pending messages and the event that wakes it.
+    Must be created on the event loop that reads it.
+    """
+    __slots__ = ("channel", "loop", "pending", "ready", "overflowed")
+
+    def __init__(self, channel):
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.pending = []
+        self.ready = asyncio.Event()
+        self.overflowed = False
+
+    def deliver(self, message, buffer_size):
+        if len(self.pending) >= buffer_size:
+            # A reader this far behind is dropped; EventSource reconnects
+            self.overflowed = True
+        else:
+            self.pending.append(message)
+        self.ready.set()
+
+    async def wait(self):
+        await self.ready.wait()
+        self.ready.clear()
+        messages, self.pending = self.pending, []
+        return messages
+
+
+class EventBroker:
+    """
+    In-process pub/sub fan-out (see module docstring).
+    """
+
+    def __init__(self):
+        self.channels = {}
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+
+    def subscribe(self, channel):
+        subscriber = Subscriber(channel)
+        with self.lock:
+            self.channels.setdefault(channel, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self.lock:
+            subscribers = self.channels.get(subscriber.channel)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self.channels[subscriber.channel]
+
+    def subscriber_count(self, channel=None):
+        with self.lock:
+            if channel is not None:
+                return len(self.channels.get(channel, ()))
+            return sum(len(subscribers) for subscribers in self.channels.values())
+
+    def publish(self, channel, event, data):
+        """
+        Send `event` with JSON `data` to every subscriber of `channel`.
+        Returns the number of subscribers it was sent to.
+        """
+        with self.lock:
+            subscribers = list(self.channels.get(channel, ()))
+            event_id = next(self.ids)
+        if not subscribers:
+            return 0
+
+        message = format_event(event_id, event, data)
+        buffer_size = get_buffer_size()
+        by_loop = {}
+        for subscriber in subscribers:
+            by_loop.setdefault(subscriber.loop, []).append(subscriber)
+        for loop, group in by_loop.items():
+            try:
+                loop.call_soon_threadsafe(deliver, group, message, buffer_size)
+            except RuntimeError:
+                # The loop has been closed; its streams are gone
+                pass
+        return len(subscribers)
+
+
+def deliver(subscribers, message, buffer_size):
+    for subscriber in subscribers:
+        subscriber.deliver(message, buffer_size)
+
+
+broker = EventBroker()
+
+
+async def event_stream(channel, keepalive=None):
+    """
+    Yield the SSE body for a new subscriber to `channel` until the client
+    goes away (the ASGI handler cancels the generator) or falls too far
+    behind.
+    """
+    if keepalive is None:
+        keepalive = get_keepalive_interval()
+    # Subscribed when the response starts streaming, so a response that is
+    # never sent leaves nothing behind in the broker
+    subscriber = broker.subscribe(channel)
+    try:
+        # Sent at once so the response headers go out and the client knows
+        # how long to wait before reconnecting
+        yield b"retry: 3000\n\n"
+        while True:
+            try:
+                async with asyncio.timeout(keepalive):
+                    messages = await subscriber.wait()
+            except TimeoutError:
+                # Comment line: keeps proxies from closing an idle stream
+                yield b": keepalive\n\n"
+                continue
+            if messages:
+                yield b"".join(messages)
+            if subscriber.overflowed:
+                return
+    finally:
+        broker.unsubscribe(subscriber)
+
+
+STREAM_HEADERS = [
+    (b"content-type", b"text/event-stream"),
+    (b"cache-control", b"no-cache"),
+    # Tell nginx not to buffer the stream
+    (b"x-accel-buffering", b"no"),
+]
+
+FULL_MESSAGE = b"Too many open live update streams; try again later."
+
+FULL_HEADERS = [
+    (b"content-type", b"text/plain; charset=utf-8"),
+    (b"content-length", str(len(FULL_MESSAGE)).encode()),
+    (b"retry-after", b"30"),
+]
+
+
+# Every stream URL in blog/urls.py ends with this
+STREAM_PATH_SUFFIX = "/events/"
+
+
+@sync_to_async
+def post_exists(pk):
+    """
+    Whether post `pk` exists. Called outside Django's request handler, so
+    stale connections are closed before and after the query, as the
+    request_started and request_finished signals would do.
+    """
+    from .models import Post
+
+    close_old_connections()
+    try:
+        return Post.objects.filter(pk=pk).exists()
+    finally:
+        close_old_connections()
+
+
+class EventStreamApplication:
+    """
+    ASGI application serving the event streams directly and everything
+    else through `application` (Django). See module docstring.
+    """
+
+    def __init__(self, application):
+        self.application = application
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] == "http"
+            and scope["method"] == "GET"
+            and scope["path"].endswith(STREAM_PATH_SUFFIX)
+        ):
+            channel = await self.get_channel(scope)
+            if channel is not None:
+                return await self.stream(channel, receive, send)
+        return await self.application(scope, receive, send)
+
+    async def get_channel(self, scope):
+        """
+        Return the channel of the event stream at the request path, or None
+        to let Django handle the request (including 404s).
+        """
+        from .views import comment_events, post_events
+
+        if not self.host_allowed(scope):
+            return None
+        path = scope["path"]
+        root_path = scope.get("root_path", "")
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):]
+        try:
+            match = resolve(path)
+        except Resolver404:
+            return None
+        if match.func is post_events:
+            return posts_channel()
+        if match.func is comment_events and await post_exists(match.kwargs["pk"]):
+            return comments_channel(match.kwargs["pk"])
+        return None
+
+    def host_allowed(self, scope):
+        """
+        Django's Host header validation (ALLOWED_HOSTS, USE_X_FORWARDED_HOST),
+        which would otherwise only run in CommonMiddleware.
+        """
+        try:
+            ASGIRequest(scope, io.BytesIO()).get_host()
+        except DisallowedHost:
+            return False
+        return True
+
+    async def stream(self, channel, receive, send):
+        if streams_full():
+            await send({"type": "http.response.start", "status": 503, "headers": FULL_HEADERS})
+            await send({"type": "http.response.body", "body": FULL_MESSAGE})
+            return
+        body = event_stream(channel)
+        # Subscribes before anything else runs on the loop, so concurrent
+        # requests cannot all pass the check above
+        first = await anext(body)
+
+        async def pump():
+            await send({"type": "http.response.start", "status": 200, "headers": STREAM_HEADERS})
+            await send({"type": "http.response.body", "body": first, "more_body": True})
+            async for chunk in body:
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+        async def wait_for_disconnect():
+            while (await receive())["type"] != "http.disconnect":
+                pass
+
+        tasks = [asyncio.ensure_future(pump()), asyncio.ensure_future(wait_for_disconnect())]
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+            # Unsubscribes (event_stream's finally) even if pump never started
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await body.aclose()
+
+
+def post_event_data(post):
+    return {
+        "id": post.pk,
+        "title": post.title,
+        "author": str(post.author),
+        "url": post.get_absolute_url(),
+        "published_date": post.published_date,
+    }
+
+
+def comment_event_data(comment):
+    return {
+        "id": comment.pk,
+        "post_id": comment.post_id,
+        "author": str(comment.author),
+        "content": comment.content,
+        "created_at": comment.created_at,
+    }
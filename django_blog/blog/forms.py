@@ -51,12 +51,7 @@ class PostForm(forms.ModelForm):
         tags_str = self.cleaned_data.get("tags", "")
         tag_names = [t.strip() for t in tags_str.split(",") if t.strip()]
 
-        tag_objs = []
-        for name in tag_names:
-            tag, _ = Tag.objects.get_or_create(name=name)
-            tag_objs.append(tag)
-
-        post.tags.set(tag_objs)
+        post.tags.set(Tag.objects.get_or_create_many(tag_names))
 
         return post
 
@@ -0,0 +1,242 @@
+import asyncio
+import importlib
+import io
+import itertools
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import override_settings
+from django.urls import clear_url_caches, reverse
+
+from blog.models import Comment, Post, Tag
+
+MODES = ("wsgi", "asgi-sync", "asgi-async")
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare requests/sec and latency of the post list, post detail and "
+        "search pages under WSGI, ASGI with the sync views and ASGI with the "
+        "async views (BLOG_ASYNC_VIEWS). Requests go through the real WSGI "
+        "and ASGI applications from many concurrent in-memory clients in this "
+        "process (no sockets or HTTP parsing), against a temporary database "
+        "seeded with --posts posts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", type=int, default=500)
+        parser.add_argument("--requests", type=int, default=5000, help="Requests per mode.")
+        parser.add_argument(
+            "--threads", type=int, default=32,
+            help="Worker threads of the simulated WSGI server (e.g. gunicorn --threads).",
+        )
+        parser.add_argument("--posts", type=int, default=200)
+        parser.add_argument("--modes", default=",".join(MODES))
+
+    def handle(self, *args, **options):
+        modes = options["modes"].split(",")
+        for mode in modes:
+            if mode not in MODES:
+                self.stderr.write(f"Unknown mode {mode!r}; choose from {', '.join(MODES)}.")
+                return
+
+        old_name = connection.settings_dict["NAME"]
+        with tempfile.TemporaryDirectory() as directory:
+            if connection.vendor == "sqlite":
+                # A file, not the shared in-memory test database, so every
+                # worker thread reads it like the real one
+                connection.settings_dict["TEST"]["NAME"] = os.path.join(directory, "benchmark.sqlite3")
+            connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+            try:
+                paths = self.seed(options["posts"])
+                with override_settings(DEBUG=False, ALLOWED_HOSTS=["localhost"]):
+                    self.stdout.write(
+                        f"{options['clients']} clients, {options['requests']} requests per mode, "
+                        f"WSGI server threads: {options['threads']}"
+                    )
+                    for mode in modes:
+                        result = asyncio.run(self.run(mode, paths, options))
+                        self.report(mode, result)
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+                self.use_async_views(getattr(settings, "BLOG_ASYNC_VIEWS", False))
+
+    def seed(self, count):
+        with transaction.atomic():
+            author = User.objects.create_user(username="benchmark")
+            tags = [Tag.objects.create(name=name) for name in ("django", "python", "asgi", "orm")]
+            posts = []
+            for i in range(count):
+                post = Post.objects.create(
+                    title=f"Post {i} about {tags[i % len(tags)].name}",
+                    content="Benchmark content about django and python. " * 20,
+                    author=author,
+                )
+                post.tags.add(tags[i % len(tags)], tags[(i + 1) % len(tags)])
+                posts.append(post)
+            for post in posts[:20]:
+                for i in range(5):
+                    Comment.objects.create(post=post, author=author, content=f"Comment {i}")
+
+        return [
+            (reverse("post-list"), ""),
+            (reverse("post-list"), "sort=activity"),
+            *((reverse("post-detail", kwargs={"pk": post.pk}), "") for post in posts[:20]),
+            (reverse("search-posts"), "q=django"),
+            (reverse("search-posts"), "q=python+orm"),
+        ]
+
+    def use_async_views(self, enabled):
+        with override_settings(BLOG_ASYNC_VIEWS=enabled):
+            importlib.reload(importlib.import_module("blog.urls"))
+            importlib.reload(importlib.import_module(settings.ROOT_URLCONF))
+        clear_url_caches()
+
+    async def run(self, mode, paths, options):
+        self.use_async_views(mode == "asgi-async")
+        cache.clear()
+
+        if mode == "wsgi":
+            from django.core.wsgi import get_wsgi_application
+
+            application = get_wsgi_application()
+            pool = ThreadPoolExecutor(options["threads"])
+            loop = asyncio.get_running_loop()
+
+            async def get(path, query):
+                return await loop.run_in_executor(pool, wsgi_get, application, path, query)
+        else:
+            from django.core.asgi import get_asgi_application
+
+            application = get_asgi_application()
+            pool = None
+
+            async def get(path, query):
+                return await asgi_get(application, path, query)
+
+        # Warm up caches, URL resolvers and the search index
+        for path, query in paths:
+            await get(path, query)
+
+        latencies = []
+        errors = 0
+        requests = itertools.count()
+        total = options["requests"]
+        peak_threads = threading.active_count()
+
+        async def client(index):
+            nonlocal errors
+            while (n := next(requests)) < total:
+                path, query = paths[(index + n) % len(paths)]
+                start = time.perf_counter()
+                if await get(path, query) != 200:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        async def count_threads():
+            nonlocal peak_threads
+            while True:
+                peak_threads = max(peak_threads, threading.active_count())
+                await asyncio.sleep(0.05)
+
+        counter = asyncio.ensure_future(count_threads())
+        start = time.perf_counter()
+        await asyncio.gather(*(client(i) for i in range(options["clients"])))
+        elapsed = time.perf_counter() - start
+        counter.cancel()
+        if pool is not None:
+            pool.shutdown()
+
+        return {
+            "requests": len(latencies),
+            "errors": errors,
+            "rps": len(latencies) / elapsed,
+            "p50": statistics.median(latencies) * 1000,
+            "p99": statistics.quantiles(latencies, n=100)[98] * 1000,
+            "threads": peak_threads,
+        }
+
+    def report(self, mode, result):
+        self.stdout.write(
+            f"{mode:<11} {result['rps']:8.0f} req/s   p50 {result['p50']:7.1f} ms   "
+            f"p99 {result['p99']:7.1f} ms   errors {result['errors']}   "
+            f"peak threads {result['threads']}"
+        )
+
+
+def wsgi_get(application, path, query):
+    environ = {
+        "REQUEST_METHOD": "GET",
+        "PATH_INFO": path,
+        "QUERY_STRING": query,
+        "SCRIPT_NAME": "",
+        "SERVER_NAME": "localhost",
+        "SERVER_PORT": "80",
+        "SERVER_PROTOCOL": "HTTP/1.1",
+        "HTTP_HOST": "localhost",
+        "REMOTE_ADDR": "127.0.0.1",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": "http",
+        "wsgi.input": io.BytesIO(b""),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    status = []
+    body = application(environ, lambda line, headers, exc_info=None: status.append(line))
+    try:
+        for _ in body:
+            pass
+    finally:
+        if hasattr(body, "close"):
+            body.close()
+    return int(status[0][:3])
+
+
+async def asgi_get(application, path, query):
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(b"host", b"localhost")],
+        "client": ("127.0.0.1", 10000),
+        "server": ("localhost", 80),
+    }
+    status = None
+    finished = asyncio.Event()
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif not message.get("more_body", False):
+            finished.set()
+
+    await application(scope, receive, send)
+    return status
@@ -0,0 +1,102 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from blog.models import Post, Tag
+from blog.search import SimpleSearchBackend, get_search_backend
+
+
+WORDS = (
+    "django python database index query cache search template view model "
+    "signal migration server client request response session token async "
+    "thread process memory latency throughput benchmark ranking vector table "
+    "column row join filter order page cursor tag comment author title content"
+).split()
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare search latency of the old icontains query against the search "
+        "backends. Seeds posts inside a transaction that is rolled back, so the "
+        "database is left untouched."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--posts", type=int, default=100_000)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        queries = ["django", "cache latency", "vec", "signal migration server", "zzzz"]
+
+        with transaction.atomic():
+            self.seed(options["posts"], rng)
+
+            backends = [("icontains (old)", self.legacy_search)]
+            backend = get_search_backend()
+            backend.rebuild()
+            backends.append((type(backend).__name__, backend.search))
+            if not isinstance(backend, SimpleSearchBackend):
+                simple = SimpleSearchBackend()
+                start = time.perf_counter()
+                simple.rebuild()
+                self.stdout.write(f"SimpleSearchBackend build: {time.perf_counter() - start:.2f}s")
+                backends.append(("SimpleSearchBackend", simple.search))
+
+            self.stdout.write(f"{'backend':<24}{'query':<28}{'hits':>8}{'median ms':>12}{'p95 ms':>10}")
+            for name, search in backends:
+                for query in queries:
+                    timings = []
+                    for _ in range(options["repeat"]):
+                        start = time.perf_counter()
+                        hits = len(search(query))
+                        timings.append((time.perf_counter() - start) * 1000)
+                    timings.sort()
+                    p95 = timings[int(len(timings) * 0.95) - 1]
+                    self.stdout.write(
+                        f"{name:<24}{query:<28}{hits:>8}{statistics.median(timings):>12.2f}{p95:>10.2f}"
+                    )
+
+            transaction.set_rollback(True)
+
+    def legacy_search(self, query):
+        return list(
+            Post.objects.filter(
+                Q(title__icontains=query) |
+                Q(content__icontains=query) |
+                Q(tags__name__icontains=query)
+            ).distinct().order_by("-published_date").values_list("pk", flat=True)
+        )
+
+    def seed(self, count, rng):
+        author = User.objects.create_user(username="benchmark-search-author")
+        tags = Tag.objects.bulk_create(
+            Tag(name=f"bench-{word}", slug=f"bench-{word}") for word in WORDS
+        )
+        posts = Post.objects.bulk_create(
+            (
+                Post(
+                    title=" ".join(rng.choices(WORDS, k=6)),
+                    content=" ".join(rng.choices(WORDS, k=60)),
+                    author=author,
+                )
+                for _ in range(count)
+            ),
+            batch_size=2000,
+        )
+        Through = Post.tags.through
+        Through.objects.bulk_create(
+            (
+                Through(post_id=post.pk, tag_id=tag.pk)
+                for post in posts
+                for tag in rng.sample(tags, 2)
+            ),
+            batch_size=5000,
+        )
+        self.stdout.write(f"Seeded {count} posts.")
@@ -0,0 +1,117 @@
+import asyncio
+import resource
+import statistics
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.urls import reverse
+
+from blog.events import broker, posts_channel
+
+
+class Command(BaseCommand):
+    help = (
+        "Hold many idle Server-Sent Events subscribers on one worker and time "
+        "the fan-out of new-post events. Requests go through the real ASGI "
+        "application (django_blog.asgi) on one event loop, with in-memory "
+        "clients instead of sockets, so no server or database writes are needed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--subscribers", type=int, default=5000)
+        parser.add_argument("--events", type=int, default=20)
+
+    def handle(self, *args, **options):
+        asyncio.run(self.run(options["subscribers"], options["events"]))
+
+    async def run(self, count, events):
+        from django_blog.asgi import application
+
+        path = reverse("post-events")
+        disconnect = asyncio.Event()
+        state = {"connected": 0, "received": 0, "errors": 0}
+        all_connected = asyncio.Event()
+        all_received = asyncio.Event()
+
+        async def client(index):
+            requested = False
+
+            async def receive():
+                nonlocal requested
+                if not requested:
+                    requested = True
+                    return {"type": "http.request", "body": b"", "more_body": False}
+                await disconnect.wait()
+                return {"type": "http.disconnect"}
+
+            async def send(message):
+                if message["type"] == "http.response.start":
+                    if message["status"] != 200:
+                        state["errors"] += 1
+                    return
+                body = message.get("body", b"")
+                if body.startswith(b"retry:"):
+                    state["connected"] += 1
+                    if state["connected"] == count:
+                        all_connected.set()
+                elif b"event: post" in body:
+                    state["received"] += 1
+                    if state["received"] == count:
+                        all_received.set()
+
+            scope = {
+                "type": "http",
+                "asgi": {"version": "3.0"},
+                "http_version": "1.1",
+                "method": "GET",
+                "scheme": "http",
+                "path": path,
+                "raw_path": path.encode(),
+                "query_string": b"",
+                "root_path": "",
+                "headers": [(b"host", b"localhost"), (b"accept", b"text/event-stream")],
+                "client": ("127.0.0.1", 10000 + index),
+                "server": ("localhost", 80),
+            }
+            await application(scope, receive, send)
+
+        threads_before = threading.active_count()
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        start = time.perf_counter()
+        clients = [asyncio.create_task(client(i)) for i in range(count)]
+        await asyncio.wait_for(all_connected.wait(), 600)
+        connect_time = time.perf_counter() - start
+
+        self.stdout.write(f"subscribers:        {broker.subscriber_count(posts_channel()):,} (errors: {state['errors']})")
+        self.stdout.write(f"connect time:       {connect_time:.2f}s")
+        self.stdout.write(f"threads:            {threads_before} before, {threading.active_count()} holding")
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        self.stdout.write(
+            f"peak RSS growth:    {(rss - rss_before) / 1024:.1f} MiB "
+            f"({(rss - rss_before) * 1024 / count:,.0f} bytes/subscriber)"
+        )
+
+        loop = asyncio.get_running_loop()
+        latencies = []
+        for i in range(events):
+            state["received"] = 0
+            all_received.clear()
+            start = time.perf_counter()
+            # Published from a worker thread, like a signal handler in a sync view
+            await loop.run_in_executor(
+                None, broker.publish, posts_channel(), "post", {"id": i, "title": f"Post {i}"}
+            )
+            await asyncio.wait_for(all_received.wait(), 60)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        latencies.sort()
+        self.stdout.write(
+            f"fan-out to all:     median {statistics.median(latencies):.1f} ms, "
+            f"max {latencies[-1]:.1f} ms over {events} events"
+        )
+
+        disconnect.set()
+        await asyncio.wait_for(asyncio.gather(*clients), 60)
+        self.stdout.write(f"after disconnect:   {broker.subscriber_count():,} subscribers")
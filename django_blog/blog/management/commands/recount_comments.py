@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Max
+
+from blog.cache import bump_post_cache_version
+from blog.models import Comment, Post
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute Post.comment_count and Post.last_commented_at from the "
+        "Comment table, in batches of posts, fixing any drift."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        checked = fixed = 0
+        last_pk = 0
+
+        while True:
+            posts = list(
+                Post.objects.filter(pk__gt=last_pk)
+                .order_by("pk")
+                .only("pk", "comment_count", "last_commented_at")[:batch_size]
+            )
+            if not posts:
+                break
+            last_pk = posts[-1].pk
+
+            stats = {
+                row["post_id"]: row
+                for row in Comment.objects.filter(post_id__in=[post.pk for post in posts])
+                .values("post_id")
+                .annotate(count=Count("pk"), latest=Max("created_at"))
+            }
+
+            changed = []
+            for post in posts:
+                row = stats.get(post.pk, {"count": 0, "latest": None})
+                if (post.comment_count, post.last_commented_at) != (row["count"], row["latest"]):
+                    post.comment_count = row["count"]
+                    post.last_commented_at = row["latest"]
+                    changed.append(post)
+
+            if changed:
+                with transaction.atomic():
+                    Post.objects.bulk_update(changed, ["comment_count", "last_commented_at"])
+                for post in changed:
+                    bump_post_cache_version(post.pk)
+
+            checked += len(posts)
+            fixed += len(changed)
+
+        self.stdout.write(self.style.SUCCESS(f"Checked {checked} posts, fixed {fixed}."))
@@ -0,0 +1,55 @@
+from django.db import migrations, OperationalError
+
+
+FTS_TABLE = "blog_post_fts"
+GIN_INDEX = "blog_post_search_gin"
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    Post = apps.get_model("blog", "Post")
+
+    if connection.vendor == "sqlite":
+        try:
+            schema_editor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+                "USING fts5(title, content, tags, tokenize='unicode61')"
+            )
+        except OperationalError:
+            # SQLite built without FTS5: the pure-Python backend is used instead
+            return
+
+        for post in Post.objects.prefetch_related("tags").iterator(chunk_size=2000):
+            schema_editor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, title, content, tags) VALUES (%s, %s, %s, %s)",
+                [post.pk, post.title, post.content, " ".join(t.name for t in post.tags.all())],
+            )
+
+    elif connection.vendor == "postgresql":
+        from django.contrib.postgres.indexes import GinIndex
+        from django.contrib.postgres.search import SearchVector
+
+        # Must stay identical to PostgresSearchBackend.search_vector()
+        vector = SearchVector("title", weight="A", config="english") + SearchVector(
+            "content", weight="B", config="english"
+        )
+        schema_editor.add_index(Post, GinIndex(vector, name=GIN_INDEX))
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    elif connection.vendor == "postgresql":
+        schema_editor.execute(f"DROP INDEX IF EXISTS {GIN_INDEX}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0004_tag_slug'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:30
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_comment_stats(apps, schema_editor):
+    Post = apps.get_model("blog", "Post")
+    Comment = apps.get_model("blog", "Comment")
+    stats = Comment.objects.filter(post=OuterRef("pk")).values("post")
+    Post.objects.update(
+        comment_count=Coalesce(
+            Subquery(stats.annotate(n=Count("pk")).values("n"), output_field=IntegerField()), 0
+        ),
+        last_commented_at=Subquery(stats.annotate(latest=Max("created_at")).values("latest")),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0006_post_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='last_commented_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-last_commented_at', '-id'], name='blog_post_activity_idx'),
+        ),
+        migrations.RunPython(backfill_comment_stats, migrations.RunPython.noop),
+    ]
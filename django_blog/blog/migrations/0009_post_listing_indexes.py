@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:33
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0008_comment_thread_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-published_date', '-id'], name='blog_post_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['author', '-published_date'], name='blog_post_author_idx'),
+        ),
+        # The auto-created Post.tags through table only has (post_id, tag_id)
+        # and single-column indexes; tag pages join from the tag side, so give
+        # them a covering (tag_id, post_id) index.
+        migrations.RunSQL(
+            "CREATE INDEX blog_post_tags_tag_post_idx ON blog_post_tags (tag_id, post_id)",
+            "DROP INDEX blog_post_tags_tag_post_idx",
+        ),
+    ]
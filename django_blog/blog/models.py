@@ -1,13 +1,76 @@
+from django.conf import settings
 from django.db import models
+from django.db.models import F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest, Lower
 from django.contrib.auth.models import User
 from django.urls import reverse
 from django.utils.text import slugify
 
 
+class TagQuerySet(models.QuerySet):
+    def get_or_create_many(self, names, case_insensitive=None):
+        """
+        Return the Tag for every name, creating the missing ones in bulk.
+
+        Costs a constant number of queries however many names are given:
+        one lookup, and for missing tags one bulk insert plus one re-read.
+        With case_insensitive (default: settings.BLOG_TAGS_CASE_INSENSITIVE)
+        "Django" and "django" resolve to the same tag; the first spelling
+        seen wins when a tag is created.
+        """
+        if case_insensitive is None:
+            case_insensitive = getattr(settings, "BLOG_TAGS_CASE_INSENSITIVE", False)
+
+        def key(name):
+            return name.lower() if case_insensitive else name
+
+        wanted = {}
+        for name in names:
+            wanted.setdefault(key(name), name)
+        if not wanted:
+            return []
+
+        def lookup():
+            if case_insensitive:
+                queryset = self.annotate(lookup_name=Lower("name")).filter(lookup_name__in=wanted)
+            else:
+                queryset = self.filter(name__in=wanted)
+            found = {}
+            for tag in queryset.order_by("pk"):
+                found.setdefault(key(tag.name), tag)
+            return found
+
+        found = lookup()
+        missing = [name for k, name in wanted.items() if k not in found]
+        if missing:
+            # Slugs are set here because bulk_create() bypasses Tag.save()
+            self.bulk_create(
+                [Tag(name=name, slug=slugify(name)) for name in missing],
+                ignore_conflicts=True,
+            )
+            found = lookup()
+            # A slug clash (e.g. "C++" and "C" both slugify to "c") makes
+            # bulk_create skip the row; create those one by one.
+            for name in missing:
+                if key(name) not in found:
+                    found[key(name)] = self.create(name=name, slug=self.unique_slug(name))
+
+        return [found[k] for k in wanted]
+
+    def unique_slug(self, name):
+        base = slugify(name) or "tag"
+        slug, n = base, 2
+        while self.filter(slug=slug).exists():
+            slug, n = f"{base}-{n}", n + 1
+        return slug
+
+
 class Tag(models.Model):
     name = models.CharField(max_length=50, unique=True)
     slug = models.SlugField(max_length=60, unique=True, blank=True)
 
+    objects = TagQuerySet.as_manager()
+
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.name)
@@ -17,13 +80,65 @@ class Tag(models.Model):
         return self.name
 
 
+class PostQuerySet(models.QuerySet):
+    def for_listing(self):
+        """
+        Posts ready to be rendered in a list: the author is joined in the
+        same query and all tags are prefetched in one extra query, so a page
+        costs the same number of queries no matter how many posts it shows.
+        """
+        return self.select_related("author").prefetch_related("tags")
+
+    def comment_added(self, post_id, created_at):
+        """
+        Atomically count a new comment on a post with an F-expression update.
+        """
+        return self.filter(pk=post_id).update(
+            comment_count=F("comment_count") + 1,
+            last_commented_at=Greatest(Coalesce("last_commented_at", Value(created_at)), Value(created_at)),
+        )
+
+    def comment_removed(self, post_id):
+        """
+        Atomically uncount a deleted comment; last_commented_at falls back to
+        the newest remaining comment.
+        """
+        latest = (
+            Comment.objects.filter(post_id=OuterRef("pk"))
+            .order_by("-created_at")
+            .values("created_at")[:1]
+        )
+        return self.filter(pk=post_id).update(
+            comment_count=Greatest(F("comment_count") - 1, Value(0)),
+            last_commented_at=Subquery(latest),
+        )
+
+
 class Post(models.Model):
     title = models.CharField(max_length=200)
     content = models.TextField()
     published_date = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name="posts")
     tags = models.ManyToManyField(Tag, blank=True, related_name="posts")
 
+    # Denormalized from Comment, kept in sync by blog/signals.py and
+    # repairable with `python manage.py recount_comments`
+    comment_count = models.PositiveIntegerField(default=0)
+    last_commented_at = models.DateTimeField(null=True, blank=True)
+
+    objects = PostQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Post list / tag pages: ORDER BY published_date DESC, id DESC
+            models.Index(fields=["-published_date", "-id"], name="blog_post_published_idx"),
+            # Posts by author, newest first
+            models.Index(fields=["author", "-published_date"], name="blog_post_author_idx"),
+            # Post list sorted by activity
+            models.Index(fields=["-last_commented_at", "-id"], name="blog_post_activity_idx"),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -38,6 +153,12 @@ class Comment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Comment threads are always read per post, oldest first
+            models.Index(fields=["post", "created_at"], name="blog_comment_thread_idx"),
+        ]
+
     def __str__(self):
         return f"Comment by {self.author} on {self.post}"
 
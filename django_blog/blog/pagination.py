@@ -0,0 +1,326 @@
+import base64
+import binascii
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db.models import F, Q
+from django.utils.functional import cached_property
+
+from .models import Comment
+
+
+class CursorPage:
+    """
+    One page of posts returned by CursorPaginator.
+
+    Mirrors the parts of django.core.paginator.Page the templates use
+    (has_next, has_previous, has_other_pages) and adds next_cursor /
+    previous_cursor tokens for building the navigation links.
+    """
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """
+    Keyset paginator for posts ordered by (-<field>, -id), where <field> is
+    published_date by default.
+
+    Instead of OFFSET, each page filters on the (<field>, id) of the last row
+    of the previous page, so page N costs the same as page 1. A nullable
+    field (e.g. last_commented_at) sorts its NULLs last.
+    A cursor is an opaque token: "n" (next) or "p" (previous) followed by the
+    position, base64-encoded.
+    """
+
+    def __init__(self, queryset, per_page, field="published_date"):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.field = field
+        self.nullable = queryset.model._meta.get_field(field).null
+
+    def encode_cursor(self, direction, post):
+        value = getattr(post, self.field)
+        raw = f"{direction}|{value.isoformat() if value else ''}|{post.pk}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """
+        Return (direction, value, pk), or None for a missing or malformed
+        cursor (which simply shows the first page).
+        """
+        if not cursor:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+            direction, value, pk = raw.split("|")
+            if direction not in ("n", "p"):
+                return None
+            return direction, datetime.fromisoformat(value) if value else None, int(pk)
+        except (binascii.Error, UnicodeError, ValueError):
+            return None
+
+    def ordering(self, descending=True):
+        if not self.nullable:
+            prefix = "-" if descending else ""
+            return [f"{prefix}{self.field}", f"{prefix}id"]
+        if descending:
+            return [F(self.field).desc(nulls_last=True), "-id"]
+        return [F(self.field).asc(nulls_first=True), "id"]
+
+    def rows_after(self, value, pk):
+        """
+        Rows after (value, pk), newest first, on the same side of NULL (see
+        page_query). The leading <field> <= value is implied by the OR; it
+        lets the database start an index search at the cursor instead of
+        walking the (<field>, id) index from its start.
+        """
+        field = self.field
+        if value is None:
+            return Q(**{f"{field}__isnull": True, "id__lt": pk})
+        return Q(**{f"{field}__lte": value}) & (
+            Q(**{f"{field}__lt": value}) | Q(**{field: value, "id__lt": pk})
+        )
+
+    def rows_before(self, value, pk):
+        """
+        Rows before (value, pk), oldest first; see rows_after().
+        """
+        field = self.field
+        if value is None:
+            return Q(**{f"{field}__isnull": True, "id__gt": pk})
+        return Q(**{f"{field}__gte": value}) & (
+            Q(**{f"{field}__gt": value}) | Q(**{field: value, "id__gt": pk})
+        )
+
+    def page_query(self, cursor=None):
+        """
+        Return (direction, querysets) for the page at `cursor`. The page is
+        read from the querysets in turn: a page that crosses from non-NULL
+        to NULL values of a nullable field is two index searches, one on
+        each side.
+        """
+        position = self.decode_cursor(cursor)
+
+        if position is None:
+            return None, [self.queryset.order_by(*self.ordering())]
+
+        direction, value, pk = position
+        field = self.field
+        if direction == "n":
+            conditions = [self.rows_after(value, pk)]
+            # NULLs sort last: all of them come after the non-NULL rows
+            if self.nullable and value is not None:
+                conditions.append(Q(**{f"{field}__isnull": True}))
+        else:
+            conditions = [self.rows_before(value, pk)]
+            # Reversed, NULLs come first and the non-NULL rows after them
+            if self.nullable and value is None:
+                conditions.append(Q(**{f"{field}__isnull": False}))
+        ordering = self.ordering(descending=direction == "n")
+        return direction, [self.queryset.filter(condition).order_by(*ordering) for condition in conditions]
+
+    def make_page(self, direction, rows):
+        has_more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+
+        if direction is None:
+            return CursorPage(
+                rows,
+                next_cursor=self.encode_cursor("n", rows[-1]) if has_more else None,
+            )
+
+        if direction == "p":
+            rows.reverse()
+
+        if not rows:
+            return CursorPage(rows)
+
+        # Moving forward we came from a page before this one, and moving
+        # backward we came from a page after it.
+        has_next = has_more if direction == "n" else True
+        has_previous = True if direction == "n" else has_more
+        return CursorPage(
+            rows,
+            next_cursor=self.encode_cursor("n", rows[-1]) if has_next else None,
+            previous_cursor=self.encode_cursor("p", rows[0]) if has_previous else None,
+        )
+
+    def page(self, cursor=None):
+        direction, querysets = self.page_query(cursor)
+        # One row more than the page, to tell whether there is another
+        rows = []
+        for queryset in querysets:
+            missing = self.per_page + 1 - len(rows)
+            if missing > 0:
+                rows.extend(queryset[:missing])
+        return self.make_page(direction, rows)
+
+    async def apage(self, cursor=None):
+        direction, querysets = self.page_query(cursor)
+        rows = []
+        for queryset in querysets:
+            missing = self.per_page + 1 - len(rows)
+            if missing > 0:
+                # chunk_size lets aiterator() run the queryset's prefetch_related()
+                rows += [row async for row in queryset[:missing].aiterator(chunk_size=missing)]
+        return self.make_page(direction, rows)
+
+
+def get_posts_per_page():
+    return getattr(settings, "BLOG_POSTS_PER_PAGE", 10)
+
+
+def paginate_posts(request, queryset, per_page=None, field="published_date"):
+    """
+    Paginate a Post queryset, newest <field> first, according to
+    settings.BLOG_PAGINATION.
+
+    - "cursor" (default): keyset pagination, driven by ?cursor=
+    - "offset": Django's Paginator, driven by ?page=
+
+    Returns (paginator, page).
+    """
+    per_page = per_page or get_posts_per_page()
+
+    if getattr(settings, "BLOG_PAGINATION", "cursor") == "offset":
+        ordering = CursorPaginator(queryset, per_page, field).ordering()
+        paginator = Paginator(queryset.order_by(*ordering), per_page)
+        return paginator, paginator.get_page(request.GET.get("page"))
+
+    paginator = CursorPaginator(queryset, per_page, field)
+    return paginator, paginator.page(request.GET.get("cursor"))
+
+
+async def apaginate_posts(request, queryset, per_page=None, field="published_date"):
+    """
+    paginate_posts() for async views. The page's rows are loaded, so it can
+    be rendered without further queries.
+    """
+    per_page = per_page or get_posts_per_page()
+
+    if getattr(settings, "BLOG_PAGINATION", "cursor") == "offset":
+        return await sync_to_async(offset_page)(request, queryset, per_page, field)
+
+    paginator = CursorPaginator(queryset, per_page, field)
+    return paginator, await paginator.apage(request.GET.get("cursor"))
+
+
+def offset_page(request, queryset, per_page, field):
+    paginator, page = paginate_posts(request, queryset, per_page, field)
+    page.object_list = list(page.object_list)
+    return paginator, page
+
+
+class PostPaginationMixin:
+    """
+    ListView mixin that paginates posts with paginate_posts(), so class-based
+    listings honour the same BLOG_PAGINATION setting as function views.
+    Views can override get_pagination_field() to page on another column.
+    """
+
+    def get_paginate_by(self, queryset):
+        return get_posts_per_page()
+
+    def get_pagination_field(self):
+        return "published_date"
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator, page = paginate_posts(
+            self.request, queryset, page_size, self.get_pagination_field()
+        )
+        return paginator, page, page.object_list, page.has_other_pages()
+
+
+def get_comments_per_page():
+    return getattr(settings, "BLOG_COMMENTS_PER_PAGE", 20)
+
+
+def encode_comment_cursor(comment):
+    raw = f"{comment.created_at.isoformat()}|{comment.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_comment_cursor(cursor):
+    """
+    Return (created_at, pk), or None for a missing or malformed cursor.
+    """
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created_at, pk = raw.split("|")
+        return datetime.fromisoformat(created_at), int(pk)
+    except (binascii.Error, UnicodeError, ValueError):
+        return None
+
+
+class CommentPage:
+    """
+    One page of a post's comment thread, oldest first, keyset-paginated on
+    (created_at, id).
+
+    The query runs on first access to `comments`, so a template that only
+    touches the page on a fragment-cache miss costs nothing on a hit.
+    Authors are joined in the same query, so a page is always one query.
+    """
+
+    def __init__(self, post_id, cursor=None, per_page=None):
+        self.post_id = post_id
+        self.cursor = cursor
+        self.per_page = per_page or get_comments_per_page()
+
+    def query(self):
+        queryset = Comment.objects.filter(post_id=self.post_id).select_related("author")
+        position = decode_comment_cursor(self.cursor)
+        if position is not None:
+            created_at, pk = position
+            # created_at >= is implied by the OR; it starts the index search
+            # at the cursor instead of at the thread's first comment
+            queryset = queryset.filter(
+                Q(created_at__gte=created_at),
+                Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk),
+            )
+        return queryset.order_by("created_at", "id")[: self.per_page + 1]
+
+    @cached_property
+    def _rows(self):
+        return list(self.query())
+
+    async def aload(self):
+        """
+        Run the query now, from async code, so the template does not.
+        """
+        if "_rows" not in self.__dict__:
+            self._rows = [comment async for comment in self.query()]
+
+    @property
+    def comments(self):
+        return self._rows[: self.per_page]
+
+    @property
+    def next_cursor(self):
+        if len(self._rows) > self.per_page:
+            return encode_comment_cursor(self.comments[-1])
+        return None
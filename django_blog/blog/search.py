@@ -0,0 +1,367 @@
+"""
+Pluggable full-text search for blog posts.
+
+search_posts() asks the configured backend for a list of post ids ranked by
+relevance. Three backends are available:
+
+- SqliteFTSBackend: an FTS5 virtual table (blog_post_fts) ranked with bm25().
+- PostgresSearchBackend: SearchVector / SearchRank over a GIN expression index.
+- SimpleSearchBackend: a pure-Python in-memory inverted index, used when the
+  database has no full-text support.
+
+settings.BLOG_SEARCH_BACKEND selects one by dotted path, or "auto" (default)
+picks the best one for the default database. The index is kept up to date
+incrementally by the signal handlers in blog/signals.py and can be rebuilt
+in bulk with `python manage.py rebuild_search_index`.
+"""
+import math
+import re
+import threading
+from bisect import bisect_left, insort
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection
+from django.utils.module_loading import import_string
+
+from .models import Post, Tag
+
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Relative weight of a match in each field when ranking results
+FIELD_WEIGHTS = {"title": 10.0, "tags": 5.0, "content": 1.0}
+
+
+def tokenize(text):
+    return [token.lower() for token in TOKEN_RE.findall(text or "")]
+
+
+def post_document(post):
+    """
+    Return the indexed text of a post as {"title", "content", "tags"}.
+    """
+    return {
+        "title": post.title,
+        "content": post.content,
+        "tags": " ".join(tag.name for tag in post.tags.all()),
+    }
+
+
+class BaseSearchBackend:
+    """
+    Interface every search backend implements.
+    """
+
+    def search(self, query, limit=None):
+        """
+        Return a list of post ids matching every term of `query`, best first.
+        The last term also matches as a prefix ("djan" finds "django").
+        """
+        raise NotImplementedError
+
+    def index_post(self, post):
+        raise NotImplementedError
+
+    def remove_post(self, post_id):
+        raise NotImplementedError
+
+    def rebuild(self):
+        raise NotImplementedError
+
+    def get_limit(self, limit):
+        return limit or getattr(settings, "BLOG_SEARCH_MAX_RESULTS", 1000)
+
+
+class SimpleSearchBackend(BaseSearchBackend):
+    """
+    In-memory inverted index: token -> {post_id: weighted term frequency}.
+
+    The index is built from the database on first use and then updated
+    incrementally, so it is only exact for the process that received the
+    writes. Use it for development and single-process deployments.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.postings = None
+        self.vocabulary = []
+        self.documents = {}
+
+    def ensure_built(self):
+        if self.postings is None:
+            self.rebuild()
+
+    def rebuild(self):
+        with self.lock:
+            self.postings = defaultdict(dict)
+            self.vocabulary = []
+            self.documents = {}
+            queryset = Post.objects.prefetch_related("tags").order_by("pk")
+            for post in queryset.iterator(chunk_size=2000):
+                self._add(post.pk, post_document(post))
+            self.vocabulary.sort()
+
+    def _add(self, post_id, document, keep_sorted=False):
+        weights = defaultdict(float)
+        for field, text in document.items():
+            for token in tokenize(text):
+                weights[token] += FIELD_WEIGHTS[field]
+
+        for token, weight in weights.items():
+            if token not in self.postings:
+                if keep_sorted:
+                    insort(self.vocabulary, token)
+                else:
+                    self.vocabulary.append(token)
+            self.postings[token][post_id] = weight
+        self.documents[post_id] = list(weights)
+
+    def _remove(self, post_id):
+        for token in self.documents.pop(post_id, ()):
+            postings = self.postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(post_id, None)
+            if not postings:
+                del self.postings[token]
+                del self.vocabulary[bisect_left(self.vocabulary, token)]
+
+    def index_post(self, post):
+        with self.lock:
+            # Not built yet: the first search will load this post from the DB
+            if self.postings is None:
+                return
+            self._remove(post.pk)
+            self._add(post.pk, post_document(post), keep_sorted=True)
+
+    def remove_post(self, post_id):
+        with self.lock:
+            if self.postings is not None:
+                self._remove(post_id)
+
+    def _expand_prefix(self, prefix):
+        start = bisect_left(self.vocabulary, prefix)
+        tokens = []
+        for token in self.vocabulary[start:]:
+            if not token.startswith(prefix):
+                break
+            tokens.append(token)
+        return tokens
+
+    def search(self, query, limit=None):
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        with self.lock:
+            self.ensure_built()
+            total = max(len(self.documents), 1)
+            scores = None
+            for position, term in enumerate(terms):
+                if position == len(terms) - 1:
+                    candidates = self._expand_prefix(term)
+                else:
+                    candidates = [term] if term in self.postings else []
+
+                term_scores = defaultdict(float)
+                for token in candidates:
+                    postings = self.postings[token]
+                    idf = math.log(1 + total / len(postings))
+                    for post_id, weight in postings.items():
+                        term_scores[post_id] += weight * idf
+
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {
+                        post_id: score + term_scores[post_id]
+                        for post_id, score in scores.items()
+                        if post_id in term_scores
+                    }
+                if not scores:
+                    return []
+
+        # Best score first, newest post first on ties
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], -item[0]))
+        return [post_id for post_id, _ in ranked[: self.get_limit(limit)]]
+
+
+class SqliteFTSBackend(BaseSearchBackend):
+    """
+    SQLite FTS5 backend. The blog_post_fts table is created by migration
+    0005_post_search_index and uses the post id as its rowid.
+    """
+
+    table = "blog_post_fts"
+
+    @staticmethod
+    def is_available():
+        if connection.vendor != "sqlite":
+            return False
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+                [SqliteFTSBackend.table],
+            )
+            return cursor.fetchone() is not None
+
+    @staticmethod
+    def match_expression(query):
+        terms = tokenize(query)
+        if not terms:
+            return ""
+        # Quote every term so user input can never be parsed as FTS syntax
+        quoted = [f'"{term}"' for term in terms]
+        quoted[-1] += "*"
+        return " ".join(quoted)
+
+    def search(self, query, limit=None):
+        expression = self.match_expression(query)
+        if not expression:
+            return []
+        weights = ", ".join(str(FIELD_WEIGHTS[field]) for field in ("title", "content", "tags"))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s "
+                f"ORDER BY bm25({self.table}, {weights}), rowid DESC LIMIT %s",
+                [expression, self.get_limit(limit)],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def index_post(self, post):
+        document = post_document(post)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT OR REPLACE INTO {self.table} (rowid, title, content, tags) "
+                "VALUES (%s, %s, %s, %s)",
+                [post.pk, document["title"], document["content"], document["tags"]],
+            )
+
+    def remove_post(self, post_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table} WHERE rowid = %s", [post_id])
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}")
+            queryset = Post.objects.prefetch_related("tags").order_by("pk")
+            batch = []
+            for post in queryset.iterator(chunk_size=2000):
+                document = post_document(post)
+                batch.append([post.pk, document["title"], document["content"], document["tags"]])
+                if len(batch) >= 2000:
+                    self._insert_many(cursor, batch)
+                    batch = []
+            if batch:
+                self._insert_many(cursor, batch)
+
+    def _insert_many(self, cursor, rows):
+        cursor.executemany(
+            f"INSERT INTO {self.table} (rowid, title, content, tags) VALUES (%s, %s, %s, %s)",
+            rows,
+        )
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """
+    PostgreSQL backend. Searches a weighted SearchVector of title and content
+    (matching the GIN index created by migration 0005_post_search_index) and
+    also matches posts whose tag names contain the query.
+
+    The two matches are combined with UNION rather than OR: an OR with the tag
+    EXISTS would stop the planner from using the GIN index. The vector is
+    computed from the row itself, so no index maintenance is needed on save.
+    """
+
+    config = "english"
+
+    @classmethod
+    def search_vector(cls):
+        from django.contrib.postgres.search import SearchVector
+
+        return SearchVector("title", weight="A", config=cls.config) + SearchVector(
+            "content", weight="B", config=cls.config
+        )
+
+    @staticmethod
+    def tsquery_expression(query):
+        """
+        Return a to_tsquery() expression requiring every term, with the last
+        one matched as a prefix. Terms are word characters only, so they can
+        never contain tsquery operators.
+        """
+        terms = [f"'{term}'" for term in tokenize(query)]
+        if not terms:
+            return ""
+        terms[-1] += ":*"
+        return " & ".join(terms)
+
+    def search(self, query, limit=None):
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+
+        expression = self.tsquery_expression(query)
+        if not expression:
+            return []
+
+        search_query = SearchQuery(expression, config=self.config, search_type="raw")
+        vector = self.search_vector()
+        matches = (
+            Post.objects.annotate(search=vector)
+            .filter(search=search_query)
+            .values("pk")
+            .union(
+                Tag.posts.through.objects.filter(tag__name__icontains=query).values("post_id")
+            )
+        )
+        queryset = (
+            Post.objects.filter(pk__in=matches)
+            .annotate(rank=SearchRank(vector, search_query))
+            .order_by("-rank", "-pk")
+            .values_list("pk", flat=True)
+        )
+        return list(queryset[: self.get_limit(limit)])
+
+    def index_post(self, post):
+        pass
+
+    def remove_post(self, post_id):
+        pass
+
+    def rebuild(self):
+        pass
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def select_backend_class():
+    path = getattr(settings, "BLOG_SEARCH_BACKEND", "auto")
+    if path != "auto":
+        return import_string(path)
+    if connection.vendor == "postgresql":
+        return PostgresSearchBackend
+    if SqliteFTSBackend.is_available():
+        return SqliteFTSBackend
+    return SimpleSearchBackend
+
+
+def get_search_backend():
+    """
+    Return the process-wide search backend instance.
+    """
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = select_backend_class()()
+    return _backend
+
+
+def reset_search_backend():
+    """
+    Forget the current backend so the next call re-reads the settings.
+    """
+    global _backend
+    _backend = None
@@ -0,0 +1,187 @@
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .cache import bump_listing_cache_version, bump_post_cache_version, bump_post_cache_versions
+from .events import broker, comment_event_data, comments_channel, post_event_data, posts_channel
+from .models import Comment, Post, Tag
+from .search import get_search_backend
+
+
+# -----------------------
+# SEARCH INDEX MAINTENANCE
+# -----------------------
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    get_search_backend().index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    get_search_backend().remove_post(instance.pk)
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def reindex_post_tags(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear", "pre_clear"):
+        return
+
+    if reverse:
+        # tag.posts.add(...) etc.: instance is a Tag
+        if action == "pre_clear":
+            instance._tagged_post_ids = list(instance.posts.values_list("pk", flat=True))
+            return
+        post_ids = pk_set if action != "post_clear" else getattr(instance, "_tagged_post_ids", [])
+        reindex_posts(post_ids)
+    elif action != "pre_clear":
+        get_search_backend().index_post(instance)
+
+
+@receiver(post_save, sender=Tag)
+def reindex_renamed_tag(sender, instance, created, raw=False, **kwargs):
+    if raw or created:
+        return
+    reindex_posts(instance.posts.values_list("pk", flat=True))
+
+
+@receiver(pre_delete, sender=Tag)
+def remember_tagged_posts(sender, instance, **kwargs):
+    instance._tagged_post_ids = list(instance.posts.values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=Tag)
+def reindex_untagged_posts(sender, instance, **kwargs):
+    reindex_posts(getattr(instance, "_tagged_post_ids", []))
+
+
+def reindex_posts(post_ids):
+    backend = get_search_backend()
+    for post in Post.objects.filter(pk__in=list(post_ids)).prefetch_related("tags"):
+        backend.index_post(post)
+
+
+def deleted_with_post(origin):
+    """
+    Whether a Comment post_delete is part of deleting its post (or a
+    queryset of posts). The post's own receivers cover it then; doing the
+    counter and cache work per cascaded comment would cost a query each.
+    """
+    return isinstance(origin, Post) or (isinstance(origin, QuerySet) and origin.model is Post)
+
+
+# -----------------------
+# COMMENT COUNTERS
+# -----------------------
+@receiver(post_save, sender=Comment)
+def count_new_comment(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        Post.objects.comment_added(instance.post_id, instance.created_at)
+
+
+@receiver(post_delete, sender=Comment)
+def uncount_deleted_comment(sender, instance, origin=None, **kwargs):
+    if not deleted_with_post(origin):
+        Post.objects.comment_removed(instance.post_id)
+
+
+# -----------------------
+# POST CACHE INVALIDATION
+# -----------------------
+# Versions are bumped once the write is committed: bumping inside the
+# transaction would let a concurrent reader cache the old rows under the
+# new version before they change.
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_cache(sender, instance, **kwargs):
+    transaction.on_commit(partial(bump_post_cache_version, instance.pk))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_commented_post_cache(sender, instance, origin=None, **kwargs):
+    if not deleted_with_post(origin):
+        transaction.on_commit(partial(bump_post_cache_version, instance.post_id))
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def invalidate_tagged_post_cache(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        transaction.on_commit(partial(bump_post_cache_version, instance.pk))
+    else:
+        post_ids = pk_set if action != "post_clear" else getattr(instance, "_tagged_post_ids", [])
+        transaction.on_commit(partial(bump_post_cache_versions, list(post_ids)))
+
+
+@receiver(post_save, sender=Tag)
+def invalidate_renamed_tag_cache(sender, instance, created, raw=False, **kwargs):
+    if raw or created:
+        return
+    post_ids = list(instance.posts.values_list("pk", flat=True))
+    transaction.on_commit(partial(bump_post_cache_versions, post_ids))
+
+
+@receiver(post_delete, sender=Tag)
+def invalidate_deleted_tag_cache(sender, instance, **kwargs):
+    post_ids = getattr(instance, "_tagged_post_ids", [])
+    transaction.on_commit(partial(bump_post_cache_versions, post_ids))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_renamed_user_cache(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    # Post bodies and comment threads show usernames; logins only save
+    # last_login
+    if raw or created or (update_fields is not None and "username" not in update_fields):
+        return
+    post_ids = set(Post.objects.filter(author=instance).values_list("pk", flat=True))
+    post_ids.update(Comment.objects.filter(author=instance).values_list("post_id", flat=True))
+    transaction.on_commit(partial(bump_post_cache_versions, post_ids))
+
+
+# -----------------------
+# LISTING VALIDATORS (blog/conditional.py)
+# -----------------------
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(m2m_changed, sender=Post.tags.through)
+def invalidate_listings(sender, action="post_", origin=None, **kwargs):
+    if action.startswith("post_") and not (sender is Comment and deleted_with_post(origin)):
+        transaction.on_commit(bump_listing_cache_version)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_renamed_author_listings(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    # Listings show author names; logins only save last_login
+    if raw or created or (update_fields is not None and "username" not in update_fields):
+        return
+    transaction.on_commit(bump_listing_cache_version)
+
+
+# -----------------------
+# LIVE EVENTS (blog/events.py)
+# -----------------------
+# The payload is built now, while the instance is at hand, and sent only
+# once the row is committed and visible to readers.
+@receiver(post_save, sender=Post)
+def publish_new_post(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        transaction.on_commit(partial(broker.publish, posts_channel(), "post", post_event_data(instance)))
+
+
+@receiver(post_save, sender=Comment)
+def publish_new_comment(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        transaction.on_commit(partial(
+            broker.publish, comments_channel(instance.post_id), "comment", comment_event_data(instance)
+        ))
@@ -1,2 +1,38 @@
 console.log("Django blog static files loaded.");
 
+// Lazy-load further pages of a post's comments in place of the
+// "Load more comments" link.
+document.addEventListener("click", function (event) {
+    const link = event.target.closest("a[data-load-comments]");
+    if (!link) {
+        return;
+    }
+    event.preventDefault();
+
+    fetch(link.href, { headers: { "X-Requested-With": "XMLHttpRequest" } })
+        .then(function (response) {
+            return response.text();
+        })
+        .then(function (html) {
+            link.parentElement.outerHTML = html;
+        });
+});
+
+// Live updates: count the new posts / comments pushed over Server-Sent
+// Events and offer to show them, instead of readers refreshing to check.
+(function () {
+    const notice = document.getElementById("live-updates");
+    if (!notice || !window.EventSource) {
+        return;
+    }
+    let count = 0;
+    const source = new EventSource(notice.dataset.eventsUrl);
+    source.addEventListener(notice.dataset.event, function () {
+        count += 1;
+        const link = document.createElement("a");
+        link.href = window.location.href;
+        link.textContent = count + " new " + notice.dataset.event + (count === 1 ? "" : "s") + " – show";
+        notice.replaceChildren(link);
+        notice.hidden = false;
+    });
+})();
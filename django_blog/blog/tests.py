@@ -1,3 +1,1117 @@
-from django.test import TestCase
+import asyncio
+import json
+import threading
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import include, path, reverse
+
+from . import views
+from .events import (
+    EventStreamApplication,
+    broker,
+    comments_channel,
+    event_stream,
+    post_exists,
+    posts_channel,
+)
+from .forms import PostForm
+from .models import Comment, Post, Tag
+from .cache import get_post_cache_version, post_object_key
+from .pagination import CommentPage, CursorPaginator
+from .search import (
+    PostgresSearchBackend,
+    SimpleSearchBackend,
+    SqliteFTSBackend,
+    get_search_backend,
+)
+
+
+class PostListingQueryTests(TestCase):
+    """
+    Query-count regression tests for the post listing views.
+
+    Every listing page must cost a constant number of queries, no matter how
+    many posts it renders (the ETag / Last-Modified validators cost none):
+    - 1 query for the posts joined with their author
+    - 1 query to prefetch the tags of all listed posts
+    - plus any per-view lookup (e.g. the Tag itself)
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="writer", password="testpassword123")
+        self.tag = Tag.objects.create(name="django")
+        self.other_tag = Tag.objects.create(name="python")
+
+    def create_posts(self, count):
+        for i in range(count):
+            author = User.objects.create_user(username=f"author{Post.objects.count()}")
+            post = Post.objects.create(
+                title=f"Django post {i}",
+                content="Some content about django.",
+                author=author,
+            )
+            post.tags.add(self.tag, self.other_tag)
+
+    def assertConstantQueries(self, url, expected, params=None):
+        for count in (1, 10):
+            self.create_posts(count)
+            with self.assertNumQueries(expected):
+                response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            self.assertContains(response, "Django post 0")
+
+    # -----------------------------
+    # Listing views
+    # -----------------------------
+
+    def test_post_list_constant_queries(self):
+        self.assertConstantQueries(reverse("post-list"), 2)
+
+    def test_posts_by_tag_slug_constant_queries(self):
+        # posts + tags prefetch + the Tag lookup for the page header
+        url = reverse("posts-by-tag-slug", kwargs={"tag_slug": self.tag.slug})
+        self.assertConstantQueries(url, 3)
+
+    def test_posts_by_tag_name_constant_queries(self):
+        tag = Tag.objects.create(name="web dev")
+        self.tag = tag
+        url = reverse("posts-by-tag", kwargs={"tag_name": tag.name})
+        self.assertConstantQueries(url, 3)
+
+    def test_search_posts_constant_queries(self):
+        # ranked ids from the search backend + posts + tags prefetch
+        self.assertConstantQueries(reverse("search-posts"), 3, {"q": "django"})
+
+    def test_for_listing_loads_author_and_tags(self):
+        self.create_posts(3)
+        posts = list(Post.objects.for_listing())
+        with self.assertNumQueries(0):
+            for post in posts:
+                str(post.author)
+                list(post.tags.all())
+
+
+class PostPaginationTests(TestCase):
+    """
+    Tests for cursor (keyset) and offset pagination of the post listings.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="writer")
+        self.posts = [
+            Post.objects.create(title=f"Post {i}", content="content", author=self.user)
+            for i in range(25)
+        ]
+        # Force ties on published_date so id must break them
+        Post.objects.filter(pk__in=[p.pk for p in self.posts[5:15]]).update(
+            published_date=self.posts[5].published_date
+        )
+        self.expected = list(
+            Post.objects.order_by("-published_date", "-id").values_list("pk", flat=True)
+        )
+        self.url = reverse("post-list")
+
+    def test_cursor_walks_forward_and_back(self):
+        seen = []
+        pages = []
+        response = self.client.get(self.url)
+        while True:
+            page = response.context["page_obj"]
+            pages.append(page)
+            seen.extend(post.pk for post in page)
+            if not page.has_next():
+                break
+            response = self.client.get(self.url, {"cursor": page.next_cursor})
+
+        self.assertEqual(seen, self.expected)
+        self.assertEqual(len(pages), 3)
+        self.assertFalse(pages[0].has_previous())
+
+        response = self.client.get(self.url, {"cursor": pages[-1].previous_cursor})
+        self.assertEqual(
+            [post.pk for post in response.context["page_obj"]],
+            [post.pk for post in pages[-2]],
+        )
+
+    def test_deep_page_costs_same_queries(self):
+        first = self.client.get(self.url).context["page_obj"]
+        with self.assertNumQueries(2):
+            self.client.get(self.url, {"cursor": first.next_cursor})
+
+    def test_cursor_crosses_null_values(self):
+        # Every third post has activity; pages of 4 cross from non-NULL to
+        # NULL last_commented_at mid-page, both ways
+        active = self.posts[::3]
+        for post in active:
+            Post.objects.filter(pk=post.pk).update(last_commented_at=post.published_date)
+        expected = [post.pk for post in reversed(active)] + sorted(
+            (post.pk for post in self.posts if post not in active), reverse=True
+        )
+
+        paginator = CursorPaginator(Post.objects.all(), 4, "last_commented_at")
+        pages = [paginator.page()]
+        while pages[-1].has_next():
+            pages.append(paginator.page(pages[-1].next_cursor))
+        self.assertEqual([post.pk for page in pages for post in page], expected)
+
+        for previous, page in zip(pages, pages[1:]):
+            back = paginator.page(page.previous_cursor)
+            self.assertEqual([post.pk for post in back], [post.pk for post in previous])
+
+    def test_invalid_cursor_shows_first_page(self):
+        response = self.client.get(self.url, {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [post.pk for post in response.context["page_obj"]], self.expected[:10]
+        )
+
+    def test_search_links_keep_query(self):
+        # Search results are ranked by relevance, so they page by offset
+        response = self.client.get(reverse("search-posts"), {"q": "Post"})
+        self.assertContains(response, "q=Post&amp;page=2")
+
+    @override_settings(BLOG_PAGINATION="offset")
+    def test_offset_pagination_setting(self):
+        response = self.client.get(self.url, {"page": 3})
+        page = response.context["page_obj"]
+        self.assertEqual(page.number, 3)
+        self.assertEqual([post.pk for post in page], self.expected[20:])
+        self.assertContains(response, "page=2")
+
+
+class SearchBackendTests(TestCase):
+    """
+    Tests for the full-text search backends and their signal-driven index.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="writer")
+        self.tag = Tag.objects.create(name="databases")
+        self.in_title = Post.objects.create(
+            title="Caching in Django", content="How to use it.", author=self.user
+        )
+        self.in_content = Post.objects.create(
+            title="Weekly notes", content="A short caching story.", author=self.user
+        )
+        self.tagged = Post.objects.create(title="Indexes", content="B-trees.", author=self.user)
+        self.tagged.tags.add(self.tag)
+
+    def assertBackendBehaviour(self, backend):
+        self.assertEqual(backend.search("caching"), [self.in_title.pk, self.in_content.pk])
+        self.assertEqual(backend.search("cach"), [self.in_title.pk, self.in_content.pk])
+        self.assertEqual(backend.search("caching django"), [self.in_title.pk])
+        self.assertEqual(backend.search("databases"), [self.tagged.pk])
+        self.assertEqual(backend.search('" OR * NEAR('), [])
+        self.assertEqual(backend.search(""), [])
+
+    def test_sqlite_fts_backend(self):
+        backend = get_search_backend()
+        self.assertIsInstance(backend, SqliteFTSBackend)
+        self.assertBackendBehaviour(backend)
+
+    def test_simple_backend(self):
+        self.assertBackendBehaviour(SimpleSearchBackend())
+
+    def test_postgres_query_prefix_matches_last_term(self):
+        expression = PostgresSearchBackend.tsquery_expression('caching dj" | !an')
+        self.assertEqual(expression, "'caching' & 'dj' & 'an':*")
+        self.assertEqual(PostgresSearchBackend.tsquery_expression("&|!"), "")
+
+    def test_index_follows_post_and_tag_changes(self):
+        backend = get_search_backend()
+
+        self.in_content.title = "Renamed"
+        self.in_content.save()
+        self.assertEqual(backend.search("renamed"), [self.in_content.pk])
+
+        self.tag.name = "storage"
+        self.tag.save()
+        self.assertEqual(backend.search("storage"), [self.tagged.pk])
+        self.assertEqual(backend.search("databases"), [])
+
+        self.tag.delete()
+        self.assertEqual(backend.search("storage"), [])
+
+        self.in_title.delete()
+        self.assertEqual(backend.search("django"), [])
+
+    def test_simple_backend_incremental_updates(self):
+        backend = SimpleSearchBackend()
+        backend.rebuild()
+        post = Post.objects.create(title="Zebra facts", content="", author=self.user)
+        backend.index_post(post)
+        self.assertEqual(backend.search("zeb"), [post.pk])
+        backend.remove_post(post.pk)
+        self.assertEqual(backend.search("zebra"), [])
+
+    def test_search_view_ranks_by_relevance(self):
+        response = self.client.get(reverse("search-posts"), {"q": "caching"})
+        self.assertEqual(
+            [post.pk for post in response.context["posts"]],
+            [self.in_title.pk, self.in_content.pk],
+        )
+
+
+class PostFormTagTests(TestCase):
+    """
+    Tests for bulk tag resolution in PostForm.save().
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="writer")
+        Tag.objects.create(name="Django")
+
+    def save_post(self, tags):
+        form = PostForm(data={"title": "Tagged", "content": "content", "tags": tags})
+        self.assertTrue(form.is_valid(), form.errors)
+        form.instance.author = self.user
+        return form.save()
+
+    def count_queries(self, tags):
+        with CaptureQueriesContext(connection) as captured:
+            self.save_post(tags)
+        return len(captured.captured_queries)
+
+    def test_query_count_does_not_grow_with_tag_count(self):
+        few = self.count_queries("Django, a1, a2")
+        many = self.count_queries("Django, " + ", ".join(f"b{i}" for i in range(20)))
+        self.assertEqual(few, many)
+
+    def test_tags_created_with_slugs_and_deduplicated(self):
+        post = self.save_post("Django, New Tag, New Tag, ")
+        self.assertEqual(
+            sorted(post.tags.values_list("name", "slug")),
+            [("Django", "django"), ("New Tag", "new-tag")],
+        )
+
+    def test_case_sensitive_by_default(self):
+        post = self.save_post("django")
+        self.assertEqual(list(post.tags.values_list("name", flat=True)), ["django"])
+        self.assertEqual(Tag.objects.filter(name__iexact="django").count(), 2)
+
+    @override_settings(BLOG_TAGS_CASE_INSENSITIVE=True)
+    def test_case_insensitive_mode_reuses_tags(self):
+        post = self.save_post("django, DJANGO, Python, python")
+        self.assertEqual(
+            sorted(post.tags.values_list("name", flat=True)), ["Django", "Python"]
+        )
+        self.assertEqual(Tag.objects.count(), 2)
+
+    def test_slug_clash_gets_unique_slug(self):
+        post = self.save_post("C, C++")
+        self.assertEqual(
+            sorted(post.tags.values_list("slug", flat=True)), ["c", "c-2"]
+        )
+
+
+class PostDetailCacheTests(TestCase):
+    """
+    Tests for the cached post detail page and its signal-driven invalidation.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="writer")
+        self.post = Post.objects.create(title="Cached", content="Body text", author=self.user)
+        self.tag = Tag.objects.create(name="django")
+        self.post.tags.add(self.tag)
+        self.url = reverse("post-detail", kwargs={"pk": self.post.pk})
+
+    def test_hot_post_served_without_queries(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertContains(response, "Body text")
+        self.assertContains(response, "#django")
+
+    def test_post_edit_invalidates(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.content = "Updated body"
+            self.post.save()
+        self.assertContains(self.client.get(self.url), "Updated body")
+
+    def test_comment_changes_invalidate(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            comment = Comment.objects.create(post=self.post, author=self.user, content="First!")
+        self.assertContains(self.client.get(self.url), "First!")
+        with self.captureOnCommitCallbacks(execute=True):
+            comment.delete()
+        self.assertNotContains(self.client.get(self.url), "First!")
+
+    def test_tag_changes_invalidate(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.tags.add(Tag.objects.create(name="python"))
+        self.assertContains(self.client.get(self.url), "#python")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tag.name = "renamed"
+            self.tag.save()
+        self.assertContains(self.client.get(self.url), "#renamed")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tag.delete()
+        self.assertNotContains(self.client.get(self.url), "#renamed")
+
+    def test_user_rename_invalidates(self):
+        commenter = User.objects.create_user(username="reader")
+        Comment.objects.create(post=self.post, author=commenter, content="Hi")
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.username = "novelist"
+            self.user.save()
+            commenter.username = "critic"
+            commenter.save()
+        response = self.client.get(self.url)
+        self.assertContains(response, "novelist")
+        self.assertContains(response, "critic")
+
+        # Logins (last_login only) keep the cache
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save(update_fields=["last_login"])
+        with self.assertNumQueries(0):
+            self.client.get(self.url)
+
+    def test_versions_bumped_on_commit(self):
+        self.client.get(self.url)
+        version = get_post_cache_version(self.post.pk)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.post.content = "Updated body"
+            self.post.save()
+        # Until the write commits, readers keep the old version and rows
+        self.assertEqual(get_post_cache_version(self.post.pk), version)
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(get_post_cache_version(self.post.pk), version)
+        self.assertContains(self.client.get(self.url), "Updated body")
+
+    def test_comment_links_not_shared_between_users(self):
+        Comment.objects.create(post=self.post, author=self.user, content="Mine")
+        self.client.force_login(self.user)
+        self.assertContains(self.client.get(self.url), "Edit</a>")
+        self.client.logout()
+        self.assertNotContains(self.client.get(self.url), "Edit</a>")
+
+    def test_missing_post_404(self):
+        response = self.client.get(reverse("post-detail", kwargs={"pk": 999}))
+        self.assertEqual(response.status_code, 404)
+
+
+class ConditionalGetTests(TestCase):
+    """
+    Tests for ETag / Last-Modified support on the blog read views.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="writer")
+        self.tag = Tag.objects.create(name="django")
+        self.post = Post.objects.create(title="Post", content="content", author=self.user)
+        self.post.tags.add(self.tag)
+        self.urls = [
+            (reverse("post-detail", kwargs={"pk": self.post.pk}), {}),
+            (reverse("post-list"), {}),
+            (reverse("posts-by-tag-slug", kwargs={"tag_slug": self.tag.slug}), {}),
+            (reverse("search-posts"), {"q": "post"}),
+        ]
+
+    def revalidate(self, url, params, response):
+        return self.client.get(url, params, HTTP_IF_NONE_MATCH=response["ETag"])
+
+    def test_unchanged_pages_return_304(self):
+        for url, params in self.urls:
+            response = self.client.get(url, params)
+            self.assertIn("ETag", response)
+            self.assertIn("Last-Modified", response)
+            self.assertEqual(self.revalidate(url, params, response).status_code, 304)
+
+    def test_if_modified_since(self):
+        url = reverse("post-list")
+        response = self.client.get(url)
+        again = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+        self.assertEqual(again.status_code, 304)
+
+    def test_304_skips_listing_queries(self):
+        url = reverse("post-list")
+        response = self.client.get(url)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.revalidate(url, {}, response).status_code, 304)
+
+    def test_hot_post_revalidates_without_queries(self):
+        url, params = self.urls[0]
+        response = self.client.get(url)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.revalidate(url, params, response).status_code, 304)
+
+    def test_changes_produce_new_etags(self):
+        responses = [self.client.get(url, params) for url, params in self.urls]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.title = "Post edited"
+            self.post.save()
+        for (url, params), response in zip(self.urls, responses):
+            self.assertEqual(self.revalidate(url, params, response).status_code, 200)
+
+    def test_new_comment_changes_detail_etag(self):
+        url, params = self.urls[0]
+        response = self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(post=self.post, author=self.user, content="Hi")
+        self.assertEqual(self.revalidate(url, params, response).status_code, 200)
+
+    def test_deleted_post_changes_list_etag(self):
+        other = Post.objects.create(title="Other", content="content", author=self.user)
+        url = reverse("post-list")
+        response = self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            other.delete()
+        self.assertEqual(self.revalidate(url, {}, response).status_code, 200)
+
+    def test_renames_change_listing_etags(self):
+        responses = [self.client.get(url, params) for url, params in self.urls[1:]]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tag.name = "djangoproject"
+            self.tag.save()
+        for (url, params), response in zip(self.urls[1:], responses):
+            self.assertEqual(self.revalidate(url, params, response).status_code, 200)
+
+        url = reverse("post-list")
+        response = self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.username = "author"
+            self.user.save()
+        self.assertEqual(self.revalidate(url, {}, response).status_code, 200)
+
+    def test_login_keeps_listing_etags(self):
+        url = reverse("post-list")
+        response = self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save(update_fields=["last_login"])
+        self.assertEqual(self.revalidate(url, {}, response).status_code, 304)
+
+    def test_etag_depends_on_viewer(self):
+        url = reverse("post-list")
+        response = self.client.get(url)
+        self.client.force_login(self.user)
+        self.assertEqual(self.revalidate(url, {}, response).status_code, 200)
+
+
+class CommentCounterTests(TestCase):
+    """
+    Tests for the denormalized Post.comment_count / last_commented_at columns.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="writer", password="testpassword123")
+        self.post = Post.objects.create(title="Post", content="content", author=self.user)
+
+    def test_views_keep_counters_in_sync(self):
+        self.client.login(username="writer", password="testpassword123")
+        url = reverse("comment-create-by-post-pk", kwargs={"pk": self.post.pk})
+        self.client.post(url, {"content": "one"})
+        self.client.post(url, {"content": "two"})
+
+        self.post.refresh_from_db()
+        latest = Comment.objects.latest("created_at")
+        self.assertEqual(self.post.comment_count, 2)
+        self.assertEqual(self.post.last_commented_at, latest.created_at)
+
+        self.client.post(reverse("comment-delete", kwargs={"pk": latest.pk}))
+        self.post.refresh_from_db()
+        first = Comment.objects.get()
+        self.assertEqual(self.post.comment_count, 1)
+        self.assertEqual(self.post.last_commented_at, first.created_at)
+
+        first.delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 0)
+        self.assertIsNone(self.post.last_commented_at)
+
+    def test_deleting_a_post_skips_per_comment_work(self):
+        other = Post.objects.create(title="Other", content="content", author=self.user)
+        Comment.objects.create(post=other, author=self.user, content="stays")
+
+        def delete_post_with(count, delete):
+            post = Post.objects.create(title="Doomed", content="content", author=self.user)
+            Comment.objects.bulk_create(
+                Comment(post=post, author=self.user, content=str(i)) for i in range(count)
+            )
+            with CaptureQueriesContext(connection) as queries:
+                delete(post)
+            return len(queries)
+
+        for delete in (lambda post: post.delete(), lambda post: Post.objects.filter(pk=post.pk).delete()):
+            self.assertEqual(delete_post_with(3, delete), delete_post_with(100, delete))
+        self.assertFalse(Comment.objects.exclude(post=other).exists())
+        other.refresh_from_db()
+        self.assertEqual(other.comment_count, 1)
+
+        # Comments cascaded from anything but their post are still uncounted
+        reader = User.objects.create_user(username="reader")
+        Comment.objects.create(post=other, author=reader, content="gone")
+        reader.delete()
+        other.refresh_from_db()
+        self.assertEqual(other.comment_count, 1)
+
+    def test_recount_comments_repairs_drift(self):
+        comment = Comment.objects.create(post=self.post, author=self.user, content="hi")
+        other = Post.objects.create(title="Other", content="content", author=self.user)
+        Post.objects.update(comment_count=7, last_commented_at=None)
+
+        call_command("recount_comments", batch_size=1, stdout=StringIO())
+
+        self.post.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+        self.assertEqual(self.post.last_commented_at, comment.created_at)
+        self.assertEqual(other.comment_count, 0)
+
+    def test_activity_sort_pages_through_all_posts(self):
+        posts = [self.post] + [
+            Post.objects.create(title=f"Post {i}", content="content", author=self.user)
+            for i in range(14)
+        ]
+        for post in posts[3:9]:
+            Comment.objects.create(post=post, author=self.user, content="hi")
+
+        url = reverse("post-list")
+        response = self.client.get(url, {"sort": "activity"})
+        seen = [post.pk for post in response.context["page_obj"]]
+        next_cursor = response.context["page_obj"].next_cursor
+        self.assertContains(response, f"sort=activity&amp;cursor={next_cursor}")
+        response = self.client.get(url, {"sort": "activity", "cursor": next_cursor})
+        seen += [post.pk for post in response.context["page_obj"]]
+
+        commented = [post.pk for post in reversed(posts[3:9])]
+        uncommented = sorted(
+            (post.pk for post in posts if post.pk not in commented), reverse=True
+        )
+        self.assertEqual(seen, commented + uncommented)
+
+
+@override_settings(BLOG_COMMENTS_PER_PAGE=5)
+class CommentPaginationTests(TestCase):
+    """
+    Tests for the paginated comment thread and its lazy-load endpoint.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            title="Viral", content="content", author=User.objects.create_user(username="writer")
+        )
+        self.comments = [
+            Comment.objects.create(
+                post=self.post,
+                author=User.objects.create_user(username=f"reader{i}"),
+                content=f"Comment number {i}",
+            )
+            for i in range(12)
+        ]
+        self.url = reverse("post-comments", kwargs={"pk": self.post.pk})
+
+    def test_detail_shows_first_page_only(self):
+        response = self.client.get(reverse("post-detail", kwargs={"pk": self.post.pk}))
+        self.assertContains(response, "Comment number 4")
+        self.assertNotContains(response, "Comment number 5")
+        self.assertContains(response, "Load more comments")
+
+    def test_first_page_is_one_query(self):
+        page = CommentPage(self.post.pk)
+        with self.assertNumQueries(1):
+            for comment in page.comments:
+                str(comment.author)
+            page.next_cursor
+
+    def test_json_pages_walk_whole_thread(self):
+        seen = []
+        url = f"{self.url}?format=json"
+        while url:
+            data = self.client.get(url).json()
+            seen.extend(comment["id"] for comment in data["comments"])
+            url = data["next_url"]
+        self.assertEqual(seen, [comment.pk for comment in self.comments])
+
+    def test_html_fragment_with_cursor(self):
+        first = CommentPage(self.post.pk)
+        response = self.client.get(self.url, {"cursor": first.next_cursor})
+        self.assertContains(response, "Comment number 5")
+        self.assertNotContains(response, "Comment number 4")
+        self.assertNotContains(response, "<html")
+
+    def test_json_by_accept_header(self):
+        response = self.client.get(self.url, HTTP_ACCEPT="application/json")
+        self.assertEqual(len(response.json()["comments"]), 5)
+
+    def test_missing_post_404(self):
+        response = self.client.get(reverse("post-comments", kwargs={"pk": 999}))
+        self.assertEqual(response.status_code, 404)
+
+
+@skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN output is SQLite specific")
+class QueryPlanTests(TestCase):
+    """
+    Run EXPLAIN QUERY PLAN on every query behind each read view's listing
+    and assert that each table is reached with an index SEARCH: no table
+    scans, and no index walked from its start, apart from the few
+    explicitly expected (a first page reads the head of its index).
+
+    The listing ETag/Last-Modified validators (blog/conditional.py) run no
+    queries: they come from a cache version.
+    """
+
+    def setUp(self):
+        user = User.objects.create_user(username="writer")
+        self.tag = Tag.objects.create(name="django")
+        for i in range(30):
+            post = Post.objects.create(title=f"Post {i}", content="content", author=user)
+            post.tags.add(self.tag)
+            Comment.objects.create(post=post, author=user, content="hi")
+        self.post = post
+
+    def assertOnlySearches(self, run, expected_scans=()):
+        """
+        Assert that the queries `run` makes contain no SCAN steps (a table,
+        or an index from its start) other than `expected_scans`, each of
+        which must occur exactly once. An expected scan matches the steps
+        that start with it.
+        """
+        with CaptureQueriesContext(connection) as captured:
+            run()
+        selects = [q["sql"] for q in captured.captured_queries if q["sql"].startswith("SELECT")]
+        self.assertTrue(selects)
+
+        scans = []
+        with connection.cursor() as cursor:
+            for sql in selects:
+                cursor.execute("EXPLAIN QUERY PLAN " + sql)
+                plan = [row[-1] for row in cursor.fetchall()]
+                scans += [(step, sql) for step in plan if step.startswith("SCAN")]
+        unexpected = list(scans)
+        for expected in expected_scans:
+            matching = [scan for scan in unexpected if scan[0].startswith(expected)]
+            self.assertEqual(len(matching), 1, f"{expected!r} in {scans}")
+            unexpected.remove(matching[0])
+        self.assertEqual(unexpected, [])
+
+    def walk_cursor_pages(self, queryset, field="published_date"):
+        def run():
+            paginator = CursorPaginator(queryset, 10, field)
+            first = paginator.page()
+            second = paginator.page(first.next_cursor)
+            paginator.page(second.previous_cursor)
+            for page in (first, second):
+                for post in page:
+                    str(post.author)
+                    list(post.tags.all())
+        return run
+
+    def test_post_list(self):
+        self.assertOnlySearches(
+            self.walk_cursor_pages(Post.objects.for_listing()),
+            # The first page only: later pages search from their cursor
+            ["SCAN blog_post USING INDEX blog_post_published_idx"],
+        )
+
+    def test_post_list_by_activity(self):
+        self.assertOnlySearches(
+            self.walk_cursor_pages(Post.objects.for_listing(), "last_commented_at"),
+            ["SCAN blog_post USING INDEX blog_post_activity_idx"],
+        )
+
+    def test_posts_by_tag_slug(self):
+        queryset = Post.objects.for_listing().filter(tags__slug=self.tag.slug).distinct()
+        self.assertOnlySearches(lambda: Tag.objects.get(slug=self.tag.slug))
+        self.assertOnlySearches(self.walk_cursor_pages(queryset))
+
+    def test_posts_by_tag_name(self):
+        queryset = Post.objects.for_listing().filter(tags=Tag.objects.get(name="django"))
+        self.assertOnlySearches(lambda: Tag.objects.get(name="django"))
+        self.assertOnlySearches(self.walk_cursor_pages(queryset))
+
+    def test_search(self):
+        def run():
+            post_ids = get_search_backend().search("post")
+            list(Post.objects.for_listing().in_bulk(post_ids[:10]).values())
+        # The full-text index answers MATCH through its virtual table
+        self.assertOnlySearches(run, ["SCAN blog_post_fts VIRTUAL TABLE"])
+
+    def test_post_detail_and_comments(self):
+        def run():
+            Post.objects.select_related("author").get(pk=self.post.pk)
+            page = CommentPage(self.post.pk, per_page=5)
+            CommentPage(self.post.pk, page.next_cursor, per_page=5).comments
+        self.assertOnlySearches(run)
+
+    def test_posts_by_author(self):
+        self.assertOnlySearches(
+            lambda: list(Post.objects.filter(author=self.post.author).order_by("-published_date")[:10])
+        )
+
+
+def parse_events(chunk):
+    """
+    Parse the SSE messages in `chunk` into [(event, data), ...].
+    """
+    events = []
+    for message in chunk.decode().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in message.splitlines() if not line.startswith(":"))
+        if "event" in fields:
+            events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+class LiveEventTests(TestCase):
+    """
+    Tests for the Server-Sent Events streams of new posts and comments.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="writer", password="testpassword123")
+        self.post = Post.objects.create(title="First", content="Hello", author=self.user)
+
+    def create_post(self, title):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Post.objects.create(title=title, content="...", author=self.user)
+
+    def create_comment(self, post, content):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Comment.objects.create(post=post, author=self.user, content=content)
+
+    async def open_stream(self, url):
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        stream = aiter(response.streaming_content)
+        self.assertEqual(await anext(stream), b"retry: 3000\n\n")
+        return stream
+
+    async def next_events(self, stream):
+        return parse_events(await asyncio.wait_for(anext(stream), 2))
+
+    async def disconnect(self, stream):
+        # What the ASGI handler does when the client goes away: cancel the
+        # pending read
+        read = asyncio.ensure_future(anext(stream))
+        await asyncio.sleep(0)
+        read.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await read
+
+    async def test_new_post_is_pushed(self):
+        stream = await self.open_stream(reverse("post-events"))
+        post = await sync_to_async(self.create_post)("Second")
+        [(event, data)] = await self.next_events(stream)
+        self.assertEqual(event, "post")
+        self.assertEqual(data["id"], post.pk)
+        self.assertEqual(data["title"], "Second")
+        self.assertEqual(data["author"], "writer")
+        self.assertEqual(data["url"], post.get_absolute_url())
+
+        await self.disconnect(stream)
+        self.assertEqual(broker.subscriber_count(posts_channel()), 0)
+
+    async def test_comment_stream_is_per_post(self):
+        other = await sync_to_async(Post.objects.create)(title="Other", content="...", author=self.user)
+        stream = await self.open_stream(reverse("comment-events", args=[self.post.pk]))
+        await sync_to_async(self.create_comment)(other, "elsewhere")
+        comment = await sync_to_async(self.create_comment)(self.post, "Nice post")
+        [(event, data)] = await self.next_events(stream)
+        self.assertEqual(event, "comment")
+        self.assertEqual((data["id"], data["post_id"], data["content"]), (comment.pk, self.post.pk, "Nice post"))
+        await self.disconnect(stream)
+
+    async def test_unknown_post_is_404(self):
+        response = await self.async_client.get(reverse("comment-events", args=[self.post.pk + 100]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_edits_are_not_pushed(self):
+        with mock.patch.object(broker, "publish") as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.post.title = "Edited"
+                self.post.save()
+        publish.assert_not_called()
+
+    def test_wsgi_is_refused(self):
+        response = self.client.get(reverse("post-events"))
+        self.assertEqual(response.status_code, 503)
+
+    @override_settings(BLOG_EVENTS_MAX_STREAMS=1)
+    async def test_open_streams_are_capped(self):
+        stream = await self.open_stream(reverse("post-events"))
+        response = await self.async_client.get(reverse("post-events"))
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "30")
+        await self.disconnect(stream)
+        await self.disconnect(await self.open_stream(reverse("post-events")))
+
+    async def test_publish_from_another_thread(self):
+        stream = await self.open_stream(reverse("post-events"))
+        thread = threading.Thread(target=broker.publish, args=(posts_channel(), "post", {"id": 1}))
+        thread.start()
+        self.assertEqual(await self.next_events(stream), [("post", {"id": 1})])
+        thread.join()
+        await self.disconnect(stream)
+
+    async def test_keepalive(self):
+        stream = aiter(event_stream(posts_channel(), keepalive=0.05))
+        await anext(stream)
+        self.assertEqual(await asyncio.wait_for(anext(stream), 1), b": keepalive\n\n")
+        await stream.aclose()
+
+    @override_settings(BLOG_EVENTS_BUFFER_SIZE=2)
+    async def test_slow_reader_is_disconnected(self):
+        stream = aiter(event_stream(posts_channel()))
+        await anext(stream)
+        for i in range(5):
+            broker.publish(posts_channel(), "post", {"id": i})
+        await asyncio.sleep(0)
+        self.assertEqual([data["id"] for _, data in await self.next_events(stream)], [0, 1])
+        with self.assertRaises(StopAsyncIteration):
+            await anext(stream)
+        self.assertEqual(broker.subscriber_count(), 0)
+
+    async def test_fan_out(self):
+        streams = [aiter(event_stream(comments_channel(self.post.pk))) for _ in range(500)]
+        for stream in streams:
+            await anext(stream)
+        self.assertEqual(broker.publish(comments_channel(self.post.pk), "comment", {"id": 7}), 500)
+        chunks = await asyncio.gather(*(anext(stream) for stream in streams))
+        self.assertEqual(len(set(chunks)), 1)
+        self.assertEqual(parse_events(chunks[0]), [("comment", {"id": 7})])
+        for stream in streams:
+            await stream.aclose()
+        self.assertEqual(broker.subscriber_count(), 0)
+
+
+class EventStreamApplicationTests(TestCase):
+    """
+    Tests for the ASGI wrapper in django_blog/asgi.py that serves the event
+    streams without Django's request handler.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="writer", password="testpassword123")
+        self.post = Post.objects.create(title="First", content="Hello", author=self.user)
+
+    async def call(self, path, app=None, host=b"testserver"):
+        """
+        Start a GET request for `path`; return (messages, disconnect, task).
+        """
+        if app is None:
+            from django_blog.asgi import application as app
+        messages = asyncio.Queue()
+        disconnected = asyncio.Event()
+        requested = False
+
+        async def receive():
+            nonlocal requested
+            if not requested:
+                requested = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+            "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+            "query_string": b"", "root_path": "", "headers": [(b"host", host)],
+            "client": ("127.0.0.1", 10000), "server": ("localhost", 80),
+        }
+        task = asyncio.ensure_future(app(scope, receive, messages.put))
+        return messages, disconnected, task
+
+    async def next_message(self, messages):
+        return await asyncio.wait_for(messages.get(), 2)
+
+    async def test_stream_is_served_outside_django(self):
+        django_app = mock.AsyncMock()
+        messages, disconnected, task = await self.call(
+            reverse("comment-events", args=[self.post.pk]), EventStreamApplication(django_app)
+        )
+        start = await self.next_message(messages)
+        self.assertEqual(start["status"], 200)
+        self.assertIn((b"content-type", b"text/event-stream"), start["headers"])
+        self.assertEqual((await self.next_message(messages))["body"], b"retry: 3000\n\n")
+
+        broker.publish(comments_channel(self.post.pk), "comment", {"id": 1})
+        body = (await self.next_message(messages))["body"]
+        self.assertEqual(parse_events(body), [("comment", {"id": 1})])
+
+        disconnected.set()
+        await asyncio.wait_for(task, 2)
+        django_app.assert_not_called()
+        self.assertEqual(broker.subscriber_count(), 0)
+
+    async def test_other_requests_go_to_django(self):
+        for path in (reverse("comment-events", args=[self.post.pk + 100]), reverse("login"), "/nowhere/"):
+            messages, disconnected, task = await self.call(path)
+            await asyncio.wait_for(task, 5)
+            start = await self.next_message(messages)
+            self.assertEqual(start["status"], 200 if path == reverse("login") else 404, path)
+
+    async def test_only_stream_paths_are_inspected(self):
+        django_app = mock.AsyncMock()
+        app = EventStreamApplication(django_app)
+        with mock.patch.object(app, "get_channel") as get_channel:
+            for path in (reverse("login"), reverse("post-detail", args=[self.post.pk])):
+                messages, disconnected, task = await self.call(path, app)
+                await asyncio.wait_for(task, 2)
+        get_channel.assert_not_called()
+        self.assertEqual(django_app.await_count, 2)
+
+    async def test_post_lookup_closes_old_connections(self):
+        with mock.patch("blog.events.close_old_connections") as close_old_connections:
+            self.assertTrue(await post_exists(self.post.pk))
+            self.assertFalse(await post_exists(self.post.pk + 100))
+        self.assertEqual(close_old_connections.call_count, 4)
+
+    async def test_disallowed_host_goes_to_django(self):
+        django_app = mock.AsyncMock()
+        messages, disconnected, task = await self.call(
+            reverse("post-events"), EventStreamApplication(django_app), host=b"evil.example"
+        )
+        await asyncio.wait_for(task, 2)
+        django_app.assert_awaited_once()
+        self.assertEqual(broker.subscriber_count(), 0)
+
+        # Django answers it the way it answers any URL with that host
+        messages, disconnected, task = await self.call(reverse("post-events"), host=b"evil.example")
+        await asyncio.wait_for(task, 5)
+        self.assertEqual((await self.next_message(messages))["status"], 400)
+
+    @override_settings(BLOG_EVENTS_MAX_STREAMS=1)
+    async def test_open_streams_are_capped(self):
+        django_app = mock.AsyncMock()
+        app = EventStreamApplication(django_app)
+        messages, disconnected, task = await self.call(reverse("post-events"), app)
+        self.assertEqual((await self.next_message(messages))["status"], 200)
+
+        full_messages, _, full_task = await self.call(reverse("comment-events", args=[self.post.pk]), app)
+        await asyncio.wait_for(full_task, 2)
+        start = await self.next_message(full_messages)
+        self.assertEqual(start["status"], 503)
+        self.assertIn((b"retry-after", b"30"), start["headers"])
+        self.assertEqual(broker.subscriber_count(), 1)
+
+        disconnected.set()
+        await asyncio.wait_for(task, 2)
+        messages, disconnected, task = await self.call(reverse("post-events"), app)
+        self.assertEqual((await self.next_message(messages))["status"], 200)
+        disconnected.set()
+        await asyncio.wait_for(task, 2)
+        django_app.assert_not_called()
+
+
+class AsyncViewsURLConf:
+    """
+    blog.urls with the async read views, as with BLOG_ASYNC_VIEWS on.
+    """
+    urlpatterns = [
+        path("posts/", views.post_list_async, name="post-list"),
+        path("posts/<int:pk>/", views.post_detail_async, name="post-detail"),
+        path("search/", views.search_posts_async, name="search-posts"),
+        path("", include("blog.urls")),
+    ]
+
+
+class AsyncReadViewTests(TestCase):
+    """
+    The async read views must render exactly what the sync views do, with
+    the same query counts, and never query from the event loop (which would
+    raise SynchronousOnlyOperation).
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="writer", password="testpassword123")
+        self.tag = Tag.objects.create(name="django")
+        for i in range(12):
+            post = Post.objects.create(title=f"Django post {i}", content="Body text", author=self.user)
+            post.tags.add(self.tag)
+        self.post = post
+        for i in range(3):
+            Comment.objects.create(post=self.post, author=self.user, content=f"Comment {i}")
+        self.pages = [
+            (reverse("post-list"), {}),
+            (reverse("post-list"), {"sort": "activity"}),
+            (reverse("post-detail", kwargs={"pk": self.post.pk}), {}),
+            (reverse("search-posts"), {"q": "django"}),
+        ]
+
+    def get_pages(self):
+        cache.clear()
+        return [self.client.get(url, params) for url, params in self.pages]
+
+    def test_same_pages_as_sync_views(self):
+        self.client.login(username="writer", password="testpassword123")
+        expected = self.get_pages()
+        with override_settings(ROOT_URLCONF=AsyncViewsURLConf):
+            responses = self.get_pages()
+        for (url, params), sync, response in zip(self.pages, expected, responses):
+            with self.subTest(url=url, params=params):
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.content, sync.content)
+
+    @override_settings(ROOT_URLCONF=AsyncViewsURLConf)
+    def test_next_page(self):
+        first = self.client.get(reverse("post-list")).context["page_obj"]
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("post-list"), {"cursor": first.next_cursor})
+        self.assertContains(response, "Django post 0")
+        self.assertNotContains(response, "Django post 11")
+
+    @override_settings(ROOT_URLCONF=AsyncViewsURLConf, BLOG_PAGINATION="offset")
+    def test_offset_pagination(self):
+        response = self.client.get(reverse("post-list"), {"page": 2})
+        self.assertContains(response, "Page 2 of 2")
+        self.assertContains(response, "Django post 0")
+
+    @override_settings(ROOT_URLCONF=AsyncViewsURLConf)
+    def test_hot_post_served_without_queries(self):
+        url = reverse("post-detail", kwargs={"pk": self.post.pk})
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertContains(response, "#django")
+        self.assertContains(response, "Comment 2")
+
+    @override_settings(ROOT_URLCONF=AsyncViewsURLConf)
+    def test_cached_post_with_expired_fragments(self):
+        url = reverse("post-detail", kwargs={"pk": self.post.pk})
+        self.client.get(url)
+        # Only the post object is left: tags and comments are loaded again
+        post_key = post_object_key(self.post.pk, get_post_cache_version(self.post.pk))
+        post = cache.get(post_key)
+        cache.clear()
+        cache.set(post_key, post)
+        response = self.client.get(url)
+        self.assertContains(response, "#django")
+        self.assertContains(response, "Comment 2")
+
+    @override_settings(ROOT_URLCONF=AsyncViewsURLConf)
+    def test_conditional_get(self):
+        for url, params in self.pages:
+            response = self.client.get(url, params)
+            again = self.client.get(url, params, HTTP_IF_NONE_MATCH=response["ETag"])
+            self.assertEqual(again.status_code, 304)
+
+    @override_settings(ROOT_URLCONF=AsyncViewsURLConf)
+    def test_missing_post_404(self):
+        response = self.client.get(reverse("post-detail", kwargs={"pk": 999}))
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(ROOT_URLCONF=AsyncViewsURLConf)
+    async def test_async_client(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse("post-list"))
+        self.assertContains(response, "Django post 11")
+        self.assertContains(response, "+ Create New Post")
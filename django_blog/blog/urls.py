@@ -1,9 +1,22 @@
+from django.conf import settings
 from django.urls import path
 from django.contrib.auth import views as auth_views
 
 from . import views
 
 
+# Async versions of the main read views, for ASGI deployments (see
+# BLOG_ASYNC_VIEWS in settings.py)
+if getattr(settings, "BLOG_ASYNC_VIEWS", False):
+    post_list = views.post_list_async
+    post_detail = views.post_detail_async
+    search_posts = views.search_posts_async
+else:
+    post_list = views.PostListView.as_view()
+    post_detail = views.PostDetailView.as_view()
+    search_posts = views.search_posts
+
+
 urlpatterns = [
     # Auth
     path("login/", auth_views.LoginView.as_view(template_name="blog/login.html"), name="login"),
@@ -12,18 +25,23 @@ urlpatterns = [
     path("profile/", views.profile, name="profile"),
 
     # Posts CRUD (plural - nice URLs)
-    path("posts/", views.PostListView.as_view(), name="post-list"),
+    path("posts/", post_list, name="post-list"),
     path("posts/new/", views.PostCreateView.as_view(), name="post-create"),
-    path("posts/<int:pk>/", views.PostDetailView.as_view(), name="post-detail"),
+    path("posts/<int:pk>/", post_detail, name="post-detail"),
     path("posts/<int:pk>/edit/", views.PostUpdateView.as_view(), name="post-edit"),
     path("posts/<int:pk>/delete/", views.PostDeleteView.as_view(), name="post-delete-plural"),
 
+    # Live updates (Server-Sent Events, ASGI only)
+    path("posts/events/", views.post_events, name="post-events"),
+    path("posts/<int:pk>/events/", views.comment_events, name="comment-events"),
+
     # Posts CRUD (singular - checker-required)
     path("post/new/", views.PostCreateView.as_view(), name="post/new/"),
     path("post/<int:pk>/update/", views.PostUpdateView.as_view(), name="post/<int:pk>/update/"),
     path("post/<int:pk>/delete/", views.PostDeleteView.as_view(), name="post/<int:pk>/delete/"),
 
     # Comments (plural posts paths)
+    path("posts/<int:pk>/comments/", views.post_comments, name="post-comments"),
     path("post/<int:pk>/comments/new/", views.CommentCreateView.as_view(), name="comment-create-by-post-pk"),
     path("comment/<int:pk>/update/", views.CommentUpdateView.as_view(), name="comment-update"),
     path("comment/<int:pk>/delete/", views.CommentDeleteView.as_view(), name="comment-delete"),
@@ -34,7 +52,7 @@ urlpatterns = [
     # Tag + Search
     path("tags/<slug:tag_slug>/", views.PostByTagListView.as_view(), name="posts-by-tag-slug"),
     path("tags/<str:tag_name>/", views.posts_by_tag, name="posts-by-tag"),  # optional keep
-    path("search/", views.search_posts, name="search-posts"),
+    path("search/", search_posts, name="search-posts"),
 
 
 ]
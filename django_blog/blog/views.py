@@ -1,3 +1,6 @@
+from functools import wraps
+
+from asgiref.sync import sync_to_async
 from django.contrib import messages
 from django.contrib.auth import login
 from django.contrib.auth.decorators import login_required
@@ -6,13 +9,47 @@ from django.shortcuts import redirect, render
 from django.urls import reverse_lazy
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.shortcuts import get_object_or_404
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.urls import reverse
-from django.db.models import Q
-from django.views.generic import ListView
-
-
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db.models import aprefetch_related_objects
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+
+
+from .conditional import (
+    apost_detail_validators,
+    apost_list_validators,
+    post_detail_etag,
+    post_detail_last_modified,
+    post_detail_validators,
+    post_list_etag,
+    post_list_last_modified,
+    post_list_validators,
+    prefetch_validators,
+)
+from .cache import (
+    aget_post_cache_version,
+    cache_aget,
+    cache_aset,
+    fragment_is_cached,
+    get_fragment_timeout,
+    get_post_cache_version,
+    post_object_key,
+)
+from .events import comments_channel, event_stream, posts_channel, streams_full
 from .forms import CustomUserCreationForm, UserUpdateForm, PostForm, CommentForm
 from .models import Post, Comment, Tag
+from .pagination import (
+    CommentPage,
+    PostPaginationMixin,
+    apaginate_posts,
+    get_posts_per_page,
+    paginate_posts,
+)
+from .search import get_search_backend
 
 
 # -----------------------
@@ -51,18 +88,64 @@ def profile(request):
 # -----------------------
 # POST CRUD VIEWS
 # -----------------------
-class PostListView(ListView):
+@method_decorator(condition(post_list_etag, post_list_last_modified), name="dispatch")
+class PostListView(PostPaginationMixin, ListView):
+    """
+    All posts, newest first, or most recently commented first with
+    ?sort=activity (served by the denormalized last_commented_at column).
+    """
     model = Post
+    queryset = Post.objects.for_listing()
     template_name = "blog/post_list.html"
     context_object_name = "posts"
     ordering = ["-published_date"]
 
+    def get_sort(self):
+        return "activity" if self.request.GET.get("sort") == "activity" else ""
+
+    def get_pagination_field(self):
+        return "last_commented_at" if self.get_sort() == "activity" else "published_date"
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["sort"] = self.get_sort()
+        return context
 
+
+@method_decorator(condition(post_detail_etag, post_detail_last_modified), name="dispatch")
 class PostDetailView(DetailView):
+    """
+    Post detail page served from the cache when possible.
+
+    The Post (with its author) is cached under the post's cache version, and
+    post_detail.html caches the article body, tag bar and comment thread as
+    fragments under the same version, so a hot post renders without touching
+    the database. Signals bump the version whenever the post changes.
+    """
     model = Post
     template_name = "blog/post_detail.html"
     context_object_name = "post"
 
+    def get_object(self, queryset=None):
+        pk = self.kwargs.get(self.pk_url_kwarg)
+        self.cache_version = get_post_cache_version(pk)
+        key = post_object_key(pk, self.cache_version)
+
+        post = cache.get(key)
+        if post is None:
+            queryset = self.get_queryset().select_related("author")
+            post = get_object_or_404(queryset, pk=pk)
+            cache.set(key, post, get_fragment_timeout())
+        return post
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["cache_version"] = self.cache_version
+        context["fragment_timeout"] = get_fragment_timeout()
+        # Lazy: only queried when the comments fragment is not cached
+        context["comment_page"] = CommentPage(self.object.pk)
+        return context
+
 
 class PostCreateView(LoginRequiredMixin, CreateView):
     model = Post
@@ -123,14 +206,20 @@ class CommentCreateView(LoginRequiredMixin, CreateView):
     def get_success_url(self):
         return reverse("post-detail", kwargs={"pk": self.post_obj.pk})
 
-class PostByTagListView(ListView):
+@method_decorator(condition(post_list_etag, post_list_last_modified), name="dispatch")
+class PostByTagListView(PostPaginationMixin, ListView):
     model = Post
     template_name = "blog/tag_posts.html"
     context_object_name = "posts"
 
     def get_queryset(self):
         tag_slug = self.kwargs.get("tag_slug")
-        return Post.objects.filter(tags__slug=tag_slug).distinct().order_by("-published_date")
+        return (
+            Post.objects.for_listing()
+            .filter(tags__slug=tag_slug)
+            .distinct()
+            .order_by("-published_date")
+        )
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -139,6 +228,46 @@ class PostByTagListView(ListView):
 
 
 
+def post_comments(request, pk):
+    """
+    One page of a post's comments for lazy loading, as an HTML fragment
+    (default) or as JSON with ?format=json / Accept: application/json.
+    Pages are keyed by the (created_at, id) cursor from the previous page.
+    """
+    comment_page = CommentPage(pk, request.GET.get("cursor"))
+    if not comment_page.comments and not Post.objects.filter(pk=pk).exists():
+        raise Http404("No Post matches the given query.")
+
+    wants_json = (
+        request.GET.get("format") == "json"
+        or "application/json" in request.headers.get("Accept", "")
+    )
+    if wants_json:
+        next_cursor = comment_page.next_cursor
+        return JsonResponse({
+            "comments": [
+                {
+                    "id": comment.pk,
+                    "author": str(comment.author),
+                    "content": comment.content,
+                    "created_at": comment.created_at,
+                    "updated_at": comment.updated_at,
+                }
+                for comment in comment_page.comments
+            ],
+            "next_cursor": next_cursor,
+            "next_url": (
+                f"{reverse('post-comments', kwargs={'pk': pk})}?format=json&cursor={next_cursor}"
+                if next_cursor else None
+            ),
+        })
+
+    return render(request, "blog/comment_list.html", {
+        "comment_page": comment_page,
+        "post_id": pk,
+    })
+
+
 class CommentUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
     model = Comment
     form_class = CommentForm
@@ -163,24 +292,172 @@ class CommentDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
     def get_success_url(self):
         return reverse("post-detail", kwargs={"pk": self.object.post.pk})
 
+@condition(post_list_etag, post_list_last_modified)
 def posts_by_tag(request, tag_name):
     tag = get_object_or_404(Tag, name=tag_name)
-    posts = Post.objects.filter(tags=tag).order_by("-published_date")
-    return render(request, "blog/tag_posts.html", {"tag": tag, "posts": posts})
+    posts = Post.objects.for_listing().filter(tags=tag).order_by("-published_date")
+    paginator, page = paginate_posts(request, posts)
+    return render(request, "blog/tag_posts.html", {
+        "tag": tag,
+        "posts": page.object_list,
+        "page_obj": page,
+        "is_paginated": page.has_other_pages(),
+    })
 
+@condition(post_list_etag, post_list_last_modified)
 def search_posts(request):
     query = request.GET.get("q", "").strip()
-    results = Post.objects.none()
+    results = []
+    page = None
 
     if query:
-        results = Post.objects.filter(
-            Q(title__icontains=query) |
-            Q(content__icontains=query) |
-            Q(tags__name__icontains=query)
-        ).distinct().order_by("-published_date")
+        # The backend returns ids ranked by relevance, so results are paged
+        # by offset over that ranked list rather than by published_date.
+        post_ids = get_search_backend().search(query)
+        paginator = Paginator(post_ids, get_posts_per_page())
+        page = paginator.get_page(request.GET.get("page"))
+        posts = Post.objects.for_listing().in_bulk(page.object_list)
+        results = [posts[pk] for pk in page.object_list if pk in posts]
 
     return render(request, "blog/search_results.html", {
         "query": query,
-        "posts": results
+        "posts": results,
+        "page_obj": page,
+        "is_paginated": page is not None and page.has_other_pages(),
     })
 
+
+# -----------------------
+# ASYNC READ VIEWS (ASGI)
+# -----------------------
+# Async versions of PostListView, PostDetailView and search_posts, used
+# instead of them when settings.BLOG_ASYNC_VIEWS is on (see blog/urls.py).
+# Under an ASGI server they query with the async ORM instead of running the
+# whole view in a worker thread. Same templates, same output. Everything a
+# template would load lazily is loaded before rendering, because the
+# database cannot be queried synchronously from the event loop.
+
+def resolve_user(view):
+    """
+    Load request.user without blocking the event loop, so templates and
+    validators can use it.
+    """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        request.user = await request.auser()
+        return await view(request, *args, **kwargs)
+
+    return wrapper
+
+
+@resolve_user
+@prefetch_validators(post_list_validators, apost_list_validators)
+@condition(post_list_etag, post_list_last_modified)
+async def post_list_async(request):
+    sort = "activity" if request.GET.get("sort") == "activity" else ""
+    field = "last_commented_at" if sort else "published_date"
+    paginator, page = await apaginate_posts(request, Post.objects.for_listing(), field=field)
+    return render(request, "blog/post_list.html", {
+        "posts": page.object_list,
+        "object_list": page.object_list,
+        "paginator": paginator,
+        "page_obj": page,
+        "is_paginated": page.has_other_pages(),
+        "sort": sort,
+    })
+
+
+@resolve_user
+@prefetch_validators(post_detail_validators, apost_detail_validators)
+@condition(post_detail_etag, post_detail_last_modified)
+async def post_detail_async(request, pk):
+    version = await aget_post_cache_version(pk)
+    key = post_object_key(pk, version)
+
+    post = await cache_aget(key)
+    if post is None:
+        try:
+            post = await Post.objects.select_related("author").aget(pk=pk)
+        except Post.DoesNotExist:
+            raise Http404("No Post matches the given query.")
+        await cache_aset(key, post, get_fragment_timeout())
+
+    # The fragments of post_detail.html that are not cached render from
+    # these. Checked right before rendering, to keep the window in which a
+    # cached fragment could expire small
+    comment_page = CommentPage(post.pk)
+    if not await fragment_is_cached("post_tags", [post.pk, version]):
+        await aprefetch_related_objects([post], "tags")
+    if post.comment_count and not await fragment_is_cached(
+        "post_comments", [post.pk, version, request.user.pk]
+    ):
+        await comment_page.aload()
+
+    return render(request, "blog/post_detail.html", {
+        "post": post,
+        "object": post,
+        "cache_version": version,
+        "fragment_timeout": get_fragment_timeout(),
+        "comment_page": comment_page,
+    })
+
+
+@resolve_user
+@prefetch_validators(post_list_validators, apost_list_validators)
+@condition(post_list_etag, post_list_last_modified)
+async def search_posts_async(request):
+    query = request.GET.get("q", "").strip()
+    results = []
+    page = None
+
+    if query:
+        # Search backends query the database (or build their index from it)
+        # synchronously
+        post_ids = await sync_to_async(get_search_backend().search)(query)
+        paginator = Paginator(post_ids, get_posts_per_page())
+        page = paginator.get_page(request.GET.get("page"))
+        posts = await Post.objects.for_listing().ain_bulk(page.object_list)
+        results = [posts[pk] for pk in page.object_list if pk in posts]
+
+    return render(request, "blog/search_results.html", {
+        "query": query,
+        "posts": results,
+        "page_obj": page,
+        "is_paginated": page is not None and page.has_other_pages(),
+    })
+
+
+def event_stream_response(request, channel):
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(
+            "Live updates need the ASGI server (django_blog.asgi).",
+            status=503, content_type="text/plain",
+        )
+    if streams_full():
+        response = HttpResponse(
+            "Too many open live update streams; try again later.",
+            status=503, content_type="text/plain",
+        )
+        response["Retry-After"] = "30"
+        return response
+    response = StreamingHttpResponse(event_stream(channel), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # Tell nginx not to buffer the stream
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+async def post_events(request):
+    """
+    Server-Sent Events stream of new posts (see blog/events.py).
+    """
+    return event_stream_response(request, posts_channel())
+
+
+async def comment_events(request, pk):
+    """
+    Server-Sent Events stream of new comments on one post.
+    """
+    if not await Post.objects.filter(pk=pk).aexists():
+        raise Http404("No Post matches the given query.")
+    return event_stream_response(request, comments_channel(pk))
@@ -13,4 +13,11 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'django_blog.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# The live-update streams (blog/events.py) are served next to Django's
+# handler, so an idle stream costs a coroutine, not a thread. Imported after
+# get_asgi_application() has set up the app registry.
+from blog.events import EventStreamApplication  # noqa: E402
+
+application = EventStreamApplication(django_application)
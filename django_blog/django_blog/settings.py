@@ -140,3 +140,60 @@ LOGIN_REDIRECT_URL = "profile"
 LOGOUT_REDIRECT_URL = "login"
 LOGIN_URL = "login"
 
+
+
+# Post list pagination: "cursor" (keyset on published_date, id - constant cost
+# per page) or "offset" (classic ?page=N, fine for small deployments).
+BLOG_PAGINATION = os.getenv("BLOG_PAGINATION", "cursor")
+BLOG_POSTS_PER_PAGE = 10
+
+# Full-text search backend for search_posts: "auto" picks SQLite FTS5 or
+# Postgres full-text search when available and falls back to an in-memory
+# inverted index. Set a dotted path to force a backend class.
+BLOG_SEARCH_BACKEND = os.getenv("BLOG_SEARCH_BACKEND", "auto")
+BLOG_SEARCH_MAX_RESULTS = 1000
+
+# Treat tags that differ only by case ("Django", "django") as the same tag
+BLOG_TAGS_CASE_INSENSITIVE = False
+
+
+# Cache used for post detail fragments and the cache versions that
+# invalidate them (blog/cache.py): "locmem" (default) or "file".
+# locmem is per process, so a version bump only reaches the process that
+# made the change: deployments with more than one worker process must use
+# "file" (shared by the processes on one host) or point CACHES at another
+# shared backend, or other workers serve stale pages until the timeout.
+BLOG_CACHE_BACKEND = os.getenv("BLOG_CACHE_BACKEND", "locmem")
+
+if BLOG_CACHE_BACKEND == "file":
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": BASE_DIR / ".cache",
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "django-blog",
+        }
+    }
+
+BLOG_FRAGMENT_CACHE_TIMEOUT = 60 * 60
+
+# Comments shown per page on the post detail page and the lazy-load endpoint
+BLOG_COMMENTS_PER_PAGE = 20
+
+# Live updates (blog/events.py): seconds between keepalive comments on an
+# idle event stream, and events buffered per stream before a slow reader
+# is disconnected, and the most streams one process serves at once (more
+# are answered 503)
+BLOG_EVENTS_KEEPALIVE = 15
+BLOG_EVENTS_BUFFER_SIZE = 100
+BLOG_EVENTS_MAX_STREAMS = 10000
+
+# Serve the post list, post detail and search pages with async views that
+# use the async ORM. Only worth it under an ASGI server (django_blog.asgi);
+# under WSGI every async view runs on its own event loop.
+BLOG_ASYNC_VIEWS = os.getenv("BLOG_ASYNC_VIEWS", "0") == "1"